@@ -1,55 +1,227 @@
 import os
-import hashlib
-import json
+import sqlite3
+import functools
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, List, Optional, Iterable, Iterator, Tuple, Union
 import logging
 import numpy as np
 import pandas as pd
+import h5py
+import xxhash
+from pyfastcdc import FastCDC
+from src.core.utils.file_utils import read_json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("DataDeduplication")
 
+# Deduplication keys only need collision resistance for index lookups, not
+# cryptographic strength, so a fast non-cryptographic fingerprint is used.
+# "/ms": arrays and HDF5 datasets are hashed as element multisets.
+HASH_ALGO = "xxh3_128/ms"
+# Entries written before hash_algo was recorded were hashed with SHA-256
+LEGACY_HASH_ALGO = "sha256"
+
+# Default number of decimals floats are rounded to before hashing, so that
+# uploads differing only in float precision or numeric width hash the same
+DEFAULT_HASH_PRECISION = 6
+
+# Read size used when streaming HDF5 datasets
+HDF5_READ_BLOCK_BYTES = 16 << 20
+
+# Maximum number of (hash, data_type, hash_algo) lookups memoized per service
+MATCH_CACHE_SIZE = 4096
+
+# Maximum number of DataFrame schemas with a cached hashing plan per service
+SCHEMA_PLAN_CACHE_SIZE = 256
+
+# Content-defined chunking bounds (FastCDC) for partial-duplicate detection
+CDC_MIN_SIZE = 4 << 10
+CDC_AVG_SIZE = 16 << 10
+CDC_MAX_SIZE = 64 << 10
+
+# SimHash fingerprints: entries within SIMHASH_MAX_DISTANCE bits are similar.
+# Fingerprints are split into SIMHASH_BANDS bands for LSH candidate lookup; with
+# more bands than the maximum distance, any similar pair shares at least one band.
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+SIMHASH_MAX_DISTANCE = 3
+# Tokens unpacked to bits at a time when summing SimHash votes (64 bytes each)
+SIMHASH_BLOCK_TOKENS = 1 << 16
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_COLUMNS = [f"simhash_band{i}" for i in range(SIMHASH_BANDS)]
+
+# Array digests sum per-element hashes; the second sum re-mixes them with this constant
+_MULTISET_REMIX = np.uint64(0x9E3779B97F4A7C15)
+_UINT64_MASK = (1 << 64) - 1
+
+_ENTRY_COLUMNS = "entry_id, hash, hash_algo, data_type, paper_id, user_id, timestamp"
+
+# Rows fetched per lock acquisition by iter_entries
+ITER_ENTRIES_BATCH = 1000
+
+
 class DataDeduplication:
     """Service for detecting duplicate or similar data"""
     
-    def __init__(self, storage_path: str = "./storage/deduplication"):
+    def __init__(
+        self,
+        storage_path: str = "./storage/deduplication",
+        precision: Optional[int] = DEFAULT_HASH_PRECISION
+    ):
         """
         Initialize data deduplication service
         
         Args:
             storage_path: Path to store deduplication metadata
+            precision: Decimals floats are rounded to before hashing (None hashes exact values)
         """
         self.storage_path = storage_path
+        self.precision = precision
+        # Hashes are only comparable at the same precision, so it is part of the algorithm name
+        self.hash_algo = HASH_ALGO if precision is None else f"{HASH_ALGO}/q{precision}"
         self._ensure_storage_dir()
+        self.db_path = os.path.join(self.storage_path, "data_index.db")
+        # Legacy JSON index, imported into the database on first open
         self.data_index_path = os.path.join(self.storage_path, "data_index.json")
-        self._load_data_index()
+        self._open_database()
+        self._migrate_json_index()
+        # Ingestion and scans call in from worker threads; the connection and its
+        # transactions are used by one thread at a time
+        self._db_lock = threading.RLock()
+        # DataFrame hashing plans keyed by (column labels, dtypes)
+        self._dataframe_plans: "OrderedDict[Tuple[tuple, tuple], Tuple[bytes, list, bool]]" = OrderedDict()
+        self._plan_lock = threading.Lock()
+        self._chunker = FastCDC(avg_size=CDC_AVG_SIZE, min_size=CDC_MIN_SIZE, max_size=CDC_MAX_SIZE)
+        # Memoized index lookups, invalidated whenever the index changes
+        self._find_matches_cached = functools.lru_cache(maxsize=MATCH_CACHE_SIZE)(self._find_matches)
+        self._cache_data_version = self._data_version()
     
     def _ensure_storage_dir(self):
         """Ensure storage directory exists"""
         if not os.path.exists(self.storage_path):
             os.makedirs(self.storage_path)
     
-    def _load_data_index(self):
-        """Load data index from file"""
-        if os.path.exists(self.data_index_path):
-            try:
-                with open(self.data_index_path, "r", encoding="utf-8") as f:
-                    self.data_index = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading data index: {e}")
-                self.data_index = {}
-        else:
-            self.data_index = {}
+    def _open_database(self):
+        """Open the SQLite data index and create its schema"""
+        # Autocommit mode: each statement is its own durable transaction
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                entry_id TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                hash_algo TEXT NOT NULL,
+                data_type TEXT,
+                paper_id TEXT,
+                user_id TEXT,
+                timestamp TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_hash ON entries(hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_type ON entries(data_type)")
+        self._ensure_simhash_columns()
+        # Distinct content-defined chunk hashes of each entry
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                entry_id TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                PRIMARY KEY (entry_id, chunk_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunk_hash ON chunks(chunk_hash)")
+        self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS query_chunks (chunk_hash TEXT PRIMARY KEY)")
+    
+    def _ensure_simhash_columns(self):
+        """Add SimHash columns to indexes created before SimHash support"""
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        for column in ["simhash"] + _BAND_COLUMNS:
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE entries ADD COLUMN {column} INTEGER")
+        for column in _BAND_COLUMNS:
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{column} ON entries({column})")
     
-    def _save_data_index(self):
-        """Save data index to file"""
+    def _migrate_json_index(self):
+        """Import entries from the legacy data_index.json file"""
+        if not os.path.exists(self.data_index_path):
+            return
         try:
-            with open(self.data_index_path, "w", encoding="utf-8") as f:
-                json.dump(self.data_index, f, indent=2)
+            data_index = read_json(self.data_index_path)
         except Exception as e:
-            logger.error(f"Error saving data index: {e}")
+            logger.error(f"Error loading legacy data index: {e}")
+            return
+        
+        rows = [
+            (
+                entry_id,
+                entry.get("hash"),
+                entry.get("hash_algo", LEGACY_HASH_ALGO),
+                entry.get("data_type"),
+                entry.get("paper_id"),
+                entry.get("user_id"),
+                entry.get("timestamp")
+            )
+            for entry_id, entry in data_index.items()
+        ]
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO entries ({_ENTRY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        os.replace(self.data_index_path, f"{self.data_index_path}.migrated")
+        logger.info(f"Migrated {len(rows)} entries from {self.data_index_path} to {self.db_path}")
+    
+    def _data_version(self) -> int:
+        """Get the SQLite data version, which changes when other connections commit"""
+        with self._db_lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def _invalidate_match_cache(self):
+        """Drop memoized index lookups"""
+        self._find_matches_cached.cache_clear()
+    
+    def close(self):
+        """Close the data index database"""
+        self._conn.close()
+    
+    def count_entries(self) -> int:
+        """
+        Count entries in the data index
+        
+        Returns:
+            Number of indexed entries
+        """
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    
+    def iter_entries(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Iterate over indexed entries without loading the whole index
+        
+        Returns:
+            Iterator of (entry_id, entry) tuples
+        """
+        with self._db_lock:
+            cursor = self._conn.execute(f"SELECT {_ENTRY_COLUMNS}, simhash FROM entries ORDER BY rowid")
+        while True:
+            # The lock is not held while the caller consumes each batch
+            with self._db_lock:
+                rows = cursor.fetchmany(ITER_ENTRIES_BATCH)
+            if not rows:
+                return
+            for row in rows:
+                entry = dict(row)
+                entry["simhash"] = _from_sqlite_int(entry["simhash"])
+                yield entry.pop("entry_id"), entry
     
     def calculate_data_hash(self, data: Any) -> str:
         """
@@ -61,81 +233,405 @@ class DataDeduplication:
         Returns:
             Hash string
         """
+        h = xxhash.xxh3_128()
+        try:
+            self._hash_update(data, h)
+        except Exception as e:
+            # If hashing fails, use error message as fallback
+            logger.warning(f"Error calculating hash: {e}")
+            return xxhash.xxh3_128(f"error_{str(e)}".encode("utf-8")).hexdigest()
+        return h.hexdigest()
+    
+    @functools.singledispatchmethod
+    def _hash_update(self, data: Any, h: "xxhash.xxh3_128"):
+        """
+        Feed data into a hash, dispatching on the data type
+        
+        Args:
+            data: Data to hash (types without a registered handler are hashed as text)
+            h: Hash object to update
+        """
+        h.update(str(data).encode("utf-8"))
+    
+    @_hash_update.register
+    def _hash_dict(self, data: dict, h: "xxhash.xxh3_128"):
+        """
+        Hash a dictionary by streaming each value into the same hasher
+        
+        Keys are visited in sorted order so the hash does not depend on
+        insertion order.
+        
+        Args:
+            data: Dictionary to hash
+            h: Hash object to update
+        """
+        h.update(b"{")
+        for key in sorted(data, key=str):
+            h.update(str(key).encode("utf-8"))
+            h.update(b"=")
+            self._hash_update(data[key], h)
+            h.update(b"\x1e")
+        h.update(b"}")
+    
+    @_hash_update.register
+    def _hash_dataframe(self, df: pd.DataFrame, h: "xxhash.xxh3_128"):
+        """
+        Hash a DataFrame by streaming its column buffers into the hasher
+        
+        Columns are visited in sorted name order and rows in sorted index order,
+        so the hash does not depend on column or row layout. Rather than
+        copying the whole frame into sorted order, each column is reordered
+        on its own, and not at all when the index is already sorted.
+        
+        Args:
+            df: DataFrame to hash
+            h: Hash object to update
+        """
+        header, steps, homogeneous = self._get_dataframe_plan(df)
+        row_order = None if df.index.is_monotonic_increasing else df.index.argsort(kind="stable")
+        
+        if homogeneous:
+            # A single-dtype frame is one 2D block; its columns are views into it
+            column_values = df.to_numpy().T
+        else:
+            column_values = [column for _, column in df.items()]
+        
+        h.update(header)
+        for position, to_array in steps:
+            arr = to_array(column_values[position])
+            if row_order is not None:
+                arr = arr.take(row_order)
+            arr = np.ascontiguousarray(arr)
+            h.update(arr.dtype.str.encode("utf-8"))
+            h.update(arr.view(np.uint8))
+    
+    def _get_dataframe_plan(self, df: pd.DataFrame) -> Tuple[bytes, List[Tuple[int, Callable]], bool]:
+        """
+        Get the hashing plan for a DataFrame's schema, building it on first use
+        
+        Files ingested for one paper usually share a schema, so column ordering
+        and per-column conversions are worked out once per schema.
+        
+        Args:
+            df: DataFrame to hash
+            
+        Returns:
+            Tuple of (column header bytes, [(column position, converter)], whether
+            all columns share one numeric numpy dtype)
+        """
+        signature = (tuple(df.columns), tuple(df.dtypes))
+        with self._plan_lock:
+            plan = self._dataframe_plans.get(signature)
+            if plan is not None:
+                self._dataframe_plans.move_to_end(signature)
+                return plan
+        
+        dtypes = list(df.dtypes)
+        homogeneous = (
+            len(set(dtypes)) == 1 and isinstance(dtypes[0], np.dtype) and dtypes[0] != object
+        )
+        column_order = range(df.shape[1]) if df.columns.is_monotonic_increasing else df.columns.argsort(kind="stable")
+        header = str(list(df.columns.take(column_order))).encode("utf-8")
+        steps = [(position, self._column_converter(dtypes[position], homogeneous)) for position in column_order]
+        plan = (header, steps, homogeneous)
+        
+        with self._plan_lock:
+            self._dataframe_plans[signature] = plan
+            if len(self._dataframe_plans) > SCHEMA_PLAN_CACHE_SIZE:
+                self._dataframe_plans.popitem(last=False)
+        return plan
+    
+    def _column_converter(self, dtype: Any, from_array: bool) -> Callable[[Any], np.ndarray]:
+        """
+        Choose how a column of the given dtype is turned into a hashable array
+        
+        Args:
+            dtype: Column dtype
+            from_array: Whether the converter receives column arrays instead of Series
+            
+        Returns:
+            Function converting a column to a numeric array
+        """
+        if not isinstance(dtype, np.dtype):
+            # Extension dtypes may or may not convert to object arrays
+            def convert_extension(column: pd.Series) -> np.ndarray:
+                arr = self._canonicalize(column.to_numpy())
+                if arr.dtype == object:
+                    return pd.util.hash_pandas_object(column, index=False).to_numpy()
+                return arr
+            return convert_extension
+        
+        if dtype == object:
+            # Object buffers hold pointers; hash the values instead
+            def convert(values: np.ndarray) -> np.ndarray:
+                return pd.util.hash_array(values)
+        else:
+            def convert(values: np.ndarray) -> np.ndarray:
+                return self._canonicalize(values)
+        
+        if from_array:
+            return convert
+        return lambda column: convert(column.to_numpy())
+    
+    @_hash_update.register
+    def _hash_ndarray(self, data: np.ndarray, h: "xxhash.xxh3_128"):
+        """
+        Hash a numpy array independently of element order
+        
+        Args:
+            data: Array to hash
+            h: Hash object to update
+        """
+        canonical = self._canonicalize(data)
+        _hash_multiset(h, canonical.dtype, [canonical])
+    
+    def _canonicalize(self, arr: np.ndarray) -> np.ndarray:
+        """
+        Convert numeric data to a canonical representation for hashing
+        
+        Floats are narrowed to float32 before being rounded to self.precision
+        decimals, so a float64 array and its float32 downcast canonicalize to
+        the same values. Integers are widened to 64 bits.
+        
+        Args:
+            arr: Array to canonicalize
+            
+        Returns:
+            Canonical array (arr itself if no conversion applies)
+        """
+        if self.precision is None:
+            return arr
+        if np.issubdtype(arr.dtype, np.floating):
+            # Adding 0.0 folds -0.0 into 0.0
+            return np.round(arr.astype(np.float32), self.precision) + np.float32(0.0)
+        if np.issubdtype(arr.dtype, np.signedinteger):
+            return arr.astype(np.int64, copy=False)
+        if np.issubdtype(arr.dtype, np.unsignedinteger):
+            return arr.astype(np.uint64, copy=False)
+        return arr
+    
+    @_hash_update.register
+    def _hash_hdf5_dataset(self, dataset: h5py.Dataset, h: "xxhash.xxh3_128"):
+        """
+        Hash an HDF5 dataset by streaming it in slabs along its first axis
+        
+        The digest is the same as for the dataset loaded into memory, so it
+        depends neither on element order nor on the chunk layout on disk.
+        
+        Args:
+            dataset: HDF5 dataset to hash
+            h: Hash object to update
+        """
+        canonical_dtype = self._canonicalize(np.empty(0, dtype=dataset.dtype)).dtype
+        if dataset.shape == () or dataset.size == 0:
+            blocks = [dataset[()]]
+        else:
+            row_bytes = max(1, dataset.dtype.itemsize * (dataset.size // dataset.shape[0]))
+            rows = max(1, HDF5_READ_BLOCK_BYTES // row_bytes)
+            blocks = (dataset[start:start + rows] for start in range(0, dataset.shape[0], rows))
+        _hash_multiset(h, canonical_dtype, (self._canonicalize(np.asarray(block)) for block in blocks))
+    
+    def calculate_simhash(self, data: Any) -> Optional[int]:
+        """
+        Calculate a 64-bit SimHash fingerprint for similarity detection
+        
+        Tabular data is tokenized into column/value pairs, arrays into their
+        values and text into word 3-shingles. Similar data yields fingerprints
+        that differ in few bits.
+        
+        Args:
+            data: Data to fingerprint
+            
+        Returns:
+            SimHash fingerprint, or None if the data type is not supported
+        """
         try:
             if isinstance(data, pd.DataFrame):
-                # For DataFrame, sort columns and values for consistent hash
-                sorted_df = data.sort_index(axis=0).sort_index(axis=1)
-                # Convert to CSV string, handling object types
-                data_str = sorted_df.to_csv(index=False, encoding='utf-8')
+                # Columns are tokenized one at a time to bound memory
+                token_blocks = (
+                    pd.util.hash_pandas_object(column, index=False).to_numpy()
+                    ^ np.uint64(xxhash.xxh3_64_intdigest(str(name).encode("utf-8")))
+                    for name, column in data.items()
+                )
             elif isinstance(data, np.ndarray):
-                # For numpy array, sort and convert to string
-                if data.size > 0:
-                    # Handle different data types
-                    if np.issubdtype(data.dtype, np.object_):
-                        # For object arrays, sort and convert to string
-                        sorted_array = np.sort(data.flatten())
-                        data_str = str(sorted_array)
-                    else:
-                        # For numeric arrays, use numpy's tostring
-                        sorted_array = np.sort(data.flatten())
-                        data_str = sorted_array.tostring().hex()
-                else:
-                    data_str = "empty_array"
-            elif isinstance(data, dict):
-                # For dict, sort keys for consistent hash
-                sorted_dict = {k: self.calculate_data_hash(v) for k, v in sorted(data.items())}
-                data_str = json.dumps(sorted_dict, ensure_ascii=False)
+                token_blocks = [pd.util.hash_array(data.ravel())]
+            elif isinstance(data, str):
+                words = data.split()
+                shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))] if words else []
+                token_blocks = [pd.util.hash_array(np.array(shingles, dtype=object))]
             else:
-                # For other types, convert to string
-                data_str = str(data)
+                return None
+            return _simhash(token_blocks)
         except Exception as e:
-            # If hashing fails, use error message as fallback
-            logger.warning(f"Error calculating hash: {e}")
-            data_str = f"error_{str(e)}"
+            logger.warning(f"Error calculating simhash: {e}")
+            return None
+    
+    def chunk_and_hash(self, path_or_bytes: Union[str, bytes, bytearray, memoryview]) -> List[str]:
+        """
+        Split raw data into content-defined chunks and hash each chunk
         
-        return hashlib.sha256(data_str.encode("utf-8")).hexdigest()
+        Chunk boundaries depend on content rather than offsets, so an edit or
+        append only changes the hashes of the chunks it touches.
+        
+        Args:
+            path_or_bytes: Path to a file, or the raw bytes to chunk
+            
+        Returns:
+            List of chunk hashes in content order
+        """
+        if isinstance(path_or_bytes, str):
+            chunks = self._chunker.cut_file(path_or_bytes)
+        else:
+            chunks = self._chunker.cut_buf(path_or_bytes)
+        return [xxhash.xxh3_128_hexdigest(chunk.data) for chunk in chunks]
     
-    def find_similar_data(self, data_hash: str, data_type: str) -> List[Dict[str, Any]]:
+    def find_similar_data(
+        self,
+        data_hash: str,
+        data_type: str,
+        hash_algo: Optional[str] = None,
+        chunk_hashes: Optional[List[str]] = None,
+        simhash: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Find similar data in index
         
         Args:
             data_hash: Hash of the data
             data_type: Type of the data
+            hash_algo: Algorithm that produced data_hash (defaults to this service's)
+            chunk_hashes: Content-defined chunk hashes of the data (from chunk_and_hash)
+            simhash: SimHash fingerprint of the data (from calculate_simhash)
             
         Returns:
             List of similar data entries
         """
-        similar_data = []
-        
-        for entry_id, entry in self.data_index.items():
-            # Check exact hash match
-            if entry.get("hash") == data_hash:
-                similar_data.append({
-                    "entry_id": entry_id,
-                    "paper_id": entry.get("paper_id"),
-                    "user_id": entry.get("user_id"),
-                    "data_type": entry.get("data_type"),
-                    "timestamp": entry.get("timestamp"),
-                    "similarity": 1.0,  # Exact match
-                    "match_type": "exact"
-                })
-            # Check data type similarity
-            elif entry.get("data_type") == data_type:
-                # For same data type, consider as potentially similar
-                similar_data.append({
-                    "entry_id": entry_id,
-                    "paper_id": entry.get("paper_id"),
-                    "user_id": entry.get("user_id"),
-                    "data_type": entry.get("data_type"),
-                    "timestamp": entry.get("timestamp"),
-                    "similarity": 0.5,  # Partial match
-                    "match_type": "type"
-                })
-        
-        return similar_data
-    
-    def add_data_to_index(self, data_hash: str, data_type: str, paper_id: str, user_id: str) -> str:
+        hash_algo = hash_algo or self.hash_algo
+        with self._db_lock:
+            # Entries added or removed by other connections invalidate the cache
+            data_version = self._data_version()
+            if data_version != self._cache_data_version:
+                self._invalidate_match_cache()
+                self._cache_data_version = data_version
+            
+            matches = [dict(match) for match in self._find_matches_cached(data_hash, data_type, hash_algo, simhash)]
+            if not chunk_hashes:
+                return matches
+            
+            # Entries sharing chunks are ranked by Jaccard similarity of their chunk sets
+            chunk_matches = self._find_chunk_matches(chunk_hashes)
+        exact_ids = {match["entry_id"] for match in matches if match["match_type"] == "exact"}
+        exact = [match for match in matches if match["match_type"] == "exact"]
+        partial = sorted(
+            (match for entry_id, match in chunk_matches.items() if entry_id not in exact_ids),
+            key=lambda match: match["similarity"],
+            reverse=True
+        )
+        others = [match for match in matches if match["entry_id"] not in exact_ids and match["entry_id"] not in chunk_matches]
+        return exact + partial + others
+    
+    def _find_chunk_matches(self, chunk_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Query the index for entries sharing content-defined chunks
+        
+        Args:
+            chunk_hashes: Chunk hashes of the data
+            
+        Returns:
+            Dictionary mapping entry IDs to match results
+        """
+        query_chunks = set(chunk_hashes)
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM query_chunks")
+            self._conn.executemany("INSERT INTO query_chunks (chunk_hash) VALUES (?)", ((h,) for h in query_chunks))
+            rows = self._conn.execute(
+                f"""
+                WITH shared AS (
+                    SELECT c.entry_id, COUNT(*) AS shared_chunks
+                    FROM chunks c JOIN query_chunks q ON c.chunk_hash = q.chunk_hash
+                    GROUP BY c.entry_id
+                )
+                SELECT {", ".join(f"e.{column}" for column in _ENTRY_COLUMNS.split(", "))},
+                       shared.shared_chunks,
+                       (SELECT COUNT(*) FROM chunks t WHERE t.entry_id = e.entry_id) AS total_chunks
+                FROM shared JOIN entries e ON e.entry_id = shared.entry_id
+                ORDER BY e.rowid
+                """
+            ).fetchall()
+        
+        matches = {}
+        for row in rows:
+            union = len(query_chunks) + row["total_chunks"] - row["shared_chunks"]
+            matches[row["entry_id"]] = self._format_match(row, row["shared_chunks"] / union, "chunks")
+        return matches
+    
+    def _find_matches(
+        self,
+        data_hash: str,
+        data_type: str,
+        hash_algo: str,
+        simhash: Optional[int]
+    ) -> Tuple[Dict[str, Any], ...]:
+        """
+        Query the index for exact and SimHash matches
+        
+        Args:
+            data_hash: Hash of the data
+            data_type: Type of the data
+            hash_algo: Algorithm that produced data_hash
+            simhash: SimHash fingerprint of the data (None to skip similarity search)
+            
+        Returns:
+            Tuple of match results (shared by the cache, callers must copy)
+        """
+        # Hashes are only comparable within one algorithm
+        exact_rows = self._conn.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE hash = ? AND hash_algo = ? ORDER BY rowid",
+            (data_hash, hash_algo)
+        ).fetchall()
+        similar_data = [self._format_match(row, 1.0, "exact") for row in exact_rows]
+        if simhash is None:
+            return tuple(similar_data)
+        
+        # Candidates share at least one band; verify with the full Hamming distance
+        band_filter = " OR ".join(f"{column} = ?" for column in _BAND_COLUMNS)
+        candidate_rows = self._conn.execute(
+            f"SELECT {_ENTRY_COLUMNS}, simhash FROM entries "
+            f"WHERE data_type = ? AND ({band_filter}) AND NOT (hash = ? AND hash_algo = ?) ORDER BY rowid",
+            (data_type, *_simhash_bands(simhash), data_hash, hash_algo)
+        ).fetchall()
+        simhash_matches = []
+        for row in candidate_rows:
+            distance = (simhash ^ _from_sqlite_int(row["simhash"])).bit_count()
+            if distance <= SIMHASH_MAX_DISTANCE:
+                simhash_matches.append(self._format_match(row, 1.0 - distance / SIMHASH_BITS, "simhash"))
+        similar_data.extend(sorted(simhash_matches, key=lambda match: match["similarity"], reverse=True))
+        
+        return tuple(similar_data)
+    
+    def _format_match(self, row: sqlite3.Row, similarity: float, match_type: str) -> Dict[str, Any]:
+        """Build a match result for an indexed entry"""
+        return {
+            "entry_id": row["entry_id"],
+            "paper_id": row["paper_id"],
+            "user_id": row["user_id"],
+            "data_type": row["data_type"],
+            "timestamp": row["timestamp"],
+            "similarity": similarity,
+            "match_type": match_type
+        }
+    
+    def add_data_to_index(
+        self,
+        data_hash: str,
+        data_type: str,
+        paper_id: str,
+        user_id: str,
+        hash_algo: Optional[str] = None,
+        chunk_hashes: Optional[List[str]] = None,
+        simhash: Optional[int] = None
+    ) -> str:
         """
         Add data to index
         
@@ -144,22 +640,42 @@ class DataDeduplication:
             data_type: Type of the data
             paper_id: Paper ID
             user_id: User ID
+            hash_algo: Algorithm that produced data_hash (defaults to this service's)
+            chunk_hashes: Content-defined chunk hashes of the data (from chunk_and_hash)
+            simhash: SimHash fingerprint of the data (from calculate_simhash)
             
         Returns:
             Entry ID
         """
+        hash_algo = hash_algo or self.hash_algo
         entry_id = f"entry_{paper_id}_{user_id}_{datetime.utcnow().timestamp()}"
-        self.data_index[entry_id] = {
-            "hash": data_hash,
-            "data_type": data_type,
-            "paper_id": paper_id,
-            "user_id": user_id,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        self._save_data_index()
+        bands = _simhash_bands(simhash) if simhash is not None else [None] * SIMHASH_BANDS
+        with self._db_lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                f"INSERT INTO entries ({_ENTRY_COLUMNS}, simhash, {', '.join(_BAND_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (8 + SIMHASH_BANDS))})",
+                (
+                    entry_id, data_hash, hash_algo, data_type, paper_id, user_id, datetime.utcnow().isoformat(),
+                    _to_sqlite_int(simhash), *bands
+                )
+            )
+            if chunk_hashes:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO chunks (entry_id, chunk_hash) VALUES (?, ?)",
+                    ((entry_id, chunk_hash) for chunk_hash in set(chunk_hashes))
+                )
+            self._invalidate_match_cache()
         return entry_id
     
-    def check_duplication(self, data: Any, data_type: str, paper_id: str, user_id: str) -> Dict[str, Any]:
+    def check_duplication(
+        self,
+        data: Any,
+        data_type: str,
+        paper_id: str,
+        user_id: str,
+        chunk_hashes: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """
         Check if data is duplicate or similar to existing data
         
@@ -168,17 +684,74 @@ class DataDeduplication:
             data_type: Type of the data
             paper_id: Paper ID
             user_id: User ID
+            chunk_hashes: Content-defined chunk hashes of the raw data (from chunk_and_hash)
             
         Returns:
             Duplication check result
         """
-        # Calculate data hash
+        # Calculate data hash and similarity fingerprint
         data_hash = self.calculate_data_hash(data)
+        simhash = self.calculate_simhash(data)
         logger.info(f"Checking data duplication for hash: {data_hash[:10]}...")
         
-        return self.check_duplication_by_hash(data_hash, data_type, paper_id, user_id)
+        return self.check_duplication_by_hash(
+            data_hash, data_type, paper_id, user_id,
+            hash_algo=self.hash_algo, chunk_hashes=chunk_hashes, simhash=simhash
+        )
+    
+    def check_and_index(
+        self,
+        data: Any,
+        data_type: str,
+        paper_id: str,
+        user_id: str,
+        chunk_hashes: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Check data for duplicates and add it to the index as one step
+        
+        Concurrent checks of the same data (e.g. two uploads ingested in
+        parallel) therefore see each other instead of both finding nothing.
+        
+        Args:
+            data: Data to check
+            data_type: Type of the data
+            paper_id: Paper ID
+            user_id: User ID
+            chunk_hashes: Content-defined chunk hashes of the raw data (from chunk_and_hash)
+            
+        Returns:
+            Duplication check result
+        """
+        # Hashing needs no lock; only the lookup and insert must not interleave
+        data_hash = self.calculate_data_hash(data)
+        simhash = self.calculate_simhash(data)
+        with self._db_lock:
+            result = self.check_duplication_by_hash(
+                data_hash, data_type, paper_id, user_id,
+                hash_algo=self.hash_algo, chunk_hashes=chunk_hashes, simhash=simhash
+            )
+            self.add_data_to_index(
+                data_hash=data_hash,
+                data_type=data_type,
+                paper_id=paper_id,
+                user_id=user_id,
+                hash_algo=self.hash_algo,
+                chunk_hashes=chunk_hashes,
+                simhash=simhash
+            )
+        return result
     
-    def check_duplication_by_hash(self, data_hash: str, data_type: str, paper_id: str, user_id: str) -> Dict[str, Any]:
+    def check_duplication_by_hash(
+        self,
+        data_hash: str,
+        data_type: str,
+        paper_id: str,
+        user_id: str,
+        hash_algo: Optional[str] = None,
+        chunk_hashes: Optional[List[str]] = None,
+        simhash: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Check if data is duplicate or similar to existing data using a pre-calculated hash
         
@@ -187,32 +760,160 @@ class DataDeduplication:
             data_type: Type of the data
             paper_id: Paper ID
             user_id: User ID
+            hash_algo: Algorithm that produced data_hash (defaults to this service's)
+            chunk_hashes: Content-defined chunk hashes of the raw data (from chunk_and_hash)
+            simhash: SimHash fingerprint of the data (from calculate_simhash)
             
         Returns:
             Duplication check result
         """
+        hash_algo = hash_algo or self.hash_algo
         logger.info(f"Checking data duplication by hash: {data_hash[:10]}...")
         
         # Find similar data
-        similar_data = self.find_similar_data(data_hash, data_type)
+        similar_data = self.find_similar_data(data_hash, data_type, hash_algo, chunk_hashes, simhash)
         
-        # Determine duplication status
-        has_exact_match = any(item["similarity"] == 1.0 for item in similar_data)
+        result = self._build_check_result(data_hash, hash_algo, simhash, data_type, similar_data)
+        logger.info(f"Duplication check result: duplicate={result['has_duplicate']}, similar={result['has_similar']}")
+        return result
+    
+    def _build_check_result(
+        self,
+        data_hash: str,
+        hash_algo: str,
+        simhash: Optional[int],
+        data_type: str,
+        similar_data: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Build a duplication check result from the matches found"""
+        has_exact_match = any(item["match_type"] == "exact" for item in similar_data)
         has_similar_match = len(similar_data) > 0
-        
-        result = {
+        return {
             "data_hash": data_hash,
+            "hash_algo": hash_algo,
+            "simhash": simhash,
             "data_type": data_type,
             "has_duplicate": has_exact_match,
             "has_similar": has_similar_match,
             "similar_data": similar_data,
             "recommendation": self._generate_recommendation(has_exact_match, has_similar_match)
         }
+    
+    def scan_index(
+        self,
+        entry_ids: Optional[Iterable[str]] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """
+        Check indexed entries against each other in one columnar pass
         
-        logger.info(f"Duplication check result: duplicate={has_exact_match}, similar={has_similar_match}")
-        return result
+        The index is loaded column-wise and exact and SimHash matches are found
+        with vectorized grouping over all entries at once, instead of querying
+        the database once per entry. An entry is never reported as a match of
+        itself.
+        
+        Args:
+            entry_ids: Entry IDs to report on (None for all entries)
+            
+        Returns:
+            Iterator of (entry_id, entry, duplication check result) tuples
+        """
+        with self._db_lock:
+            rows = self._conn.execute(f"SELECT {_ENTRY_COLUMNS}, simhash FROM entries ORDER BY rowid").fetchall()
+        if not rows:
+            return
+        
+        # One array per column; simhash values are kept exact as uint64
+        names = _ENTRY_COLUMNS.split(", ")
+        values = list(zip(*rows))
+        columns = {name: np.array(values[k], dtype=object) for k, name in enumerate(names)}
+        stored_simhash = values[len(names)]
+        has_simhash = np.array([value is not None for value in stored_simhash])
+        simhash_values = np.array([_from_sqlite_int(value) or 0 for value in stored_simhash], dtype=np.uint64)
+        
+        # Entries with the same hash under the same algorithm form exact groups
+        exact_codes, _ = pd.factorize(
+            pd.Series(columns["hash"]).astype(str) + "\x00" + pd.Series(columns["hash_algo"]).astype(str)
+        )
+        exact_groups = _group_members(exact_codes)
+        type_codes, _ = pd.factorize(columns["data_type"])
+        simhash_neighbors = self._simhash_neighbors(type_codes, simhash_values, has_simhash, exact_codes)
+        
+        wanted = set(entry_ids) if entry_ids is not None else None
+        for i in range(len(rows)):
+            entry_id = columns["entry_id"][i]
+            if wanted is not None and entry_id not in wanted:
+                continue
+            
+            similar_data = [
+                self._format_match(_column_row(columns, j), 1.0, "exact")
+                for j in exact_groups[exact_codes[i]] if j != i
+            ]
+            neighbors = simhash_neighbors.get(i, [])
+            for j, distance in sorted(neighbors, key=lambda neighbor: (neighbor[1], neighbor[0])):
+                similar_data.append(
+                    self._format_match(_column_row(columns, j), 1.0 - distance / SIMHASH_BITS, "simhash")
+                )
+            
+            entry = {column: columns[column][i] for column in columns if column != "entry_id"}
+            entry["simhash"] = int(simhash_values[i]) if has_simhash[i] else None
+            yield entry_id, entry, self._build_check_result(
+                entry["hash"], entry["hash_algo"], entry["simhash"], entry["data_type"], similar_data
+            )
     
-    def _generate_recommendation(self, has_duplicate: bool, has_similar: bool) -> str:
+    def _simhash_neighbors(
+        self,
+        type_codes: np.ndarray,
+        simhash_values: np.ndarray,
+        has_simhash: np.ndarray,
+        exact_codes: np.ndarray
+    ) -> Dict[int, List[Tuple[int, int]]]:
+        """
+        Find pairs of entries within SIMHASH_MAX_DISTANCE bits of each other
+        
+        Candidate pairs are entries of the same data type sharing an LSH band;
+        their full Hamming distance is then computed in bulk.
+        
+        Args:
+            type_codes: Data type code per entry (-1 for none)
+            simhash_values: SimHash fingerprint per entry
+            has_simhash: Whether each entry has a fingerprint
+            exact_codes: Exact-match group per entry (pairs within a group are skipped)
+            
+        Returns:
+            Dictionary mapping entry positions to (other position, distance) pairs
+        """
+        candidates = np.flatnonzero(has_simhash & (type_codes >= 0))
+        band_mask = np.uint64((1 << _BAND_BITS) - 1)
+        
+        left_parts, right_parts = [], []
+        for band in range(SIMHASH_BANDS):
+            band_values = (simhash_values[candidates] >> np.uint64(band * _BAND_BITS)) & band_mask
+            keys = (type_codes[candidates].astype(np.int64) << _BAND_BITS) | band_values.astype(np.int64)
+            for members in _group_members(keys).values():
+                if len(members) < 2:
+                    continue
+                members = candidates[members]
+                left, right = np.triu_indices(len(members), 1)
+                left_parts.append(members[left])
+                right_parts.append(members[right])
+        if not left_parts:
+            return {}
+        
+        # The same pair can share several bands
+        pairs = np.unique(np.stack([np.concatenate(left_parts), np.concatenate(right_parts)], axis=1), axis=0)
+        left, right = pairs[:, 0], pairs[:, 1]
+        distances = _popcount64(simhash_values[left] ^ simhash_values[right])
+        keep = (distances <= SIMHASH_MAX_DISTANCE) & (exact_codes[left] != exact_codes[right])
+        
+        neighbors: Dict[int, List[Tuple[int, int]]] = {}
+        for i, j, distance in zip(left[keep].tolist(), right[keep].tolist(), distances[keep].tolist()):
+            neighbors.setdefault(i, []).append((j, distance))
+            neighbors.setdefault(j, []).append((i, distance))
+        return neighbors
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def _generate_recommendation(has_duplicate: bool, has_similar: bool) -> str:
         """
         Generate recommendation based on duplication check
         
@@ -240,8 +941,110 @@ class DataDeduplication:
         Returns:
             True if removed, False otherwise
         """
-        if entry_id in self.data_index:
-            del self.data_index[entry_id]
-            self._save_data_index()
-            return True
+        with self._db_lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                cursor = self._conn.execute("DELETE FROM entries WHERE entry_id = ?", (entry_id,))
+                self._conn.execute("DELETE FROM chunks WHERE entry_id = ?", (entry_id,))
+            if cursor.rowcount > 0:
+                self._invalidate_match_cache()
+                return True
         return False
+
+
+def _hash_multiset(h: "xxhash.xxh3_128", dtype: np.dtype, blocks: Iterable[np.ndarray]):
+    """
+    Feed the multiset of array elements into a hash
+    
+    Elements are hashed individually and the hashes summed (mod 2**64) under two
+    independent mixes, so the digest is the same however the elements are
+    ordered or split into blocks, and no block has to be sorted or kept.
+    
+    Args:
+        h: Hash object to update
+        dtype: Canonical element dtype
+        blocks: Canonicalized element blocks
+    """
+    count = 0
+    sums = [0, 0]
+    for block in blocks:
+        flat = np.asarray(block).ravel()
+        if flat.size == 0:
+            continue
+        tokens = pd.util.hash_array(flat)
+        # Integer reductions wrap around, which is the mod 2**64 sum wanted here
+        sums[0] = (sums[0] + int(tokens.sum(dtype=np.uint64))) & _UINT64_MASK
+        remixed = pd.util.hash_array(tokens ^ _MULTISET_REMIX)
+        sums[1] = (sums[1] + int(remixed.sum(dtype=np.uint64))) & _UINT64_MASK
+        count += flat.size
+    h.update(f"multiset{dtype.str}:{count}".encode("utf-8"))
+    for total in sums:
+        h.update(total.to_bytes(8, "little"))
+
+
+def _simhash(token_blocks: Iterable[np.ndarray]) -> Optional[int]:
+    """
+    Combine 64-bit token hashes into a SimHash fingerprint
+    
+    Each fingerprint bit is set when that bit is set in more than half of
+    the tokens. Votes are summed SIMHASH_BLOCK_TOKENS tokens at a time, so
+    memory stays constant however many tokens there are.
+    
+    Returns:
+        SimHash fingerprint, or None if there are no tokens
+    """
+    sums = np.zeros(SIMHASH_BITS, dtype=np.int64)
+    total = 0
+    for tokens in token_blocks:
+        tokens = tokens.astype(">u8", copy=False)
+        for start in range(0, tokens.size, SIMHASH_BLOCK_TOKENS):
+            block = np.ascontiguousarray(tokens[start:start + SIMHASH_BLOCK_TOKENS])
+            bits = np.unpackbits(block.view(np.uint8)).reshape(-1, SIMHASH_BITS)
+            sums += bits.sum(axis=0, dtype=np.int64)
+        total += tokens.size
+    if total == 0:
+        return None
+    return int.from_bytes(np.packbits(sums * 2 > total).tobytes(), "big")
+
+
+def _simhash_bands(simhash: int) -> List[int]:
+    """Split a SimHash fingerprint into LSH bands"""
+    mask = (1 << _BAND_BITS) - 1
+    return [(simhash >> (i * _BAND_BITS)) & mask for i in range(SIMHASH_BANDS)]
+
+
+def _to_sqlite_int(value: Optional[int]) -> Optional[int]:
+    """Store an unsigned 64-bit value in SQLite's signed INTEGER"""
+    if value is None:
+        return None
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _from_sqlite_int(value: Optional[int]) -> Optional[int]:
+    """Read an unsigned 64-bit value stored by _to_sqlite_int"""
+    if value is None:
+        return None
+    return value & ((1 << 64) - 1)
+
+
+def _group_members(codes: np.ndarray) -> Dict[int, np.ndarray]:
+    """Group array positions by code value with one stable sort"""
+    if codes.size == 0:
+        return {}
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    boundaries = np.flatnonzero(sorted_codes[1:] != sorted_codes[:-1]) + 1
+    return {int(codes[members[0]]): members for members in np.split(order, boundaries)}
+
+
+def _column_row(columns: Dict[str, np.ndarray], position: int) -> Dict[str, Any]:
+    """Materialize one entry from column arrays"""
+    return {column: values[position] for column, values in columns.items()}
+
+
+def _popcount64(values: np.ndarray) -> np.ndarray:
+    """Count set bits of uint64 values"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values).astype(np.int64)
+    bits = np.unpackbits(np.ascontiguousarray(values).view(np.uint8)).reshape(-1, 64)
+    return bits.sum(axis=1, dtype=np.int64)
@@ -1,18 +1,62 @@
 import os
-from typing import Optional
+import mmap
+import functools
+import platform
+from typing import Optional, Iterator
 import logging
-from src.core.security.encryption import derive_encryption_key, encrypt_content, decrypt_content
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from src.core.security.encryption import (
+    derive_encryption_key, decrypt_content, encrypt_stream, decrypt_stream,
+    is_stream_encrypted, STREAM_CHUNK_SIZE, STREAM_MAGIC
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("DataEncryptionService")
 
+
+@functools.lru_cache(maxsize=None)
+def _check_aes_acceleration() -> bool:
+    """
+    Probe the OpenSSL AES-GCM path and check the CPU for AES instructions
+    
+    Runs once per process; the result is logged so deployments without
+    hardware AES are visible in the service logs.
+    
+    Returns:
+        True if the CPU advertises AES instructions (or cannot be inspected)
+    """
+    AESGCM(bytes(32)).encrypt(bytes(12), bytes(16), None)
+    logger.info(f"AES-GCM backend: {default_backend().openssl_version_text()}")
+    
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            cpu_flags = set()
+            for line in f:
+                # x86 reports "flags", ARM reports "Features"
+                if line.startswith(("flags", "Features")):
+                    cpu_flags.update(line.split(":", 1)[1].split())
+    except OSError:
+        # Not Linux; leave AES detection to OpenSSL
+        return True
+    
+    if "aes" not in cpu_flags:
+        logger.warning(
+            f"CPU ({platform.machine()}) does not report AES instructions; "
+            f"encryption of large research data will be significantly slower"
+        )
+        return False
+    return True
+
+
 class DataEncryptionService:
     """Service for encrypting/decrypting research data and papers"""
     
     def __init__(self, salt_storage_path: str = "./storage/salt"):
         self.salt_storage_path = salt_storage_path
         os.makedirs(salt_storage_path, exist_ok=True)
+        self.hardware_aes = _check_aes_acceleration()
     
     def get_user_encryption_key(self, user_id: str, password: str) -> bytes:
         """
@@ -28,10 +72,10 @@ class DataEncryptionService:
         salt_path = os.path.join(self.salt_storage_path, f"{user_id}.salt")
         
         # Load existing salt or generate new one
-        if os.path.exists(salt_path):
+        try:
             with open(salt_path, "rb") as f:
                 salt = f.read()
-        else:
+        except FileNotFoundError:
             # Generate and save new salt
             key, salt = derive_encryption_key(password)
             with open(salt_path, "wb") as f:
@@ -56,20 +100,38 @@ class DataEncryptionService:
         """
         if output_path is None:
             output_path = f"{file_path}.enc"
+        return self.encrypt_file_stream(file_path, output_path, key)
+    
+    def encrypt_file_stream(self, in_path: str, out_path: str, key: bytes, chunk: int = STREAM_CHUNK_SIZE) -> str:
+        """
+        Encrypt a file chunk by chunk without loading it into memory
         
-        # Read file content
-        with open(file_path, "rb") as f:
-            content = f.read()
-        
-        # Encrypt content
-        encrypted_content = encrypt_content(content, key)
-        
-        # Save encrypted content
-        with open(output_path, "wb") as f:
-            f.write(encrypted_content)
+        Args:
+            in_path: Path to file to encrypt
+            out_path: Path to write the encrypted file to
+            key: Encryption key
+            chunk: Plaintext chunk size in bytes
+            
+        Returns:
+            Path to encrypted file
+        """
+        with open(in_path, "rb") as src, open(out_path, "wb") as dst:
+            for piece in encrypt_stream(self._iter_file_chunks(src, chunk), key):
+                dst.write(piece)
         
-        logger.info(f"File encrypted: {file_path} -> {output_path}")
-        return output_path
+        logger.info(f"File encrypted: {in_path} -> {out_path}")
+        return out_path
+    
+    @staticmethod
+    def _iter_file_chunks(f, chunk: int) -> Iterator[bytes]:
+        """Yield fixed-size chunks of an open file through a read-only memory map"""
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            # Empty files cannot be memory-mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in range(0, size, chunk):
+                yield mapped[offset:offset + chunk]
     
     def decrypt_file(self, encrypted_path: str, key: bytes, output_path: Optional[str] = None) -> str:
         """
@@ -89,16 +151,24 @@ class DataEncryptionService:
             else:
                 output_path = f"{encrypted_path}.dec"
         
-        # Read encrypted content
-        with open(encrypted_path, "rb") as f:
-            encrypted_content = f.read()
-        
-        # Decrypt content
-        decrypted_content = decrypt_content(encrypted_content, key)
-        
-        # Save decrypted content
-        with open(output_path, "wb") as f:
-            f.write(decrypted_content)
+        with open(encrypted_path, "rb") as src:
+            stream_format = is_stream_encrypted(src.read(len(STREAM_MAGIC)))
+            src.seek(0)
+            
+            if stream_format:
+                # Decrypt chunk by chunk, discarding partial output on failure
+                try:
+                    with open(output_path, "wb") as dst:
+                        for piece in decrypt_stream(src, key):
+                            dst.write(piece)
+                except ValueError:
+                    os.remove(output_path)
+                    raise
+            else:
+                # Non-stream files are single-shot `encrypt_content` output (AES-GCM sealed or legacy Fernet)
+                decrypted_content = decrypt_content(src.read(), key)
+                with open(output_path, "wb") as dst:
+                    dst.write(decrypted_content)
         
         logger.info(f"File decrypted: {encrypted_path} -> {output_path}")
         return output_path
\ No newline at end of file
@@ -1,20 +1,46 @@
+import asyncio
 import os
+import threading
 import uuid
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 import h5py
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 from src.core.models.paper_model import SpaceCoordinate
-from src.core.models.data_model import DataIngestionResponse
+from src.core.models.data_model import DataIngestionRequest, DataIngestionResponse
 from src.agents.data_management.four_d_data_handler import FourDDataHandler
 from src.core.security.encryption import derive_encryption_key
 
+try:
+    import pyarrow  # noqa: F401
+    # Multi-threaded CSV parser
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+try:
+    import python_calamine  # noqa: F401
+    # Rust-based Excel reader (pandas >= 2.2)
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("DataIngestionService")
 
+# Chunk cache size for lazily read HDF5 inputs
+HDF5_CHUNK_CACHE_BYTES = 64 << 20
+
+# Total size of parsed files kept for re-ingestion of unchanged files
+LOAD_CACHE_MAX_BYTES = 512 << 20
+
+# Files of a batch loaded and hashed concurrently, bounding how many parsed files are held at once
+INGEST_BATCH_WINDOW = 8
+
 class DataIngestionService:
     """Service for ingesting and processing 4D research data"""
     
@@ -26,6 +52,12 @@ class DataIngestionService:
         self.deduplication_service = DataDeduplication()
         # Default encryption key (only for testing, use user-specific keys in production)
         self.default_key, _ = derive_encryption_key("default-encryption-key-change-in-production")
+        # (data, size in bytes) of parsed files keyed by (path, mtime_ns, size),
+        # least recently used first
+        self._load_cache: "OrderedDict[Tuple[str, int, int], Tuple[Any, int]]" = OrderedDict()
+        self._load_cache_bytes = 0
+        # Files are loaded in worker threads
+        self._load_cache_lock = threading.Lock()
 
     async def ingest_four_d_data(
         self,
@@ -62,21 +94,113 @@ class DataIngestionService:
             else:
                 encryption_key = self.default_key
         
+        # Load and process data based on file type (parsing is CPU and I/O bound, so off the event loop)
+        data_content = await asyncio.to_thread(self._load_data, data_path)
+        
+        # Hash the content once from its raw buffers; stored in the 4D metadata and returned to callers
+        data_hash = await asyncio.to_thread(self.four_d_handler.calculate_data_hash, data_content)
+        
+        return await self._ingest_loaded_data(
+            data_path, data_content, data_hash, user_id, paper_id, timestamp, space_coordinate, encryption_key
+        )
+    
+    async def ingest_four_d_data_batch(
+        self,
+        items: List[DataIngestionRequest],
+        timestamp: datetime,
+        encryption_key: Optional[bytes] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Ingest several 4D data files, hashing them in parallel and indexing their metadata in one transaction
+        
+        Args:
+            items: Files to ingest
+            timestamp: Timestamp
+            encryption_key: Encryption key (default key if None)
+            
+        Returns:
+            Ingestion results, in the order of items
+        """
+        # Check every file before anything is stored
+        missing = [item.data_path for item in items if not os.path.exists(item.data_path)]
+        if missing:
+            raise FileNotFoundError(f"Data files not found: {', '.join(missing)}")
+        encryption_key = encryption_key or self.default_key
+        
+        # Index rows of this batch only, written together once every item is stored
+        index_rows = []
+        results = []
+        try:
+            for start in range(0, len(items), INGEST_BATCH_WINDOW):
+                window = items[start:start + INGEST_BATCH_WINDOW]
+                loaded = await asyncio.gather(
+                    *(asyncio.to_thread(self._load_and_hash, item.data_path) for item in window)
+                )
+                
+                # Items go through duplicate checking one at a time, so duplicates within the batch are still found
+                for item, (data_content, data_hash) in zip(window, loaded):
+                    results.append(await self._ingest_loaded_data(
+                        item.data_path, data_content, data_hash, item.user_id, item.paper_id,
+                        timestamp, item.space_coordinate, encryption_key, index_rows=index_rows
+                    ))
+        finally:
+            await asyncio.to_thread(self.four_d_handler.add_to_index, index_rows)
+        
+        logger.info(f"Successfully ingested batch of {len(results)} 4D data files")
+        return results
+    
+    def _load_and_hash(self, data_path: str) -> Tuple[Any, str]:
+        """Load a data file and calculate its data hash"""
+        data_content = self._load_data(data_path)
+        return data_content, self.four_d_handler.calculate_data_hash(data_content)
+    
+    async def _ingest_loaded_data(
+        self,
+        data_path: str,
+        data_content: Any,
+        data_hash: str,
+        user_id: str,
+        paper_id: str,
+        timestamp: datetime,
+        space_coordinate: Optional[SpaceCoordinate],
+        encryption_key: bytes,
+        index_rows: Optional[list] = None
+    ) -> Dict[str, Any]:
+        """
+        Check, store and index loaded 4D data
+        
+        Args:
+            data_path: Path the data was loaded from
+            data_content: Loaded data
+            data_hash: calculate_data_hash(data_content)
+            user_id: User ID
+            paper_id: Paper ID
+            timestamp: Timestamp
+            space_coordinate: Spatial coordinates
+            encryption_key: Encryption key
+            index_rows: If given, the metadata index row is appended here instead of being
+                indexed immediately; the caller passes the rows to FourDDataHandler.add_to_index
+            
+        Returns:
+            Dictionary with ingestion results
+        """
         # Generate unique data ID
         data_id = f"data_{paper_id}_{uuid.uuid4().hex[:8]}"
         
         # Determine data type from file extension
         data_type = self._get_data_type(data_path)
         
-        # Load and process data based on file type
-        data_content = self._load_data(data_path)
+        # Content-defined chunks of the raw file detect partial duplicates
+        chunk_hashes = await asyncio.to_thread(self.deduplication_service.chunk_and_hash, data_path)
         
-        # Check for duplicate or similar data
-        duplication_check = self.deduplication_service.check_duplication(
+        # Check for duplicate or similar data and add it to the deduplication index
+        duplication_check = await asyncio.to_thread(
+            self.deduplication_service.check_and_index,
             data=data_content,
             data_type=data_type,
             paper_id=paper_id,
-            user_id=user_id
+            user_id=user_id,
+            chunk_hashes=chunk_hashes
         )
         
         # Send deduplication alerts if duplicates or similar data found
@@ -110,35 +234,34 @@ class DataIngestionService:
         
         # Add duplication check result to response
         
-        # Save encrypted 4D data
+        # Save encrypted 4D data (HDF5 build and encryption run in a worker thread)
         try:
-            storage_path = self.four_d_handler.save_four_d_data(
+            save_kwargs = dict(
                 data_content=data_content,
                 data_id=data_id,
                 user_id=user_id,
                 paper_id=paper_id,
                 timestamp=timestamp,
                 space_coordinate=space_coordinate,
-                encryption_key=encryption_key
+                encryption_key=encryption_key,
+                data_hash=data_hash
             )
+            if index_rows is None:
+                storage_path = await asyncio.to_thread(self.four_d_handler.save_four_d_data, **save_kwargs)
+            else:
+                storage_path, index_row = await asyncio.to_thread(self.four_d_handler.store_four_d_data, **save_kwargs)
+                index_rows.append(index_row)
         except Exception as e:
             logger.warning(f"Error saving to HDF5: {e}")
             # Use a dummy storage path if HDF5 storage fails
             storage_path = f"dummy_path_{data_id}"
         
-        # Add data to deduplication index
-        self.deduplication_service.add_data_to_index(
-            data_hash=duplication_check["data_hash"],
-            data_type=data_type,
-            paper_id=paper_id,
-            user_id=user_id
-        )
-        
         logger.info(f"Successfully ingested 4D data: {data_id} (paper: {paper_id})")
         
         return {
             "data_id": data_id,
             "data_content": data_content,
+            "data_hash": data_hash,
             "data_type": data_type,
             "storage_path": storage_path,
             "user_id": user_id,
@@ -148,7 +271,69 @@ class DataIngestionService:
     
     def _load_data(self, data_path: str) -> Any:
         """
-        Load data from file based on extension
+        Load data from file based on extension, reusing earlier parses of unchanged files
+        
+        Args:
+            data_path: Path to data file
+            
+        Returns:
+            Loaded data (DataFrame, array, etc.)
+        """
+        st = os.stat(data_path)
+        cache_key = (os.path.abspath(data_path), st.st_mtime_ns, st.st_size)
+        with self._load_cache_lock:
+            entry = self._load_cache.get(cache_key)
+            if entry is not None:
+                self._load_cache.move_to_end(cache_key)
+        if entry is not None:
+            cached, _ = entry
+            logger.info(f"Reusing parsed data for {data_path}")
+            # Shallow copy so callers cannot reshape the cached frame
+            return cached.copy(deep=False) if isinstance(cached, pd.DataFrame) else cached
+        
+        data = self._parse_data(data_path)
+        self._cache_loaded_data(cache_key, data)
+        return data
+    
+    def _cache_loaded_data(self, cache_key: Tuple[str, int, int], data: Any):
+        """
+        Keep parsed in-memory data for reuse, evicting least recently used entries
+        
+        Lazy results (HDF5 handles, npz archives) and data larger than the cache
+        are not cached.
+        
+        Args:
+            cache_key: (path, mtime_ns, size) of the parsed file
+            data: Parsed data
+        """
+        if isinstance(data, pd.DataFrame):
+            nbytes = int(data.memory_usage(index=True, deep=True).sum())
+            data = data.copy(deep=False)
+        elif isinstance(data, np.ndarray):
+            nbytes = data.nbytes
+        else:
+            return
+        if nbytes > LOAD_CACHE_MAX_BYTES:
+            return
+        
+        with self._load_cache_lock:
+            # Drop stale entries for earlier versions of the same file (and a copy another thread just cached)
+            for key in [key for key in self._load_cache if key[0] == cache_key[0]]:
+                self._evict_loaded_data(key)
+            
+            self._load_cache[cache_key] = (data, nbytes)
+            self._load_cache_bytes += nbytes
+            while self._load_cache_bytes > LOAD_CACHE_MAX_BYTES:
+                self._evict_loaded_data(next(iter(self._load_cache)))
+    
+    def _evict_loaded_data(self, cache_key: Tuple[str, int, int]):
+        """Remove an entry from the parsed data cache"""
+        _, nbytes = self._load_cache.pop(cache_key)
+        self._load_cache_bytes -= nbytes
+    
+    def _parse_data(self, data_path: str) -> Any:
+        """
+        Parse data file based on extension
         
         Args:
             data_path: Path to data file
@@ -159,8 +344,14 @@ class DataIngestionService:
         ext = os.path.splitext(data_path)[1].lower()
         
         if ext == ".csv":
-            return pd.read_csv(data_path)
+            return pd.read_csv(data_path, engine=CSV_ENGINE)
         elif ext in [".xlsx", ".xls"]:
+            if EXCEL_ENGINE is not None:
+                try:
+                    return pd.read_excel(data_path, engine=EXCEL_ENGINE)
+                except ValueError as e:
+                    # Older pandas does not know the engine
+                    logger.warning(f"Excel engine {EXCEL_ENGINE} unavailable, using default: {e}")
             return pd.read_excel(data_path)
         elif ext in [".npy", ".npz"]:
             return np.load(data_path)
@@ -170,12 +361,15 @@ class DataIngestionService:
             raise ValueError(f"Unsupported file format: {ext}")
     
     def _load_hdf5(self, file_path: str) -> Dict[str, Any]:
-        """Load HDF5 file and return contents as dictionary"""
-        data = {}
-        with h5py.File(file_path, "r") as f:
-            for key in f.keys():
-                data[key] = f[key][:]
-        return data
+        """
+        Open HDF5 file and return its datasets as a dictionary of lazy handles
+        
+        Dataset contents are read chunk by chunk by their consumers instead of
+        being materialized here. The file stays open for as long as any of the
+        returned handles is referenced.
+        """
+        f = h5py.File(file_path, "r", rdcc_nbytes=HDF5_CHUNK_CACHE_BYTES)
+        return {key: f[key] for key in f.keys()}
     
     def _get_data_type(self, data_path: str) -> str:
         """Determine data type from file extension"""
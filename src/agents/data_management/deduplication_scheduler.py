@@ -1,11 +1,10 @@
 import os
-import json
-import schedule
-import time
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 import logging
 from src.agents.data_management.data_deduplication import DataDeduplication
+from src.core.utils.file_utils import write_json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +24,8 @@ class DeduplicationScheduler:
         self.config_path = config_path
         self.schedule_config = self._load_schedule_config()
         self.is_running = False
+        # Set by stop_scheduler to wake a sleeping run_scheduler loop
+        self._stop_event: Optional[asyncio.Event] = None
     
     def _load_schedule_config(self) -> Dict[str, Any]:
         """
@@ -72,35 +73,85 @@ class DeduplicationScheduler:
         interval = self.schedule_config.get("interval", "daily")
         run_time = self.schedule_config.get("time", "00:00")
         
-        # Schedule the job
-        if interval == "daily":
-            schedule.every().day.at(run_time).do(self.run_deduplication)
-        elif interval == "weekly":
-            schedule.every().monday.at(run_time).do(self.run_deduplication)
-        elif interval == "monthly":
-            # For monthly, run on the first day of the month
-            schedule.every().month.at(run_time).do(self.run_deduplication)
+        # Validate the schedule before the loop starts
+        next_run = self._next_run_time(datetime.now())
         
         self.is_running = True
-        logger.info(f"Started deduplication scheduler: {interval} at {run_time}")
+        logger.info(f"Started deduplication scheduler: {interval} at {run_time} (next run: {next_run})")
     
     def stop_scheduler(self):
         """
         Stop the deduplication scheduler
         """
         self.is_running = False
-        schedule.clear()
+        if self._stop_event is not None:
+            self._stop_event.set()
         logger.info("Stopped deduplication scheduler")
     
-    def run_scheduler(self):
+    async def run_scheduler(self):
+        """
+        Run the scheduler loop, sleeping until the next scheduled run
+        """
+        self._stop_event = asyncio.Event()
+        try:
+            while self.is_running:
+                delay = (self._next_run_time(datetime.now()) - datetime.now()).total_seconds()
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=max(0.0, delay))
+                    # Stopped while waiting
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                
+                try:
+                    await self.run_deduplication()
+                except Exception as e:
+                    logger.error(f"Scheduled deduplication failed: {e}")
+        finally:
+            self._stop_event = None
+    
+    def _next_run_time(self, now: datetime) -> datetime:
         """
-        Run the scheduler loop
+        Calculate the next scheduled run after a given time
+        
+        Args:
+            now: Current local time
+            
+        Returns:
+            Next run time (daily, Mondays for weekly, first of the month for monthly)
         """
-        while self.is_running:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        interval = self.schedule_config.get("interval", "daily")
+        hour, minute = (int(part) for part in self.schedule_config.get("time", "00:00").split(":"))
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        
+        if interval == "daily":
+            if candidate <= now:
+                candidate += timedelta(days=1)
+        elif interval == "weekly":
+            candidate += timedelta(days=-candidate.weekday() % 7)
+            if candidate <= now:
+                candidate += timedelta(days=7)
+        elif interval == "monthly":
+            candidate = candidate.replace(day=1)
+            if candidate <= now:
+                candidate = (candidate + timedelta(days=32)).replace(day=1)
+        else:
+            raise ValueError(f"Unsupported deduplication interval: {interval}")
+        return candidate
     
-    def run_deduplication(self, data_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    def run_deduplication_sync(self, data_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Run deduplication task from synchronous code (e.g. the scheduler thread)
+        
+        Args:
+            data_ids: List of data IDs to check (None for all data)
+            
+        Returns:
+            Deduplication result
+        """
+        return asyncio.run(self.run_deduplication(data_ids))
+    
+    async def run_deduplication(self, data_ids: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Run deduplication task
         
@@ -112,12 +163,9 @@ class DeduplicationScheduler:
         """
         logger.info(f"Starting deduplication task at {datetime.utcnow()}")
         
-        # Get all data entries from index
-        data_entries = self.deduplication_service.data_index.items()
-        
         results = {
             "timestamp": datetime.utcnow().isoformat(),
-            "total_data": len(data_entries),
+            "total_data": await asyncio.to_thread(self.deduplication_service.count_entries),
             "checked_data": 0,
             "duplicate_found": 0,
             "similar_found": 0,
@@ -127,47 +175,37 @@ class DeduplicationScheduler:
         # Import notifier
         from src.agents.notification.user_notifier import UserNotifier
         notifier = UserNotifier()
+        alerts = []
+        
+        # The scan is CPU bound; run it off the event loop, which also serves the API
+        checked = await asyncio.to_thread(lambda: list(self._check_entries(data_ids)))
         
         # Check each data entry
-        for entry_id, entry in data_entries:
-            # Skip if data_ids is specified and entry_id not in list
-            if data_ids and entry_id not in data_ids:
-                continue
-            
-            # Check for duplicates of this entry using existing hash
-            duplicate_check = self.deduplication_service.check_duplication_by_hash(
-                data_hash=entry.get("hash"),
-                data_type=entry.get("data_type"),
-                paper_id=entry.get("paper_id"),
-                user_id=entry.get("user_id")
-            )
-            
+        for entry_id, entry, duplicate_check in checked:
             # Update results
             results["checked_data"] += 1
             if duplicate_check.get("has_duplicate"):
                 results["duplicate_found"] += 1
-                # Send deduplication alert
-                import asyncio
+                # Queue deduplication alert
                 duplicate_info = {
                     "duplicates": duplicate_check.get("similar_data", []),
                     "data_hash": duplicate_check.get("data_hash"),
                     "data_type": duplicate_check.get("data_type")
                 }
-                asyncio.run(notifier.send_deduplication_alert(
+                alerts.append(notifier.send_deduplication_alert(
                     user_id=entry.get("user_id"),
                     message=f"Exact duplicate found during scheduled deduplication",
                     duplicate_info=duplicate_info
                 ))
             if duplicate_check.get("has_similar"):
                 results["similar_found"] += 1
-                # Send deduplication alert
-                import asyncio
+                # Queue deduplication alert
                 similar_info = {
                     "similar_items": duplicate_check.get("similar_data", []),
                     "data_hash": duplicate_check.get("data_hash"),
                     "data_type": duplicate_check.get("data_type")
                 }
-                asyncio.run(notifier.send_deduplication_alert(
+                alerts.append(notifier.send_deduplication_alert(
                     user_id=entry.get("user_id"),
                     message=f"Similar data found during scheduled deduplication",
                     similar_info=similar_info
@@ -185,12 +223,38 @@ class DeduplicationScheduler:
                 "recommendation": duplicate_check.get("recommendation")
             })
         
+        # Send all alerts concurrently
+        if alerts:
+            await self._send_alerts(alerts)
+        
         # Save results to log
-        self._save_deduplication_results(results)
+        await asyncio.to_thread(self._save_deduplication_results, results)
         
         logger.info(f"Deduplication task completed: {results['checked_data']} data checked, {results['duplicate_found']} duplicates found")
         return results
     
+    def _check_entries(
+        self,
+        data_ids: Optional[List[str]] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """
+        Check index entries for duplicates against the rest of the index
+        
+        Args:
+            data_ids: List of data IDs to check (None for all data)
+            
+        Returns:
+            Iterator of (entry_id, entry, duplication check result) tuples
+        """
+        return self.deduplication_service.scan_index(data_ids or None)
+    
+    async def _send_alerts(self, alerts: List[Any]):
+        """Send queued deduplication alerts concurrently"""
+        outcomes = await asyncio.gather(*alerts, return_exceptions=True)
+        failed = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if failed:
+            logger.error(f"Failed to send {len(failed)} of {len(alerts)} deduplication alerts: {failed[0]}")
+    
     def _save_deduplication_results(self, results: Dict[str, Any]):
         """
         Save deduplication results to log file
@@ -203,8 +267,7 @@ class DeduplicationScheduler:
         
         log_file = os.path.join(log_dir, f"deduplication_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json")
         
-        with open(log_file, "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=2)
+        write_json(log_file, results)
         
         logger.info(f"Saved deduplication results to: {log_file}")
     
@@ -219,4 +282,4 @@ class DeduplicationScheduler:
             Deduplication result
         """
         logger.info(f"Manual deduplication triggered for data IDs: {data_ids or 'all'}")
-        return self.run_deduplication(data_ids)
+        return self.run_deduplication_sync(data_ids)
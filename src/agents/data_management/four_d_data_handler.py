@@ -1,17 +1,78 @@
 import h5py
+import io
 import os
-import json
-from datetime import datetime
-from typing import Dict, Any, Optional
+import sqlite3
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 from src.core.models.paper_model import SpaceCoordinate
-from src.core.security.encryption import encrypt_content, decrypt_content
-from src.core.security.hash_utils import calculate_data_hash
+from src.core.security.encryption import (
+    decrypt_content, encrypt_stream, decrypt_stream, is_stream_encrypted, STREAM_CHUNK_SIZE, STREAM_MAGIC
+)
+from src.core.security.hash_utils import calculate_data_hash, calculate_hmac, verify_hmac
+from src.core.utils.file_utils import atomic_open, json_dumps, json_loads, read_json, write_json
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Library module: logging is configured by the application
 logger = logging.getLogger("FourDDataHandler")
 
+# Target size of one HDF5 chunk; whole chunks are read and decompressed at a time
+CHUNK_TARGET_BYTES = 1 << 20
+# Datasets smaller than this are stored contiguous and uncompressed
+COMPRESSION_MIN_BYTES = 10 << 10
+# Leading axis of 3D+time arrays is time; chunks span it whole where possible
+TIME_AXIS = 0
+
+# PRAGMA user_version of a metadata index whose one-time backfill has completed
+INDEX_BACKFILLED_VERSION = 1
+
+# Concurrent loads during traces (decryption and HDF5 reads release the GIL)
+TRACE_MAX_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Metadata index row: (data_id, paper_id, user_id, timestamp in epoch microseconds, path)
+IndexRow = Tuple[str, str, str, int, str]
+
+
+def _auto_chunks(shape: Tuple[int, ...], itemsize: int) -> Tuple[int, ...]:
+    """
+    Pick HDF5 chunk dimensions of about CHUNK_TARGET_BYTES
+    
+    Spatial axes are halved (largest first) before the time axis, so that a
+    chunk keeps as much of each time series together as possible.
+    
+    Args:
+        shape: Dataset shape
+        itemsize: Size of one element in bytes
+        
+    Returns:
+        Chunk shape
+    """
+    chunks = [max(1, dim) for dim in shape]
+    time_axis = TIME_AXIS if len(chunks) > 1 else None
+    while np.prod(chunks) * itemsize > CHUNK_TARGET_BYTES:
+        spatial = [axis for axis in range(len(chunks)) if axis != time_axis and chunks[axis] > 1]
+        axis = max(spatial, key=lambda a: chunks[a]) if spatial else time_axis
+        if axis is None or chunks[axis] == 1:
+            break
+        chunks[axis] = (chunks[axis] + 1) // 2
+    return tuple(chunks)
+
+
+def _key_tag(key: bytes) -> str:
+    """Identify an encryption key in the index without storing anything that reveals it"""
+    return calculate_hmac(b"4d-unindexed-tried", key)
+
+
+def _epoch_micros(timestamp: datetime) -> int:
+    """Exact microseconds since the Unix epoch (naive timestamps are taken as UTC)"""
+    epoch = _EPOCH if timestamp.tzinfo is None else _EPOCH.replace(tzinfo=timezone.utc)
+    return (timestamp - epoch) // timedelta(microseconds=1)
+
+
 class FourDDataHandler:
     """4D data handler for storage, retrieval and tracing of 3D+time dimension data"""
     
@@ -20,6 +81,164 @@ class FourDDataHandler:
         os.makedirs(storage_path, exist_ok=True)
         # HDF5 is industry standard for multidimensional/timeseries data (encrypted)
         self.hdf5_ext = ".h5.enc"  # Encrypted HDF5 file extension
+        self.meta_ext = ".meta.json"  # Authenticated plaintext metadata sidecar
+        self.index_path = os.path.join(storage_path, "index.db")
+        self._open_index()
+        self._backfill_index()
+        # Saves run in worker threads; the connection and its transactions are used by one thread at a time
+        self._db_lock = threading.Lock()
+
+    def _open_index(self):
+        """Open the SQLite metadata index used for trace lookups"""
+        # Autocommit mode: each statement is its own durable transaction
+        self._db = sqlite3.connect(self.index_path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS idx (
+                data_id TEXT PRIMARY KEY,
+                paper_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                ts_epoch INTEGER NOT NULL,
+                path TEXT NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_paper_user_ts ON idx(paper_id, user_id, ts_epoch)")
+        # Data files whose metadata can only be read by decrypting them (saved before sidecars existed)
+        self._db.execute("CREATE TABLE IF NOT EXISTS unindexed (data_id TEXT PRIMARY KEY, path TEXT NOT NULL)")
+        # Keys (by _key_tag) each unindexed file has already failed to decrypt with
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS unindexed_tried (data_id TEXT NOT NULL, key_tag TEXT NOT NULL, "
+            "PRIMARY KEY (data_id, key_tag))"
+        )
+
+    def _backfill_index(self):
+        """
+        Index data files saved before the metadata index existed, from their sidecars
+        
+        Every save goes through the index, so the storage directory only has to
+        be listed once; completion is recorded in PRAGMA user_version. Files
+        without a usable sidecar are recorded as unindexed and indexed by the
+        first trace that has their key.
+        """
+        if self._db.execute("PRAGMA user_version").fetchone()[0] >= INDEX_BACKFILLED_VERSION:
+            return
+        indexed = {row[0] for row in self._db.execute("SELECT data_id FROM idx")}
+        filenames = set(os.listdir(self.storage_path))
+        rows = []
+        unindexed = []
+        for filename in filenames:
+            if not filename.endswith(self.hdf5_ext):
+                continue
+            data_id = filename[:-len(self.hdf5_ext)]
+            if data_id in indexed:
+                continue
+            encrypted_path = os.path.join(self.storage_path, filename)
+            try:
+                # Unverified here (no key); trace re-checks the decrypted metadata
+                metadata = json_loads(read_json(os.path.join(self.storage_path, f"{data_id}{self.meta_ext}"))["metadata"])
+                rows.append(self._index_row(metadata, encrypted_path))
+            except FileNotFoundError:
+                unindexed.append((data_id, encrypted_path))
+            except Exception as e:
+                logger.warning("Failed to index data %s from its sidecar: %s", data_id, e)
+                unindexed.append((data_id, encrypted_path))
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO idx VALUES (?, ?, ?, ?, ?)", rows)
+            self._db.executemany("INSERT OR REPLACE INTO unindexed VALUES (?, ?)", unindexed)
+            self._db.execute(f"PRAGMA user_version = {INDEX_BACKFILLED_VERSION}")
+        if rows:
+            logger.info("Indexed %d existing 4D data entries", len(rows))
+        if unindexed:
+            logger.info("%d existing 4D data entries will be indexed when first traced", len(unindexed))
+
+    def _index_unindexed(self, encryption_key: bytes):
+        """
+        Index recorded unindexed files that decrypt with this key
+        
+        Files that do not (they belong to other keys) stay recorded for later
+        traces, and are not tried with this key again.
+        
+        Args:
+            encryption_key: Decryption key
+        """
+        key_tag = _key_tag(encryption_key)
+        with self._db_lock:
+            pending = self._db.execute(
+                "SELECT data_id, path FROM unindexed WHERE NOT EXISTS "
+                "(SELECT 1 FROM unindexed_tried t WHERE t.data_id = unindexed.data_id AND t.key_tag = ?)",
+                (key_tag,)
+            ).fetchall()
+        if not pending:
+            return
+        rows = []
+        resolved = []
+        tried = []
+        for data_id, encrypted_path in pending:
+            try:
+                # Decrypts once and backfills the sidecar
+                metadata = self._extract_metadata_without_decrypt(encrypted_path, encryption_key)
+                rows.append(self._index_row(metadata, encrypted_path))
+            except FileNotFoundError:
+                # Deleted since it was recorded
+                pass
+            except Exception as e:
+                logger.debug("Data %s not indexed with this key: %s", data_id, e)
+                tried.append((data_id, key_tag))
+                continue
+            resolved.append((data_id,))
+        with self._db_lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO idx VALUES (?, ?, ?, ?, ?)", rows)
+            self._db.executemany("DELETE FROM unindexed WHERE data_id = ?", resolved)
+            self._db.executemany("DELETE FROM unindexed_tried WHERE data_id = ?", resolved)
+            self._db.executemany("INSERT OR IGNORE INTO unindexed_tried VALUES (?, ?)", tried)
+        if rows:
+            logger.info("Indexed %d existing 4D data entries on trace", len(rows))
+
+    @staticmethod
+    def _index_row(metadata: Dict[str, Any], encrypted_path: str) -> IndexRow:
+        """Build a metadata index row (timestamps stored as epoch microseconds)"""
+        return (
+            metadata["data_id"],
+            metadata["paper_id"],
+            metadata["user_id"],
+            _epoch_micros(datetime.fromisoformat(metadata["timestamp"])),
+            encrypted_path
+        )
+
+    def add_to_index(self, rows: List[IndexRow]):
+        """
+        Add metadata index rows (from store_four_d_data) in one transaction
+        
+        Args:
+            rows: Index rows
+        """
+        if not rows:
+            return
+        with self._db_lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO idx VALUES (?, ?, ?, ?, ?)", rows)
+
+    def close(self):
+        """Close the metadata index database"""
+        self._db.close()
+
+    @staticmethod
+    def calculate_data_hash(data_content: Any) -> str:
+        """
+        Content hash recorded in 4D metadata (hash_utils.calculate_data_hash)
+        
+        Args:
+            data_content: Data payload (array/DataFrame/HDF5 dataset/dict/bytes/str)
+            
+        Returns:
+            Hexadecimal SHA-256 hash string
+        """
+        return calculate_data_hash(data_content)
 
     def save_four_d_data(
         self,
@@ -29,10 +248,11 @@ class FourDDataHandler:
         paper_id: str,
         timestamp: datetime,
         space_coordinate: Optional[SpaceCoordinate] = None,
-        encryption_key: bytes = None
+        encryption_key: bytes = None,
+        data_hash: Optional[str] = None
     ) -> str:
         """
-        Save 4D data with encryption and temporal/spatial metadata
+        Save 4D data with encryption and temporal/spatial metadata, and index it
         
         Args:
             data_content: Raw data (pandas DataFrame/3D array/binary)
@@ -42,10 +262,47 @@ class FourDDataHandler:
             timestamp: Data collection timestamp
             space_coordinate: Spatial coordinates of collection
             encryption_key: AES-256 encryption key
+            data_hash: Precomputed calculate_data_hash(data_content), computed here if None
             
         Returns:
             Path to encrypted data file
         """
+        encrypted_path, index_row = self.store_four_d_data(
+            data_content, data_id, user_id, paper_id, timestamp, space_coordinate, encryption_key, data_hash
+        )
+        self.add_to_index([index_row])
+        return encrypted_path
+
+    def store_four_d_data(
+        self,
+        data_content: Any,
+        data_id: str,
+        user_id: str,
+        paper_id: str,
+        timestamp: datetime,
+        space_coordinate: Optional[SpaceCoordinate] = None,
+        encryption_key: bytes = None,
+        data_hash: Optional[str] = None
+    ) -> Tuple[str, IndexRow]:
+        """
+        Write encrypted 4D data and its metadata sidecar without indexing it
+        
+        Callers saving several files pass the returned rows to add_to_index together;
+        traces do not find the data until then.
+        
+        Args:
+            data_content: Raw data (pandas DataFrame/3D array/binary)
+            data_id: Unique data identifier
+            user_id: Owner user ID
+            paper_id: Associated paper ID
+            timestamp: Data collection timestamp
+            space_coordinate: Spatial coordinates of collection
+            encryption_key: AES-256 encryption key
+            data_hash: Precomputed calculate_data_hash(data_content), computed here if None
+            
+        Returns:
+            Tuple of (path to encrypted data file, metadata index row)
+        """
         # 1. Create 4D metadata
         metadata = {
             "data_id": data_id,
@@ -53,42 +310,70 @@ class FourDDataHandler:
             "paper_id": paper_id,
             "timestamp": timestamp.isoformat(),
             "space_coordinate": space_coordinate.dict() if space_coordinate else None,
-            "data_hash": calculate_data_hash(str(data_content)),
+            "data_hash": data_hash or calculate_data_hash(data_content),
             "create_time": datetime.utcnow().isoformat()
         }
 
-        # 2. Store data in HDF5 format (supports multidimensional data)
-        hdf5_path = os.path.join(self.storage_path, f"{data_id}.h5")
-        with h5py.File(hdf5_path, "w") as f:
+        # 2. Build the HDF5 file in memory so plaintext never touches disk
+        buffer = io.BytesIO()
+        with h5py.File(buffer, "w") as f:
             # Store metadata as attributes
-            f.attrs["metadata"] = json.dumps(metadata)
+            f.attrs["metadata"] = json_dumps(metadata).decode("utf-8")
             # Store actual data
             if isinstance(data_content, dict):
                 for key, value in data_content.items():
-                    f.create_dataset(key, data=value)
+                    if isinstance(value, h5py.Dataset):
+                        # Lazily loaded input: copy inside HDF5 without reading it into memory
+                        f.copy(value, key)
+                    else:
+                        self._create_dataset(f, key, value)
             else:
-                f.create_dataset("data", data=data_content)
+                self._create_dataset(f, "data", data_content)
 
-        # 3. Encrypt the HDF5 file
-        with open(hdf5_path, "rb") as f:
-            raw_data = f.read()
-        encrypted_data = encrypt_content(raw_data, encryption_key)
+        # 3. Encrypt the HDF5 image chunk by chunk, without copying it
         encrypted_path = os.path.join(self.storage_path, f"{data_id}{self.hdf5_ext}")
-        with open(encrypted_path, "wb") as f:
-            f.write(encrypted_data)
+        with buffer.getbuffer() as view, atomic_open(encrypted_path) as f:
+            chunks = (view[offset:offset + STREAM_CHUNK_SIZE] for offset in range(0, len(view), STREAM_CHUNK_SIZE))
+            for piece in encrypt_stream(chunks, encryption_key):
+                f.write(piece)
 
-        # 4. Remove unencrypted temporary file
-        os.remove(hdf5_path)
+        # 4. Write metadata sidecar so traces don't have to decrypt the data
+        self._write_metadata_sidecar(data_id, metadata, encryption_key)
         
-        logger.info(f"4D data saved: {data_id} (paper: {paper_id}, user: {user_id})")
-        return encrypted_path
+        logger.info("4D data saved: %s (paper: %s, user: %s)", data_id, paper_id, user_id)
+        return encrypted_path, self._index_row(metadata, encrypted_path)
+
+    def _create_dataset(self, f: h5py.File, key: str, value: Any) -> h5py.Dataset:
+        """
+        Create a dataset, chunked and compressed when it is large enough to benefit
+        
+        Args:
+            f: Open HDF5 file
+            key: Dataset name
+            value: Data to store
+            
+        Returns:
+            Created dataset
+        """
+        arr = np.asarray(value)
+        # Filters need fixed-size elements and a chunked layout
+        if arr.ndim == 0 or arr.dtype.kind == "O" or arr.nbytes < COMPRESSION_MIN_BYTES:
+            return f.create_dataset(key, data=value)
+        return f.create_dataset(
+            key,
+            data=arr,
+            chunks=_auto_chunks(arr.shape, arr.dtype.itemsize),
+            shuffle=True,
+            compression="lzf"
+        )
 
     def load_four_d_data(
         self,
         data_id: str,
         encryption_key: bytes,
         timestamp: Optional[datetime] = None,  # Optional: filter by timestamp
-        space_coordinate: Optional[SpaceCoordinate] = None  # Optional: filter by location
+        space_coordinate: Optional[SpaceCoordinate] = None,  # Optional: filter by location
+        lazy: bool = False
     ) -> Dict[str, Any]:
         """
         Load and decrypt 4D data with optional temporal/spatial filtering
@@ -98,6 +383,8 @@ class FourDDataHandler:
             encryption_key: AES-256 decryption key
             timestamp: Filter by exact timestamp
             space_coordinate: Filter by exact spatial coordinates
+            lazy: Return h5py.Dataset handles instead of arrays; the open
+                h5py.File is returned under "file" and must be closed by the caller
             
         Returns:
             Dictionary containing metadata and raw data
@@ -107,47 +394,57 @@ class FourDDataHandler:
         if not os.path.exists(encrypted_path):
             raise FileNotFoundError(f"4D data {data_id} not found")
         
-        # 2. Decrypt the file
-        with open(encrypted_path, "rb") as f:
-            encrypted_data = f.read()
-        decrypted_data = decrypt_content(encrypted_data, encryption_key)
-
-        # 3. Create temporary HDF5 file for reading
-        temp_hdf5_path = os.path.join(self.storage_path, f"{data_id}_temp.h5")
-        with open(temp_hdf5_path, "wb") as f:
-            f.write(decrypted_data)
+        # 2. Reject filter mismatches from the metadata sidecar before decrypting anything
+        if timestamp or space_coordinate:
+            self._check_filters(
+                self._extract_metadata_without_decrypt(encrypted_path, encryption_key), timestamp, space_coordinate
+            )
+        
+        # 3. Decrypt the file
+        decrypted_data = self._decrypt_file(encrypted_path, encryption_key)
 
-        # 4. Read metadata and data
+        # 4. Read metadata and data straight from the decrypted image
         result = {}
-        with h5py.File(temp_hdf5_path, "r") as f:
-            # Read metadata
-            metadata = json.loads(f.attrs["metadata"])
+        f = h5py.File(io.BytesIO(decrypted_data), "r")
+        try:
+            # The encrypted copy of the metadata is authoritative
+            metadata = json_loads(f.attrs["metadata"])
             result["metadata"] = metadata
-            
-            # Apply temporal filter if specified
-            if timestamp:
-                data_timestamp = datetime.fromisoformat(metadata["timestamp"])
-                if data_timestamp != timestamp:
-                    raise ValueError(f"Timestamp mismatch: expected {timestamp}, got {data_timestamp}")
-            
-            # Apply spatial filter if specified
-            if space_coordinate:
-                data_space = metadata["space_coordinate"]
-                if data_space != space_coordinate.dict():
-                    raise ValueError(f"Spatial coordinate mismatch: expected {space_coordinate}, got {data_space}")
+            self._check_filters(metadata, timestamp, space_coordinate)
             
             # Read actual data
             data = {}
             for key in f.keys():
-                data[key] = f[key][:]
-            result["data"] = data if len(data) > 1 else data["data"]
-
-        # 5. Clean up temporary file
-        os.remove(temp_hdf5_path)
+                data[key] = f[key] if lazy else f[key][()]
+            result["data"] = data["data"] if list(data) == ["data"] else data
+            if lazy:
+                result["file"] = f
+        finally:
+            if not lazy or "file" not in result:
+                f.close()
         
-        logger.info(f"4D data loaded: {data_id}")
+        logger.info("4D data loaded: %s", data_id)
         return result
 
+    def _check_filters(
+        self,
+        metadata: Dict[str, Any],
+        timestamp: Optional[datetime],
+        space_coordinate: Optional[SpaceCoordinate]
+    ):
+        """Raise ValueError if metadata does not match the temporal/spatial filters"""
+        # Apply temporal filter if specified
+        if timestamp:
+            data_timestamp = datetime.fromisoformat(metadata["timestamp"])
+            if data_timestamp != timestamp:
+                raise ValueError(f"Timestamp mismatch: expected {timestamp}, got {data_timestamp}")
+        
+        # Apply spatial filter if specified
+        if space_coordinate:
+            data_space = metadata["space_coordinate"]
+            if data_space != space_coordinate.dict():
+                raise ValueError(f"Spatial coordinate mismatch: expected {space_coordinate}, got {data_space}")
+
     def trace_four_d_data_by_time(
         self,
         paper_id: str,
@@ -169,47 +466,92 @@ class FourDDataHandler:
         Returns:
             Dictionary of data IDs mapped to their complete data/metadata
         """
-        # Traverse storage directory and filter matching data
+        self._index_unindexed(encryption_key)
+        
+        # Look up matching data in the metadata index
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT data_id FROM idx WHERE paper_id = ? AND user_id = ? AND ts_epoch BETWEEN ? AND ? ORDER BY ts_epoch",
+                (paper_id, user_id, _epoch_micros(start_time), _epoch_micros(end_time))
+            ).fetchall()
+
+        data_ids = [data_id for (data_id,) in rows]
         traced_data = {}
-        for filename in os.listdir(self.storage_path):
-            if not filename.endswith(self.hdf5_ext):
-                continue
-            
-            data_id = filename.replace(self.hdf5_ext, "")
-            try:
-                # Extract metadata without full decryption for efficiency
-                encrypted_path = os.path.join(self.storage_path, filename)
-                with open(encrypted_path, "rb") as f:
-                    encrypted_data = f.read()
-                decrypted_metadata = self._extract_metadata_without_decrypt(encrypted_data, encryption_key)
-                
-                # Apply filters
-                if (decrypted_metadata["paper_id"] == paper_id and
-                    decrypted_metadata["user_id"] == user_id):
-                    
-                    data_timestamp = datetime.fromisoformat(decrypted_metadata["timestamp"])
-                    if start_time <= data_timestamp <= end_time:
-                        # Load complete data for matches
-                        traced_data[data_id] = self.load_four_d_data(data_id, encryption_key)
-                        
-            except Exception as e:
-                logger.warning(f"Failed to process data {data_id}: {str(e)}")
-                continue
+        if data_ids:
+            with ThreadPoolExecutor(max_workers=min(TRACE_MAX_WORKERS, len(data_ids))) as executor:
+                results = executor.map(
+                    lambda data_id: self._load_traced_data(data_id, paper_id, user_id, encryption_key),
+                    data_ids
+                )
+                for data_id, data in zip(data_ids, results):
+                    if data is not None:
+                        traced_data[data_id] = data
         
-        logger.info(f"Traced {len(traced_data)} 4D data entries for paper {paper_id} ({start_time} to {end_time})")
+        logger.info("Traced %d 4D data entries for paper %s (%s to %s)", len(traced_data), paper_id, start_time, end_time)
         return traced_data
 
-    def _extract_metadata_without_decrypt(self, encrypted_data: bytes, key: bytes) -> Dict[str, Any]:
-        """Efficient metadata extraction without full data decryption"""
-        # In production, store metadata separately for even better performance
-        decrypted_data = decrypt_content(encrypted_data, key)
-        temp_path = os.path.join(self.storage_path, "temp_metadata.h5")
+    def _load_traced_data(
+        self,
+        data_id: str,
+        paper_id: str,
+        user_id: str,
+        encryption_key: bytes
+    ) -> Optional[Dict[str, Any]]:
+        """Load one traced entry, or None if it fails or does not match its index row"""
+        try:
+            data = self.load_four_d_data(data_id, encryption_key)
+        except Exception as e:
+            logger.warning("Failed to process data %s: %s", data_id, e)
+            return None
+        # The encrypted copy of the metadata is authoritative
+        metadata = data["metadata"]
+        if metadata["paper_id"] != paper_id or metadata["user_id"] != user_id:
+            logger.warning("Index entry for data %s does not match its metadata", data_id)
+            return None
+        return data
+
+    def _decrypt_file(self, encrypted_path: str, key: bytes) -> bytes:
+        """Decrypt a stored data file (streamed or legacy single-token format)"""
+        with open(encrypted_path, "rb") as f:
+            stream_format = is_stream_encrypted(f.read(len(STREAM_MAGIC)))
+            f.seek(0)
+            if stream_format:
+                return b"".join(decrypt_stream(f, key))
+            return decrypt_content(f.read(), key)
+
+    def _write_metadata_sidecar(self, data_id: str, metadata: Dict[str, Any], key: bytes):
+        """Write metadata as plaintext JSON with an HMAC-SHA256 tag keyed by the encryption key"""
+        payload = json_dumps(metadata).decode("utf-8")
+        sidecar = {"metadata": payload, "hmac": calculate_hmac(payload.encode("utf-8"), key)}
+        write_json(os.path.join(self.storage_path, f"{data_id}{self.meta_ext}"), sidecar, indent=False)
+
+    def _extract_metadata_without_decrypt(self, encrypted_path: str, key: bytes) -> Dict[str, Any]:
+        """
+        Read metadata from the authenticated sidecar, without decrypting the data file
         
-        with open(temp_path, "wb") as f:
-            f.write(decrypted_data)
-            
-        with h5py.File(temp_path, "r") as f:
-            metadata = json.loads(f.attrs["metadata"])
+        Files written before sidecars existed are decrypted once in memory and
+        get a sidecar backfilled; the copy inside the encrypted HDF5 stays authoritative.
+        
+        Args:
+            encrypted_path: Path to encrypted data file
+            key: Encryption key (also the HMAC key)
             
-        os.remove(temp_path)
-        return metadata
\ No newline at end of file
+        Returns:
+            Metadata dictionary
+        """
+        data_id = os.path.basename(encrypted_path)[:-len(self.hdf5_ext)]
+        sidecar_path = os.path.join(self.storage_path, f"{data_id}{self.meta_ext}")
+        try:
+            sidecar = read_json(sidecar_path)
+        except FileNotFoundError:
+            sidecar = None
+        if sidecar is not None:
+            payload = sidecar["metadata"]
+            if not verify_hmac(payload.encode("utf-8"), key, sidecar["hmac"]):
+                raise ValueError(f"Metadata sidecar for {data_id} failed authentication")
+            return json_loads(payload)
+
+        with h5py.File(io.BytesIO(self._decrypt_file(encrypted_path, key)), "r") as f:
+            metadata = json_loads(f.attrs["metadata"])
+        self._write_metadata_sidecar(data_id, metadata, key)
+        return metadata
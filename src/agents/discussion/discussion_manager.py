@@ -1,24 +1,168 @@
 import os
-import json
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
 from src.core.models.discussion_model import DiscussionMessage
+from src.core.utils.file_utils import append_jsonl, json_loads, read_json, write_jsonl
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Library module: logging is configured by the application
 logger = logging.getLogger("DiscussionManager")
 
+# Compact a discussion log once this fraction of its records are tombstones
+COMPACTION_TOMBSTONE_RATIO = 0.25
+
+# First byte written over a deleted record, turning its line into a comment
+DELETED_MARKER = b"#"
+
+def _message_from_record(item: Dict) -> DiscussionMessage:
+    """
+    Rebuild a stored message without re-running pydantic validation
+    
+    Records were validated when they were added (add_message goes through the
+    full model), so only the timestamp needs converting back from ISO format.
+    
+    Args:
+        item: Message record from a discussion log
+        
+    Returns:
+        DiscussionMessage object
+    """
+    if not item.get("message_id") or not isinstance(item.get("timestamp"), str):
+        # Incomplete legacy record: let the model fill in defaults
+        return DiscussionMessage(**item)
+    return DiscussionMessage.model_construct(**{**item, "timestamp": datetime.fromisoformat(item["timestamp"])})
+
+def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+    """Identify the current version of a log file by inode and size (None if missing)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size
+
+class _LogIndex:
+    """Offsets of the live records in one discussion log"""
+    
+    def __init__(self, stat_key: Tuple[int, int]):
+        self.offsets: Dict[str, List[int]] = {}
+        self.records = 0
+        self.dead = 0
+        self.stat_key = stat_key
+
 class DiscussionManager:
     """Manager for reader-author discussions"""
     
     def __init__(self, storage_path="./storage/discussions"):
         self.storage_path = storage_path
         os.makedirs(storage_path, exist_ok=True)
+        # paper_id -> offsets of its messages, so lookups seek instead of scanning
+        self._indexes: Dict[str, _LogIndex] = {}
 
     def _get_file_path(self, paper_id: str) -> str:
-        """Get path to discussion file for a paper"""
-        return os.path.join(self.storage_path, f"{paper_id}.json")
+        """Get path to discussion log (one JSON record per line) for a paper"""
+        path = os.path.join(self.storage_path, f"{paper_id}.jsonl")
+        self._migrate_legacy_file(paper_id, path)
+        return path
+
+    def _migrate_legacy_file(self, paper_id: str, path: str):
+        """Convert a discussion saved as a single JSON array to the JSONL log"""
+        legacy_path = os.path.join(self.storage_path, f"{paper_id}.json")
+        if os.path.exists(path) or not os.path.exists(legacy_path):
+            return
+        items = read_json(legacy_path)
+        write_jsonl(path, items)
+        os.replace(legacy_path, f"{legacy_path}.migrated")
+        logger.info("Migrated %d messages of paper %s to %s", len(items), paper_id, path)
+
+    def _read_log(self, paper_id: str) -> List[Tuple[int, Dict]]:
+        """
+        Replay a discussion log and rebuild its offset index
+        
+        Args:
+            paper_id: Paper ID
+            
+        Returns:
+            List of (file offset, message record) for live messages, in posting order
+        """
+        self._indexes.pop(paper_id, None)
+        path = self._get_file_path(paper_id)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return []
+        
+        items = []
+        positions: Dict[str, List[int]] = {}
+        with f:
+            stat = os.fstat(f.fileno())
+            index = _LogIndex((stat.st_ino, stat.st_size))
+            offset = 0
+            for line in f:
+                line_offset = offset
+                offset += len(line)
+                index.records += 1
+                if line.startswith(DELETED_MARKER):
+                    index.dead += 1
+                    continue
+                try:
+                    record = json_loads(line)
+                except ValueError:
+                    # Only a crash mid-append can leave a partial line
+                    logger.warning("Skipping corrupt record in discussion log of paper %s", paper_id)
+                    index.dead += 1
+                    continue
+                if "deleted" in record:
+                    # Tombstone record appended by earlier versions
+                    index.dead += 1
+                    for position in positions.pop(record["deleted"], []):
+                        items[position] = None
+                        index.dead += 1
+                else:
+                    positions.setdefault(record.get("message_id"), []).append(len(items))
+                    items.append((line_offset, record))
+        
+        for message_id, message_positions in positions.items():
+            index.offsets[message_id] = [items[position][0] for position in message_positions]
+        self._indexes[paper_id] = index
+        return [item for item in items if item is not None]
+
+    def _get_index(self, paper_id: str) -> Optional[_LogIndex]:
+        """Get the offset index of a discussion log, rebuilding it if the file changed"""
+        index = self._indexes.get(paper_id)
+        if index is None or index.stat_key != _stat_key(self._get_file_path(paper_id)):
+            self._read_log(paper_id)
+            index = self._indexes.get(paper_id)
+        return index
+
+    def _find_records(self, paper_id: str, message_id: str) -> List[Tuple[int, Dict]]:
+        """
+        Read the records of a message at their indexed offsets
+        
+        Args:
+            paper_id: Paper ID
+            message_id: Message ID
+            
+        Returns:
+            List of (file offset, message record)
+        """
+        index = self._get_index(paper_id)
+        if index is None:
+            return []
+        
+        matches = []
+        with open(self._get_file_path(paper_id), "rb") as f:
+            for offset in index.offsets.get(message_id, []):
+                f.seek(offset)
+                line = f.readline()
+                try:
+                    record = None if line.startswith(DELETED_MARKER) else json_loads(line)
+                except ValueError:
+                    record = None
+                if record is None or record.get("message_id") != message_id:
+                    # Changed in place by another writer: fall back to a full replay
+                    return [item for item in self._read_log(paper_id) if item[1].get("message_id") == message_id]
+                matches.append((offset, record))
+        return matches
 
     def add_message(
         self,
@@ -47,15 +191,20 @@ class DiscussionManager:
             is_author=is_author
         )
 
-        # Load existing messages
-        messages = self.get_all_messages(paper_id)
-        messages.append(msg)
-
-        # Save messages
-        with open(self._get_file_path(paper_id), "w", encoding="utf-8") as f:
-            json.dump([m.dict() for m in messages], f, indent=2, default=str)
+        # Append to the discussion log
+        path = self._get_file_path(paper_id)
+        index = self._indexes.get(paper_id)
+        if index is not None and index.stat_key != _stat_key(path):
+            # Written by someone else since it was indexed; rebuild on next lookup
+            self._indexes.pop(paper_id)
+            index = None
+        offset = append_jsonl(path, [msg.dict()])
+        if index is not None:
+            index.offsets.setdefault(msg.message_id, []).append(offset)
+            index.records += 1
+            index.stat_key = _stat_key(path)
         
-        logger.info(f"Added message to paper {paper_id} (user: {user_id}, author: {is_author})")
+        logger.info("Added message to paper %s (user: %s, author: %s)", paper_id, user_id, is_author)
         return msg
 
     def get_all_messages(self, paper_id: str) -> List[DiscussionMessage]:
@@ -68,15 +217,10 @@ class DiscussionManager:
         Returns:
             List of DiscussionMessage objects
         """
-        path = self._get_file_path(paper_id)
-        if not os.path.exists(path):
-            return []
-        
-        with open(path, "r", encoding="utf-8") as f:
-            items = json.load(f)
+        items = self._read_log(paper_id)
         
         # Convert dicts to DiscussionMessage objects
-        return [DiscussionMessage(**item) for item in items]
+        return [_message_from_record(item) for _, item in items]
     
     def get_message(self, paper_id: str, message_id: str) -> Optional[DiscussionMessage]:
         """
@@ -89,11 +233,8 @@ class DiscussionManager:
         Returns:
             DiscussionMessage object or None if not found
         """
-        messages = self.get_all_messages(paper_id)
-        for msg in messages:
-            if msg.message_id == message_id:
-                return msg
-        return None
+        matches = self._find_records(paper_id, message_id)
+        return _message_from_record(matches[0][1]) if matches else None
     
     def delete_message(self, paper_id: str, message_id: str, user_id: str, is_admin: bool = False) -> bool:
         """
@@ -108,25 +249,28 @@ class DiscussionManager:
         Returns:
             True if deleted, False otherwise
         """
-        messages = self.get_all_messages(paper_id)
-        new_messages = []
-        deleted = False
+        matches = self._find_records(paper_id, message_id)
+        # Check if user is allowed to delete
+        if not matches or not all(
+            record.get("user_id") == user_id or record.get("is_author") or is_admin for _, record in matches
+        ):
+            return False
         
-        for msg in messages:
-            if msg.message_id == message_id:
-                # Check if user is allowed to delete
-                if msg.user_id == user_id or msg.is_author or is_admin:
-                    deleted = True
-                    logger.info(f"Deleted message {message_id} from paper {paper_id} (user: {user_id})")
-                    continue
-                else:
-                    # Not allowed to delete
-                    new_messages.append(msg)
-            else:
-                new_messages.append(msg)
+        # Comment the record out in place instead of rewriting the log
+        path = self._get_file_path(paper_id)
+        with open(path, "r+b") as f:
+            for offset, _ in matches:
+                f.seek(offset)
+                f.write(DELETED_MARKER)
+        logger.info("Deleted message %s from paper %s (user: %s)", message_id, paper_id, user_id)
         
-        # Save updated messages
-        with open(self._get_file_path(paper_id), "w", encoding="utf-8") as f:
-            json.dump([m.dict() for m in new_messages], f, indent=2, default=str)
+        # Compact once deleted records make up a large share of the log
+        index = self._indexes.get(paper_id)
+        if index is not None:
+            index.offsets.pop(message_id, None)
+            index.dead += len(matches)
+            if index.dead > COMPACTION_TOMBSTONE_RATIO * index.records:
+                write_jsonl(path, [record for _, record in self._read_log(paper_id)])
+                self._indexes.pop(paper_id, None)
         
-        return deleted
\ No newline at end of file
+        return True
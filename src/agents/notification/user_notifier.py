@@ -1,23 +1,142 @@
+import asyncio
 import logging
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, Optional
-import json
+from typing import Dict, Any, List, Optional, Tuple
 import os
+import struct
+import threading
+from src.core.utils.file_utils import append_jsonl, json_loads, read_json, write_jsonl
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Library module: logging is configured by the application
 logger = logging.getLogger("UserNotifier")
 
+# Notifications kept per user
+MAX_NOTIFICATIONS = 100
+# Trim a user's notification log after this many appends, or once it grows past this size
+COMPACTION_INTERVAL = 50
+COMPACTION_MAX_BYTES = 256 << 10
+
+# Per-user (unread, total) counters for the records in the notification log
+_COUNTERS = struct.Struct("<QQ")
+
+# Per-log locks, shared by every notifier in the process (components create their own)
+_log_locks: Dict[str, threading.Lock] = {}
+_log_locks_guard = threading.Lock()
+
 class UserNotifier:
     """Notifier for sending progress/success/error notifications to users"""
     
     def __init__(self, notification_path: str = "./storage/notifications"):
         self.notification_path = notification_path
         os.makedirs(notification_path, exist_ok=True)
+        # Notifications waiting to be written, with the futures their senders await
+        self._pending: Dict[str, List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self._flushers: Dict[str, asyncio.Task] = {}
     
     def _get_user_notification_path(self, user_id: str) -> str:
-        """Get path to user's notification file"""
-        return os.path.join(self.notification_path, f"{user_id}_notifications.json")
+        """Get path to user's notification log (one JSON record per line, oldest first)"""
+        path = os.path.join(self.notification_path, f"{user_id}_notifications.ndjson")
+        self._migrate_legacy_file(user_id, path)
+        return path
+    
+    def _migrate_legacy_file(self, user_id: str, path: str):
+        """Convert notifications saved as a single newest-first JSON array to the log"""
+        legacy_path = os.path.join(self.notification_path, f"{user_id}_notifications.json")
+        if os.path.exists(path) or not os.path.exists(legacy_path):
+            return
+        notifications = read_json(legacy_path)
+        write_jsonl(path, reversed(notifications))
+        os.replace(legacy_path, f"{legacy_path}.migrated")
+        logger.info("Migrated %d notifications of %s to %s", len(notifications), user_id, path)
+    
+    def _user_lock(self, user_id: str) -> threading.Lock:
+        """
+        Get the lock serializing writes to a user's notification log and counters
+        
+        Appends run in worker threads while reads that mark notifications as
+        read rewrite the log on the caller's thread.
+        
+        Args:
+            user_id: User ID
+            
+        Returns:
+            Lock for the user's log
+        """
+        key = os.path.join(os.path.abspath(self.notification_path), user_id)
+        with _log_locks_guard:
+            return _log_locks.setdefault(key, threading.Lock())
+    
+    def _get_counters_path(self, user_id: str) -> str:
+        """Get path to user's notification counters"""
+        return os.path.join(self.notification_path, f"{user_id}_notifications.counters")
+    
+    def _read_counters(self, user_id: str) -> Tuple[int, int]:
+        """
+        Read a user's notification counters, rebuilding them from the log if missing
+        
+        Args:
+            user_id: User ID
+            
+        Returns:
+            Tuple of (unread, total) records in the notification log
+        """
+        try:
+            with open(self._get_counters_path(user_id), "rb") as f:
+                return _COUNTERS.unpack(f.read(_COUNTERS.size))
+        except (FileNotFoundError, struct.error):
+            notifications = self._read_log(user_id, limit=None)
+            unread = sum(1 for n in notifications if not n.get("read", False))
+            self._write_counters(user_id, unread, len(notifications))
+            return unread, len(notifications)
+    
+    def _write_counters(self, user_id: str, unread: int, total: int):
+        """Overwrite a user's notification counters in place with one fixed-size write"""
+        fd = os.open(self._get_counters_path(user_id), os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, _COUNTERS.pack(unread, total))
+        finally:
+            os.close(fd)
+    
+    def _read_log(self, user_id: str, limit: Optional[int] = MAX_NOTIFICATIONS) -> List[Dict[str, Any]]:
+        """
+        Read the newest records of a user's notification log
+        
+        Args:
+            user_id: User ID
+            limit: Maximum number of records to read (None for all)
+            
+        Returns:
+            Notifications, oldest first
+        """
+        path = self._get_user_notification_path(user_id)
+        # Only the newest lines are kept, so older records are never parsed
+        try:
+            with open(path, "rb") as f:
+                lines = deque(f, maxlen=limit)
+        except FileNotFoundError:
+            return []
+        
+        notifications = []
+        for line in lines:
+            try:
+                notifications.append(json_loads(line))
+            except ValueError:
+                # Only a crash mid-append can leave a partial line
+                logger.warning("Skipping corrupt record in notification log of %s", user_id)
+        return notifications
+    
+    def _compact(self, user_id: str, notifications: List[Dict[str, Any]]):
+        """
+        Rewrite a user's notification log, keeping only the newest notifications
+        
+        Args:
+            user_id: User ID
+            notifications: Newest notifications (at most MAX_NOTIFICATIONS), oldest first
+        """
+        write_jsonl(self._get_user_notification_path(user_id), notifications)
+        unread = sum(1 for n in notifications if not n.get("read", False))
+        self._write_counters(user_id, unread, len(notifications))
     
     async def send_progress_notification(
         self,
@@ -40,8 +159,8 @@ class UserNotifier:
             "timestamp": datetime.utcnow().isoformat(),
             "read": False
         }
-        self._save_notification(user_id, notification)
-        logger.info(f"Progress notification sent to {user_id}: {message}")
+        await self._save_notification(user_id, notification)
+        logger.info("Progress notification sent to %s: %s", user_id, message)
     
     async def send_success_notification(
         self,
@@ -67,8 +186,8 @@ class UserNotifier:
             "timestamp": datetime.utcnow().isoformat(),
             "read": False
         }
-        self._save_notification(user_id, notification)
-        logger.info(f"Success notification sent to {user_id}: {message}")
+        await self._save_notification(user_id, notification)
+        logger.info("Success notification sent to %s: %s", user_id, message)
     
     async def send_error_notification(
         self,
@@ -94,8 +213,8 @@ class UserNotifier:
             "timestamp": datetime.utcnow().isoformat(),
             "read": False
         }
-        self._save_notification(user_id, notification)
-        logger.error(f"Error notification sent to {user_id}: {message}")
+        await self._save_notification(user_id, notification)
+        logger.error("Error notification sent to %s: %s", user_id, message)
     
     async def send_deduplication_alert(
         self,
@@ -130,35 +249,70 @@ class UserNotifier:
                 {"id": "review", "label": "Review manually"}
             ]
         }
-        self._save_notification(user_id, notification)
-        logger.info(f"Deduplication alert sent to {user_id}: {message}")
+        await self._save_notification(user_id, notification)
+        logger.info("Deduplication alert sent to %s: %s", user_id, message)
     
-    def _save_notification(self, user_id: str, notification: Dict[str, Any]):
+    async def _save_notification(self, user_id: str, notification: Dict[str, Any]):
         """
-        Save notification to user's notification file
+        Queue notification for the user's background flusher and wait until it is written
+        
+        Notifications sent while a write is in flight are written together in
+        the next batch, with one append, off the event loop.
         
         Args:
             user_id: User ID
             notification: Notification dictionary
         """
-        path = self._get_user_notification_path(user_id)
-        
-        # Load existing notifications
-        notifications = []
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                notifications = json.load(f)
-        
-        # Add new notification (prepend to keep newest first)
-        notifications.insert(0, notification)
+        loop = asyncio.get_running_loop()
+        written = loop.create_future()
+        self._pending.setdefault(user_id, []).append((notification, written))
+        flusher = self._flushers.get(user_id)
+        if flusher is None or flusher.done():
+            self._flushers[user_id] = loop.create_task(self._flush_notifications(user_id))
+        await written
+    
+    async def _flush_notifications(self, user_id: str):
+        """
+        Write queued notifications for a user in batches until none are left
         
-        # Keep only last 100 notifications to prevent file bloat
-        if len(notifications) > 100:
-            notifications = notifications[:100]
+        Args:
+            user_id: User ID
+        """
+        # Let notifications sent in the same tick join the first batch
+        await asyncio.sleep(0)
+        while self._pending.get(user_id):
+            batch = self._pending.pop(user_id)
+            try:
+                await asyncio.to_thread(self._write_notifications, user_id, [n for n, _ in batch])
+            except Exception as e:
+                logger.error("Failed to save %d notifications for %s: %s", len(batch), user_id, e)
+                for _, written in batch:
+                    if not written.done():
+                        written.set_exception(e)
+            else:
+                for _, written in batch:
+                    if not written.done():
+                        written.set_result(None)
+    
+    def _write_notifications(self, user_id: str, notifications: List[Dict[str, Any]]):
+        """
+        Append notifications to user's notification log
         
-        # Save updated notifications
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(notifications, f, indent=2)
+        Args:
+            user_id: User ID
+            notifications: Notification dictionaries, oldest first
+        """
+        with self._user_lock(user_id):
+            path = self._get_user_notification_path(user_id)
+            unread, total = self._read_counters(user_id)
+            append_jsonl(path, notifications)
+            
+            # Trim to the newest notifications every so often instead of on every save
+            total += len(notifications)
+            if total >= MAX_NOTIFICATIONS + COMPACTION_INTERVAL or os.path.getsize(path) > COMPACTION_MAX_BYTES:
+                self._compact(user_id, self._read_log(user_id))
+            else:
+                self._write_counters(user_id, unread + len(notifications), total)
     
     def get_user_notifications(self, user_id: str, mark_as_read: bool = False) -> list:
         """
@@ -169,23 +323,18 @@ class UserNotifier:
             mark_as_read: Whether to mark notifications as read
             
         Returns:
-            List of notifications
+            List of notifications, newest first
         """
-        path = self._get_user_notification_path(user_id)
-        
-        if not os.path.exists(path):
-            return []
-        
-        with open(path, "r", encoding="utf-8") as f:
-            notifications = json.load(f)
-        
-        # Mark as read if requested
-        if mark_as_read:
-            for notification in notifications:
-                notification["read"] = True
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(notifications, f, indent=2)
+        with self._user_lock(user_id):
+            notifications = self._read_log(user_id)
+            
+            # Mark as read if requested
+            if mark_as_read and notifications:
+                for notification in notifications:
+                    notification["read"] = True
+                self._compact(user_id, notifications)
         
+        notifications.reverse()
         return notifications
     
     def get_unread_count(self, user_id: str) -> int:
@@ -198,5 +347,8 @@ class UserNotifier:
         Returns:
             Number of unread notifications
         """
-        notifications = self.get_user_notifications(user_id)
-        return sum(1 for n in notifications if not n.get("read", False))
\ No newline at end of file
+        # Notifications are only ever marked read all at once, so the unread ones
+        # are always the newest and at most MAX_NOTIFICATIONS of them are visible
+        with self._user_lock(user_id):
+            unread, _ = self._read_counters(user_id)
+        return min(unread, MAX_NOTIFICATIONS)
\ No newline at end of file
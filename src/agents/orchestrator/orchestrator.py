@@ -1,5 +1,9 @@
 import asyncio
+import hashlib
 import logging
+import os
+import weakref
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, Any, Optional
 from src.agents.data_management.data_ingestion import DataIngestionService
@@ -10,16 +14,37 @@ from src.agents.discussion.discussion_manager import DiscussionManager
 from src.agents.stats.stats_manager import StatsManager
 from src.core.models.paper_model import DynamicPaper, PaperVersion, FourDDataReference
 from src.core.security.hash_utils import calculate_data_hash
+from src.core.utils.file_utils import json_dumps
 from src.storage.timeseries_db import TimeSeriesDB
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("OrchestratorAgent")
 
+# Number of tasks handled concurrently by default
+DEFAULT_MAX_WORKERS = 8
+
+# Pending tasks before submit_task waits (and try_submit_task refuses)
+TASK_QUEUE_SIZE = 1024
+# Queue depth at which a near-capacity warning is logged
+TASK_QUEUE_HIGH_WATERMARK = TASK_QUEUE_SIZE * 9 // 10
+
+# Task fields that determine a task's outcome; submissions equal in all of them are duplicates
+TASK_KEY_FIELDS = ("task_type", "user_id", "paper_id", "data_path", "update_reason", "space_context", "data_ids")
+# Completed data tasks remembered so identical re-submissions are not processed again
+COMPLETED_TASK_CACHE_SIZE = 1024
+
+# Time-series writes are grouped into batches of up to this many versions...
+TS_BATCH_SIZE = 100
+# ...collected for at most this long (seconds) after the first one arrives
+TS_FLUSH_INTERVAL = 0.05
+# Pending time-series writes before handle_task waits for the flusher
+TS_WRITE_QUEUE_SIZE = 10000
+
 class OrchestratorAgent:
     """Core orchestrator agent that coordinates all other agents and monitors for updates"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
         # Initialize dependent agents
         self.data_ingestion_service = DataIngestionService()
         self.deduplication_scheduler = DeduplicationScheduler()
@@ -28,10 +53,24 @@ class OrchestratorAgent:
         self.discussion_manager = DiscussionManager()
         self.stats_manager = StatsManager()
         self.time_series_db = TimeSeriesDB()
-        # Async task queue
-        self.task_queue = asyncio.Queue()
+        # Async task queue (bounded, so bursts push back on submitters instead of growing memory)
+        self.task_queue = asyncio.Queue(maxsize=TASK_QUEUE_SIZE)
         # Monitoring state
         self.monitoring_running = False
+        # Worker coroutines draining the task queue
+        self.max_workers = max_workers
+        self._workers = []
+        # Error notifications in flight (referenced so they are not garbage collected early)
+        self._notification_tasks = set()
+        # Batched time-series writes: (paper_id, version, timestamp)
+        self._ts_write_queue = asyncio.Queue(maxsize=TS_WRITE_QUEUE_SIZE)
+        self._ts_flusher = None
+        self._stats_flusher = None
+        # Task key -> task ID of queued/running tasks, and of completed data tasks (least recent first)
+        self._inflight_tasks: Dict[str, str] = {}
+        self._completed_tasks: "OrderedDict[str, str]" = OrderedDict()
+        # Per-paper locks serializing version creation (dropped once no task holds or awaits them)
+        self._paper_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
         # Scheduler state
         self.scheduler_task = None
 
@@ -45,27 +84,95 @@ class OrchestratorAgent:
         self.scheduler_task = asyncio.create_task(self._run_scheduler())
         logger.info("Orchestrator Agent: Deduplication scheduler started")
         
+        self._ts_flusher = asyncio.create_task(self._ts_flush_loop())
+        self._stats_flusher = asyncio.create_task(self.stats_manager.run_flusher())
+        
+        # Slow I/O-bound tasks no longer serialize behind each other
+        self._workers = [asyncio.create_task(self._worker_loop()) for _ in range(self.max_workers)]
+        await asyncio.gather(*self._workers, return_exceptions=True)
+    
+    async def _worker_loop(self):
+        """Handle tasks from the shared queue until monitoring stops"""
         while self.monitoring_running:
+            # Suspends until a task arrives; no polling interval needed
+            task = await self.task_queue.get()
             try:
-                # Get next task from queue
-                task = await self.task_queue.get()
                 await self.handle_task(task)
-                self.task_queue.task_done()
+                self._task_finished(task, succeeded=True)
             except Exception as e:
+                self._task_finished(task, succeeded=False)
+                # Cancellation (stop_monitoring) is not an Exception and propagates out of the loop
                 logger.error(f"Orchestrator Agent: Task processing failed - {str(e)}")
                 # Only send notification if task has user_id
                 if "user_id" in task:
-                    await self.user_notifier.send_error_notification(
+                    self._notify_error(
                         user_id=task.get("user_id"),
                         message=f"Task processing failed: {str(e)}"
                     )
-            # Check queue every second (configurable)
-            await asyncio.sleep(1)
+            finally:
+                self.task_queue.task_done()
+    
+    def _notify_error(self, user_id: str, message: str):
+        """
+        Send an error notification in the background
+        
+        A slow or failing notifier must not hold up the worker that hit the error,
+        nor end its loop by raising from the error handler.
+        
+        Args:
+            user_id: User ID
+            message: Notification message
+        """
+        notification = asyncio.create_task(
+            self.user_notifier.send_error_notification(user_id=user_id, message=message)
+        )
+        self._notification_tasks.add(notification)
+        notification.add_done_callback(self._on_notification_done)
+    
+    def _on_notification_done(self, notification: asyncio.Task):
+        """Release a finished error notification and log its failure, if any"""
+        self._notification_tasks.discard(notification)
+        if not notification.cancelled() and notification.exception() is not None:
+            logger.error(f"Orchestrator Agent: Failed to send error notification - {str(notification.exception())}")
+    
+    async def _ts_flush_loop(self):
+        """Write queued time-series entries in batches until cancelled"""
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch.append(await self._ts_write_queue.get())
+                deadline = loop.time() + TS_FLUSH_INTERVAL
+                while len(batch) < TS_BATCH_SIZE:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._ts_write_queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._write_ts_batch(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # Write whatever is still queued before shutting down
+            while not self._ts_write_queue.empty():
+                batch.append(self._ts_write_queue.get_nowait())
+            await self._write_ts_batch(batch)
+            raise
+    
+    async def _write_ts_batch(self, batch):
+        """Insert a batch of time-series entries, logging instead of raising on failure"""
+        if not batch:
+            return
+        try:
+            await self.time_series_db.insert_paper_versions(batch)
+        except Exception as e:
+            logger.error(f"Orchestrator Agent: Failed to write {len(batch)} time-series entries - {str(e)}")
     
     async def _run_scheduler(self):
         """Run the deduplication scheduler in a background task"""
         try:
-            self.deduplication_scheduler.run_scheduler()
+            await self.deduplication_scheduler.run_scheduler()
         except Exception as e:
             logger.error(f"Orchestrator Agent: Deduplication scheduler error - {str(e)}")
 
@@ -73,6 +180,19 @@ class OrchestratorAgent:
         """Stop monitoring for updates"""
         self.monitoring_running = False
         
+        # Stop task workers (start_monitoring returns once they have finished)
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        
+        # The flushers write any queued time-series entries and pending stats as they exit
+        if self._ts_flusher:
+            self._ts_flusher.cancel()
+            self._ts_flusher = None
+        if self._stats_flusher:
+            self._stats_flusher.cancel()
+            self._stats_flusher = None
+        
         # Stop deduplication scheduler
         if self.scheduler_task:
             self.deduplication_scheduler.stop_scheduler()
@@ -82,13 +202,111 @@ class OrchestratorAgent:
         
         logger.info("Orchestrator Agent: Stopped monitoring")
 
-    def submit_task(self, task: Dict[str, Any]):
-        """Submit new task to processing queue (external API entry point)"""
-        task_id = task.get("task_id", f"task_{datetime.utcnow().timestamp()}")
-        task["task_id"] = task_id
-        task["submit_time"] = datetime.utcnow()
-        self.task_queue.put_nowait(task)
-        logger.info(f"Orchestrator Agent: Received new task - {task_id}")
+    async def submit_task(self, task: Dict[str, Any]) -> str:
+        """
+        Submit new task to processing queue, waiting while the queue is full (external API entry point)
+        
+        Returns:
+            Task ID (that of the earlier task if this one duplicates a queued, running or completed task)
+        """
+        if self._prepare_task(task):
+            return task["task_id"]
+        try:
+            await self.task_queue.put(task)
+        except BaseException:
+            self._inflight_tasks.pop(task["task_key"], None)
+            raise
+        self._task_submitted(task)
+        return task["task_id"]
+
+    def try_submit_task(self, task: Dict[str, Any]) -> str:
+        """
+        Submit new task without waiting
+        
+        Returns:
+            Task ID (that of the earlier task if this one duplicates a queued, running or completed task)
+            
+        Raises:
+            asyncio.QueueFull: If the queue is at capacity
+        """
+        if self._prepare_task(task):
+            return task["task_id"]
+        try:
+            self.task_queue.put_nowait(task)
+        except asyncio.QueueFull:
+            self._inflight_tasks.pop(task["task_key"], None)
+            raise
+        self._task_submitted(task)
+        return task["task_id"]
+
+    def _prepare_task(self, task: Dict[str, Any]) -> bool:
+        """
+        Assign task key, ID and submit time, and register the task as in flight
+        
+        Returns:
+            True if the task duplicates an earlier one (its task_id is then set to that task's)
+        """
+        now = datetime.utcnow()
+        task_key = self._task_key(task)
+        task["task_key"] = task_key
+        existing_id = self._inflight_tasks.get(task_key) or self._completed_tasks.get(task_key)
+        if existing_id is not None:
+            task["task_id"] = existing_id
+            logger.info(f"Orchestrator Agent: Task duplicates {existing_id}, not queued again")
+            return True
+        task["task_id"] = task.get("task_id", f"task_{now.timestamp()}")
+        task["submit_time"] = now
+        self._inflight_tasks[task_key] = task["task_id"]
+        return False
+
+    def _task_key(self, task: Dict[str, Any]) -> str:
+        """
+        Canonical hash of the fields that determine a task's outcome (ignores IDs and submit time)
+        
+        The data file's modification time and size are included, so re-uploading a changed
+        file under the same path is not mistaken for a duplicate.
+        """
+        parts = [task.get(field) for field in TASK_KEY_FIELDS]
+        data_path = task.get("data_path")
+        if data_path:
+            try:
+                stat = os.stat(data_path)
+                parts.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                parts.append(None)
+        return hashlib.sha256(json_dumps(parts)).hexdigest()
+
+    def _task_finished(self, task: Dict[str, Any], succeeded: bool):
+        """
+        Release a task's in-flight entry; successful data tasks are remembered as completed
+        
+        Other tasks (e.g. deduplication runs) depend on data that changes over time, so
+        repeating them later must run them again.
+        """
+        task_key = task.get("task_key")
+        if task_key is None or self._inflight_tasks.get(task_key) != task["task_id"]:
+            return
+        del self._inflight_tasks[task_key]
+        if succeeded and task.get("data_path"):
+            self._completed_tasks[task_key] = task["task_id"]
+            while len(self._completed_tasks) > COMPLETED_TASK_CACHE_SIZE:
+                self._completed_tasks.popitem(last=False)
+
+    def _paper_lock(self, paper_id: str) -> asyncio.Lock:
+        """Get the lock serializing version creation for a paper"""
+        lock = self._paper_locks.get(paper_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._paper_locks[paper_id] = lock
+        return lock
+
+    def _task_submitted(self, task: Dict[str, Any]):
+        """Log an accepted task, warning when the queue crosses its high watermark"""
+        if self.task_queue.qsize() == TASK_QUEUE_HIGH_WATERMARK:
+            logger.warning(
+                f"Orchestrator Agent: Task queue near capacity ({TASK_QUEUE_HIGH_WATERMARK}/{TASK_QUEUE_SIZE})"
+            )
+        logger.info(f"Orchestrator Agent: Received new task - {task['task_id']}")
 
     async def handle_task(self, task: Dict[str, Any]):
         """Process core task flow: data upload → paper update → user notification"""
@@ -120,7 +338,7 @@ class OrchestratorAgent:
         
         try:
             # Step 2: Run deduplication
-            deduplication_result = self.deduplication_scheduler.trigger_manual_deduplication(data_ids)
+            deduplication_result = await self.deduplication_scheduler.run_deduplication(data_ids)
             
             # Step 3: Notify user of completion
             await self.user_notifier.send_success_notification(
@@ -134,7 +352,7 @@ class OrchestratorAgent:
             
         except Exception as e:
             logger.error(f"Orchestrator Agent: Deduplication task {task['task_id']} failed - {str(e)}")
-            await self.user_notifier.send_error_notification(
+            self._notify_error(
                 user_id=user_id,
                 message=f"Deduplication task {task['task_id']} failed: {str(e)}. Please contact support."
             )
@@ -146,6 +364,8 @@ class OrchestratorAgent:
         data_path = task.get("data_path")
         update_reason = task.get("update_reason", "New or updated research data")
         space_context = task.get("space_context")  # Optional spatial coordinates
+        # One timestamp for every record this task produces; kept on the task so a retry reuses it
+        task_time = task.setdefault("task_time", datetime.utcnow())
 
         # Step 1: Notify user task has started
         await self.user_notifier.send_progress_notification(
@@ -162,13 +382,13 @@ class OrchestratorAgent:
                 data_path=data_path,
                 user_id=user_id,
                 paper_id=paper_id,
-                timestamp=datetime.utcnow(),
+                timestamp=task_time,
                 space_coordinate=space_context
             )
-            data_hash = calculate_data_hash(str(data_ingestion_result["data_content"]))
+            data_hash = data_ingestion_result.get("data_hash") or calculate_data_hash(data_ingestion_result["data_content"])
             four_d_data_ref = FourDDataReference(
                 data_id=data_ingestion_result["data_id"],
-                timestamp=datetime.utcnow(),
+                timestamp=task_time,
                 space_coordinate=space_context,
                 data_hash=data_hash,
                 data_type=data_ingestion_result["data_type"],
@@ -179,52 +399,61 @@ class OrchestratorAgent:
             await self.user_notifier.send_progress_notification(
                 user_id=user_id, message="Generating new paper version..."
             )
-            paper: DynamicPaper = await self.paper_version_manager.get_paper(paper_id)
-            new_version_number = paper.latest_version + 1
-            
-            # Generate version content with 4D data integration
-            new_version_content = await self.paper_version_manager.generate_version_content(
-                paper=paper,
-                four_d_data_refs=[four_d_data_ref],
-                version_number=new_version_number,
-                update_reason=update_reason
-            )
-            
-            # Generate content hash for tamper protection
-            content_hash = paper.generate_paper_hash(new_version_content)
-            
-            # Create new version object
-            new_version = PaperVersion(
-                version_id=f"version_{paper_id}_{new_version_number}",
-                version_number=new_version_number,
-                update_reason=update_reason,
-                four_d_data_references=[four_d_data_ref],
-                paper_content_hash=content_hash,
-                author_team=[user_id],
-                space_context=space_context
-            )
-            
-            # Save new version to storage
-            await self.paper_version_manager.save_new_version(paper, new_version, new_version_content)
+            # Workers run tasks concurrently; two versions of one paper must not both become latest + 1
+            async with self._paper_lock(paper_id):
+                paper: DynamicPaper = await self.paper_version_manager.get_paper(paper_id)
+                new_version_number = paper.latest_version + 1
+                
+                # Generate version content with 4D data integration
+                new_version_content = await self.paper_version_manager.generate_version_content(
+                    paper=paper,
+                    four_d_data_refs=[four_d_data_ref],
+                    version_number=new_version_number,
+                    update_reason=update_reason
+                )
+                
+                # Generate content hash for tamper protection
+                content_hash = paper.generate_paper_hash(new_version_content)
+                
+                # Create new version object
+                new_version = PaperVersion(
+                    version_id=f"version_{paper_id}_{new_version_number}",
+                    version_number=new_version_number,
+                    update_reason=update_reason,
+                    four_d_data_references=[four_d_data_ref],
+                    paper_content_hash=content_hash,
+                    author_team=[user_id],
+                    space_context=space_context
+                )
+                
+                # Save new version to storage
+                await self.paper_version_manager.save_new_version(paper, new_version, new_version_content)
 
             # Step 4: Store in time-series database for long-term tracking
-            await self.time_series_db.insert_paper_version(
-                paper_id=paper_id,
-                version=new_version,
-                timestamp=datetime.utcnow()
-            )
+            # (batched by the flusher while monitoring, written directly otherwise)
+            if self._ts_flusher is not None:
+                store_time_series = self._ts_write_queue.put((paper_id, new_version, task_time))
+            else:
+                store_time_series = self.time_series_db.insert_paper_version(
+                    paper_id=paper_id,
+                    version=new_version,
+                    timestamp=task_time
+                )
 
-            # Step 5: Notify user of successful completion
-            await self.user_notifier.send_success_notification(
-                user_id=user_id,
-                message=f"Task {task['task_id']} completed! Paper updated to version {new_version_number}. "
-                        f"4D data ID: {four_d_data_ref.data_id}. All temporal/spatial data is traceable."
+            # Step 5: Notify user of successful completion (independent of step 4, so run together)
+            await asyncio.gather(
+                store_time_series,
+                self.user_notifier.send_success_notification(
+                    user_id=user_id,
+                    message=f"Task {task['task_id']} completed! Paper updated to version {new_version_number}. "
+                            f"4D data ID: {four_d_data_ref.data_id}. All temporal/spatial data is traceable."
+                )
             )
             logger.info(f"Orchestrator Agent: Task {task['task_id']} completed - Paper {paper_id} updated to v{new_version_number}")
 
         except Exception as e:
             logger.error(f"Orchestrator Agent: Task {task['task_id']} failed - {str(e)}")
-            await self.user_notifier.send_error_notification(
+            self._notify_error(
                 user_id=user_id,
                 message=f"Task {task['task_id']} failed: {str(e)}. Please check your data or contact support."
             )
@@ -22,13 +22,14 @@ class TaskQueue:
             Task ID
         """
         task_id = str(uuid.uuid4())
+        now = datetime.utcnow()
         task = {
             "task_id": task_id,
             "task_type": task_type,
             "payload": payload,
             "status": "pending",
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "created_at": now,
+            "updated_at": now
         }
         self.tasks[task_id] = task
         await self.queue.put(task)
@@ -46,7 +47,7 @@ class TaskQueue:
         task = await self.queue.get()
         task["status"] = "processing"
         task["updated_at"] = datetime.utcnow()
-        self.tasks[task["task_id"]] = task
+        # self.tasks already references this dict, so the update is visible there
         return task
     
     def get_task_status(self, task_id: str) -> Optional[str]:
@@ -73,11 +74,12 @@ class TaskQueue:
             status: New status (pending, processing, completed, failed)
             result: Task result (optional)
         """
-        if task_id in self.tasks:
-            self.tasks[task_id]["status"] = status
-            self.tasks[task_id]["updated_at"] = datetime.utcnow()
+        task = self.tasks.get(task_id)
+        if task is not None:
+            task["status"] = status
+            task["updated_at"] = datetime.utcnow()
             if result is not None:
-                self.tasks[task_id]["result"] = result
+                task["result"] = result
     
     def get_queue_size(self) -> int:
         """Get current queue size"""
@@ -1,24 +1,68 @@
 import os
-import matplotlib.pyplot as plt
+import threading
 import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from mpl_toolkits.mplot3d import Axes3D
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("MultiDimRenderer")
 
+# Output resolution of saved figures; render cost grows with the square of this
+SAVEFIG_DPI = 150
+
+# Per-thread figures keyed by figsize, shared by all renderers; Figure objects must not be
+# shared between threads. Rendering goes through Figure/FigureCanvasAgg directly, so pyplot
+# (and its backend switching) is never involved, and the font cache is loaded once when
+# matplotlib.figure is imported.
+_figures = threading.local()
+
 class MultiDimRenderer:
     """Renderer for 4D (3D + time) data visualizations"""
     
     def __init__(self, output_path: str = "./storage/visualizations"):
         self.output_path = output_path
         os.makedirs(output_path, exist_ok=True)
+    
+    def _get_figure(self, figsize: Tuple[float, float], projection: Optional[str] = None) -> Tuple[Figure, Axes]:
+        """
+        Get an empty figure with a single axes, reusing this thread's figure of the same size
+        
+        Figures are created through the object-oriented API (not pyplot), so they are
+        never registered with pyplot's global figure manager.
         
-        # Configure matplotlib for non-interactive use
-        plt.switch_backend('Agg')
+        Args:
+            figsize: Figure size in inches
+            projection: Axes projection (e.g. "3d")
+            
+        Returns:
+            Tuple of (figure, axes)
+        """
+        cache = getattr(_figures, "cache", None)
+        if cache is None:
+            cache = _figures.cache = {}
+        fig = cache.get(figsize)
+        if fig is None:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            cache[figsize] = fig
+        elif fig.axes:
+            # Left over from a render that failed before saving
+            fig.clear()
+        return fig, fig.add_subplot(111, projection=projection)
+    
+    def _save_figure(self, fig: Figure, filepath: str):
+        """Save a figure and clear it for reuse (also releases the plotted data)"""
+        try:
+            fig.tight_layout()
+            fig.savefig(filepath, dpi=SAVEFIG_DPI, bbox_inches='tight')
+        finally:
+            fig.clear()
     
     def render_3d_scatter(
         self,
@@ -47,8 +91,7 @@ class MultiDimRenderer:
             labels = {"x": "X", "y": "Y", "z": "Z"}
         
         # Create figure and 3D axis
-        fig = plt.figure(figsize=(10, 8))
-        ax = fig.add_subplot(111, projection='3d')
+        fig, ax = self._get_figure((10, 8), projection='3d')
         
         # Extract x, y, z data (assuming Nx3 array)
         if data.shape[1] != 3:
@@ -59,7 +102,8 @@ class MultiDimRenderer:
         z = data[:, 2]
         
         # Create scatter plot
-        scatter = ax.scatter(x, y, z, c=z, cmap='viridis', s=50, alpha=0.7)
+        # Rasterized so vector outputs hold one image instead of a primitive per point
+        scatter = ax.scatter(x, y, z, c=z, cmap='viridis', s=50, alpha=0.7, rasterized=True)
         
         # Set labels and title
         ax.set_xlabel(labels["x"])
@@ -74,9 +118,7 @@ class MultiDimRenderer:
         ts_str = timestamp.strftime("%Y%m%d_%H%M%S")
         filename = f"{paper_id}_v{version_number}_3d_{ts_str}.png"
         filepath = os.path.join(self.output_path, filename)
-        plt.tight_layout()
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
+        self._save_figure(fig, filepath)
         
         logger.info(f"3D visualization generated: {filepath}")
         return filepath
@@ -108,15 +150,17 @@ class MultiDimRenderer:
             labels = {"x": "Time", "y": "Value", "legend": "Dimension"}
         
         # Create figure
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax = self._get_figure((12, 6))
         
         # Plot each dimension
         dimensions = ["X", "Y", "Z"]
         colors = ['r', 'g', 'b']
         
-        for i in range(3):
-            if i < value_data.shape[1]:
-                ax.plot(time_data, value_data[:, i], color=colors[i], label=f"{dimensions[i]} Dimension")
+        # One call builds a line per column (up to 3)
+        lines = ax.plot(time_data, value_data[:, :3])
+        for line, color, dimension in zip(lines, colors, dimensions):
+            line.set_color(color)
+            line.set_label(f"{dimension} Dimension")
         
         # Set labels and title
         ax.set_xlabel(labels["x"])
@@ -129,9 +173,7 @@ class MultiDimRenderer:
         ts_str = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         filename = f"{paper_id}_v{version_number}_timeseries_{ts_str}.png"
         filepath = os.path.join(self.output_path, filename)
-        plt.tight_layout()
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
+        self._save_figure(fig, filepath)
         
         logger.info(f"Time series visualization generated: {filepath}")
         return filepath
@@ -165,11 +207,11 @@ class MultiDimRenderer:
             labels = {"x": "Longitude", "y": "Latitude", "color": "Value"}
         
         # Create figure
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig, ax = self._get_figure((10, 8))
         
         # Create scatter plot with color mapping
         scatter = ax.scatter(lon_data, lat_data, c=value_data, cmap='plasma', 
-                            s=100, alpha=0.7, edgecolors='black', linewidth=0.5)
+                            s=100, alpha=0.7, edgecolors='black', linewidth=0.5, rasterized=True)
         
         # Set labels and title
         ax.set_xlabel(labels["x"])
@@ -187,9 +229,7 @@ class MultiDimRenderer:
         ts_str = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         filename = f"{paper_id}_v{version_number}_heatmap_{ts_str}.png"
         filepath = os.path.join(self.output_path, filename)
-        plt.tight_layout()
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
+        self._save_figure(fig, filepath)
         
         logger.info(f"Spatial heatmap generated: {filepath}")
         return filepath
\ No newline at end of file
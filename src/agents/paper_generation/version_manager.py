@@ -1,32 +1,221 @@
 import os
-import json
+import asyncio
+import hashlib
+import shutil
+import threading
 import uuid
-from datetime import datetime
-from typing import List, Optional
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
 import logging
 from src.core.models.paper_model import DynamicPaper, PaperVersion, FourDDataReference
 from src.agents.paper_generation.template_engine import TemplateEngine
+from src.agents.publication.timestamp_service import TimestampService
+from src.agents.publication.blockchain_cert import BlockchainCert
+from src.core.utils.file_utils import append_jsonl, atomic_open, json_loads, write_json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("PaperVersionManager")
 
+# Maximum number of parsed papers kept in memory per manager
+PAPER_CACHE_SIZE = 256
+
+# Rendered PDFs kept for identical content; least recently used entries are evicted above this
+PDF_CACHE_MAX_BYTES = 512 << 20
+# Part of the PDF cache key; bump when TemplateEngine.generate_pdf output changes
+PDF_CACHE_VERSION = 1
+
+# Worker processes for PDF rendering (CPU-bound pure Python, so threads would contend for the GIL)
+PDF_RENDER_PROCESSES = min(4, os.cpu_count() or 1)
+
+# Process-wide certification chain, created on first use; every certification goes through it
+# so that all managers append to the same in-memory chain
+_blockchain_cert: Optional[BlockchainCert] = None
+# Serializes appends to the shared certification chain across worker threads
+_CERTIFICATION_LOCK = threading.Lock()
+
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+_PDF_EXECUTOR_LOCK = threading.Lock()
+# Per-process engine used by PDF worker processes
+_worker_template_engine: Optional[TemplateEngine] = None
+
+
+def _render_pdf_in_worker(markdown_content: str, output_path: str):
+    """Render a PDF inside a worker process"""
+    global _worker_template_engine
+    if _worker_template_engine is None:
+        _worker_template_engine = TemplateEngine()
+    _worker_template_engine.generate_pdf(markdown_content, output_path)
+
+
+def _get_pdf_executor() -> ProcessPoolExecutor:
+    """Get the shared PDF rendering process pool, creating it on first use"""
+    global _pdf_executor
+    with _PDF_EXECUTOR_LOCK:
+        if _pdf_executor is None:
+            # Spawned, not forked: the parent runs an event loop and worker threads
+            _pdf_executor = ProcessPoolExecutor(
+                max_workers=PDF_RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_executor
+
+
 class PaperVersionManager:
     """Manager for paper version control and storage"""
     
     def __init__(self, storage_path: str = "./storage/papers"):
         self.storage_path = storage_path
         self.template_engine = TemplateEngine()
-        os.makedirs(storage_path, exist_ok=True)
+        self.timestamp_service = TimestampService()
+        # Version content stored once per distinct SHA-256, hard-linked into version paths
+        self.objects_path = os.path.join(storage_path, "objects")
+        os.makedirs(self.objects_path, exist_ok=True)
+        # Rendered PDFs keyed by content hash, hard-linked into version paths
+        self.pdf_cache_path = os.path.join(storage_path, ".pdf_cache")
+        os.makedirs(self.pdf_cache_path, exist_ok=True)
+        # paper_id -> ((mtime_ns, size) of the metadata and versions files it was parsed from, paper),
+        # least recently used first
+        self._paper_cache: "OrderedDict[str, Tuple[Tuple[int, ...], DynamicPaper]]" = OrderedDict()
     
     def _get_paper_path(self, paper_id: str) -> str:
         """Get path to paper metadata file"""
         return os.path.join(self.storage_path, f"{paper_id}.json")
     
+    def _get_versions_path(self, paper_id: str) -> str:
+        """Get path to the append-only version history (one PaperVersion per line)"""
+        return os.path.join(self.storage_path, f"{paper_id}.versions.jsonl")
+    
     def _get_version_path(self, paper_id: str, version_number: int) -> str:
         """Get path to paper version content"""
         return os.path.join(self.storage_path, f"{paper_id}_v{version_number}")
     
+    def _store_object(self, data: bytes, digest: str, suffix: str) -> str:
+        """
+        Store data under its SHA-256 in the object store, skipping the write if already present
+        
+        Args:
+            data: Content bytes
+            digest: Hex SHA-256 of data
+            suffix: File extension of the object (e.g. ".md")
+            
+        Returns:
+            Path to the content-addressed object
+        """
+        object_path = os.path.join(self.objects_path, f"{digest}{suffix}")
+        if not os.path.exists(object_path):
+            with atomic_open(object_path) as f:
+                f.write(data)
+        return object_path
+    
+    def _link_object(self, object_path: str, target_path: str):
+        """
+        Atomically point target_path at an object (hard link, or a copy where links are unsupported)
+        
+        Objects are never modified in place, so sharing the inode is safe as long as
+        version files are only ever replaced, not rewritten.
+        
+        Args:
+            object_path: Path in the object store
+            target_path: Version file path
+        """
+        temp_path = os.path.join(
+            os.path.dirname(target_path), f".{os.path.basename(target_path)}.{uuid.uuid4().hex}"
+        )
+        try:
+            try:
+                os.link(object_path, temp_path)
+            except OSError:
+                # Cross-device storage or a filesystem without hard links
+                shutil.copyfile(object_path, temp_path)
+            os.replace(temp_path, target_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    def _render_pdf(self, content: str, pdf_path: str):
+        """
+        Render a PDF in the process pool, blocking the calling (worker) thread until done
+        
+        Falls back to rendering in this thread if the pool cannot be used.
+        
+        Args:
+            content: Paper content (Markdown)
+            pdf_path: Output PDF path
+        """
+        global _pdf_executor
+        try:
+            _get_pdf_executor().submit(_render_pdf_in_worker, content, pdf_path).result()
+            return
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"PDF process pool unavailable, rendering in-process: {str(e)}")
+            with _PDF_EXECUTOR_LOCK:
+                _pdf_executor = None
+        self.template_engine.generate_pdf(content, pdf_path)
+    
+    def _generate_pdf_cached(self, content: str, digest: str, pdf_path: str):
+        """
+        Generate a version PDF, reusing an earlier rendering of identical content
+        
+        Args:
+            content: Paper content (Markdown)
+            digest: Hex SHA-256 of the encoded content
+            pdf_path: Output PDF path
+        """
+        cached_path = os.path.join(self.pdf_cache_path, f"{digest}_{PDF_CACHE_VERSION}.pdf")
+        try:
+            # Refresh the access time explicitly; relatime/noatime mounts would not
+            os.utime(cached_path)
+        except FileNotFoundError:
+            temp_path = f"{cached_path}.{uuid.uuid4().hex}.tmp"
+            try:
+                self._render_pdf(content, temp_path)
+                os.replace(temp_path, cached_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self._evict_pdf_cache()
+        else:
+            logger.info(f"Reusing cached PDF for content {digest[:12]}")
+        
+        try:
+            self._link_object(cached_path, pdf_path)
+        except FileNotFoundError:
+            # Evicted by a concurrent render in the meantime
+            self._render_pdf(content, pdf_path)
+    
+    def _evict_pdf_cache(self):
+        """Remove least recently used cached PDFs until the cache fits PDF_CACHE_MAX_BYTES"""
+        entries = []
+        total_bytes = 0
+        with os.scandir(self.pdf_cache_path) as it:
+            for entry in it:
+                if not entry.name.endswith(".pdf"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+        
+        if total_bytes <= PDF_CACHE_MAX_BYTES:
+            return
+        # Version PDFs keep their own links, so eviction only drops the cache entry
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            if total_bytes <= PDF_CACHE_MAX_BYTES:
+                break
+    
     async def get_paper(self, paper_id: str) -> DynamicPaper:
         """
         Get paper by ID
@@ -38,68 +227,124 @@ class PaperVersionManager:
             DynamicPaper object
         """
         paper_path = self._get_paper_path(paper_id)
-        if not os.path.exists(paper_path):
+        cached = self._paper_cache.get(paper_id)
+        try:
+            file_key, paper = await asyncio.to_thread(
+                self._read_paper_files,
+                paper_path,
+                self._get_versions_path(paper_id),
+                cached[0] if cached is not None else None
+            )
+        except FileNotFoundError:
+            self._paper_cache.pop(paper_id, None)
             raise FileNotFoundError(f"Paper {paper_id} not found")
         
-        with open(paper_path, "r", encoding="utf-8") as f:
-            paper_data = json.load(f)
-        
-        # Handle versions conversion
-        if "versions" in paper_data:
-            from src.core.models.paper_model import PaperVersion, FourDDataReference, SpaceCoordinate
-            converted_versions = []
-            for version_data in paper_data["versions"]:
-                # Convert four_d_data_references
-                if "four_d_data_references" in version_data:
-                    converted_refs = []
-                    for ref_data in version_data["four_d_data_references"]:
-                        # Convert space_coordinate if present
-                        if "space_coordinate" in ref_data and ref_data["space_coordinate"]:
-                            ref_data["space_coordinate"] = SpaceCoordinate(**ref_data["space_coordinate"])
-                        converted_refs.append(FourDDataReference(**ref_data))
-                    version_data["four_d_data_references"] = converted_refs
-                # Convert space_context if present
-                if "space_context" in version_data and version_data["space_context"]:
-                    version_data["space_context"] = SpaceCoordinate(**version_data["space_context"])
-                # Convert create_time to datetime
-                if "create_time" in version_data:
-                    from datetime import datetime
-                    version_data["create_time"] = datetime.fromisoformat(version_data["create_time"])
-                converted_versions.append(PaperVersion(**version_data))
-            paper_data["versions"] = converted_versions
-        
-        # Convert create_time to datetime
-        if "create_time" in paper_data:
-            from datetime import datetime
-            paper_data["create_time"] = datetime.fromisoformat(paper_data["create_time"])
-        
-        return DynamicPaper(**paper_data)
+        # Reuse the parsed paper while its file is unchanged
+        if paper is None:
+            self._paper_cache.move_to_end(paper_id)
+            return self._copy_paper(cached[1])
+        
+        self._paper_cache[paper_id] = (file_key, self._copy_paper(paper))
+        self._paper_cache.move_to_end(paper_id)
+        while len(self._paper_cache) > PAPER_CACHE_SIZE:
+            self._paper_cache.popitem(last=False)
+        return paper
     
-    async def save_paper(self, paper: DynamicPaper):
+    @staticmethod
+    def _read_paper_files(
+        paper_path: str,
+        versions_path: str,
+        cached_key: Optional[Tuple[int, ...]]
+    ) -> Tuple[Tuple[int, ...], Optional[DynamicPaper]]:
         """
-        Save paper metadata
+        Stat a paper's files and parse them unless they still match the cached version (runs in a worker thread)
+        
+        Papers saved before the version history was split out keep their versions in the
+        metadata file; those are read as-is until the next full save.
         
         Args:
-            paper: DynamicPaper object
+            paper_path: Path to paper metadata file
+            versions_path: Path to the paper's version history
+            cached_key: File key of the cached paper, if any
+            
+        Returns:
+            Tuple of (file key, parsed paper or None if cached_key is current)
+        """
+        stat = os.stat(paper_path)
+        try:
+            versions_stat = os.stat(versions_path)
+            versions_key = (versions_stat.st_mtime_ns, versions_stat.st_size)
+        except FileNotFoundError:
+            versions_stat = None
+            versions_key = (0, 0)
+        file_key = (stat.st_mtime_ns, stat.st_size) + versions_key
+        if file_key == cached_key:
+            return file_key, None
+        
+        with open(paper_path, "rb") as f:
+            paper_data = json_loads(f.read())
+        
+        if versions_stat is not None:
+            with open(versions_path, "rb") as f:
+                lines = f.read().splitlines()
+            versions = []
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    versions.append(json_loads(line))
+                except ValueError:
+                    # Left by an interrupted append (later appends start on a fresh line)
+                    logger.warning(f"Ignoring partially written version record in {versions_path}")
+            paper_data["versions"] = versions
+            if versions:
+                # The history is appended before the metadata is rewritten
+                paper_data["latest_version"] = max(paper_data.get("latest_version", 1), versions[-1]["version_number"])
+        
+        # Nested versions, data references, coordinates and ISO datetimes are parsed in one validation pass
+        return file_key, DynamicPaper.model_validate(paper_data)
+    
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        """Atomically replace a file with data (runs in a worker thread)"""
+        with atomic_open(path) as f:
+            f.write(data)
+    
+    @staticmethod
+    def _copy_paper(paper: DynamicPaper) -> DynamicPaper:
         """
-        paper_path = self._get_paper_path(paper.paper_id)
+        Copy a paper so that adding versions or editing fields doesn't affect the original
         
-        # Convert Pydantic model to dict with proper serialization
-        def serialize_pydantic(obj):
-            if hasattr(obj, "dict"):
-                return obj.dict()
-            elif hasattr(obj, "__dict__"):
-                return obj.__dict__
-            else:
-                return str(obj)
+        Existing PaperVersion objects are shared and must not be modified in place.
+        """
+        return paper.model_copy(update={
+            "versions": list(paper.versions),
+            "access_permissions": dict(paper.access_permissions)
+        })
+    
+    async def save_paper(self, paper: DynamicPaper):
+        """
+        Save paper metadata and its full version history
         
-        paper_dict = paper.dict()
+        Args:
+            paper: DynamicPaper object
+        """
+        self._paper_cache.pop(paper.paper_id, None)
         
-        with open(paper_path, "w", encoding="utf-8") as f:
-            json.dump(paper_dict, f, indent=2, default=serialize_pydantic)
+        # Pydantic serializes straight to JSON without an intermediate dict; the snapshot is
+        # taken here and only the disk writes move off the event loop
+        versions_data = b"".join(version.model_dump_json().encode("utf-8") + b"\n" for version in paper.versions)
+        metadata = self._dump_metadata(paper)
+        await asyncio.to_thread(self._write_file, self._get_versions_path(paper.paper_id), versions_data)
+        await asyncio.to_thread(self._write_file, self._get_paper_path(paper.paper_id), metadata)
         
         logger.info(f"Paper saved: {paper.paper_id}")
     
+    @staticmethod
+    def _dump_metadata(paper: DynamicPaper) -> bytes:
+        """Serialize paper-level fields only (the version history is stored separately)"""
+        return paper.model_dump_json(indent=2, exclude={"versions"}).encode("utf-8")
+    
     async def generate_version_content(
         self,
         paper: DynamicPaper,
@@ -146,52 +391,83 @@ class PaperVersionManager:
         # Add new version to paper
         paper.add_new_version(version)
         
-        # Save paper metadata
-        await self.save_paper(paper)
+        # Append the version to the history instead of rewriting all earlier versions, then update
+        # the metadata; papers still in the single-file layout get one full save to migrate them
+        versions_path = self._get_versions_path(paper.paper_id)
+        if os.path.exists(versions_path):
+            self._paper_cache.pop(paper.paper_id, None)
+            metadata = self._dump_metadata(paper)
+            await asyncio.to_thread(append_jsonl, versions_path, [version.model_dump(mode="json")])
+            await asyncio.to_thread(self._write_file, self._get_paper_path(paper.paper_id), metadata)
+            logger.info(f"Paper saved: {paper.paper_id}")
+        else:
+            await self.save_paper(paper)
         
         # Save version content (Markdown)
         version_path = self._get_version_path(paper.paper_id, version.version_number)
         md_path = f"{version_path}.md"
         
-        with open(md_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        # Identical content (e.g. a re-submission) reuses the stored object instead of writing again;
+        # the same hash keys the rendered PDF
+        content_bytes = content.encode("utf-8")
+        content_digest = hashlib.sha256(content_bytes).hexdigest()
+        object_path = await asyncio.to_thread(self._store_object, content_bytes, content_digest, ".md")
+        await asyncio.to_thread(self._link_object, object_path, md_path)
         
-        # Generate PDF version
+        # Generate PDF version, timestamp and blockchain certification; they are independent,
+        # so run them concurrently in threads instead of blocking the event loop in turn
         pdf_path = f"{version_path}.pdf"
-        self.template_engine.generate_pdf(content, pdf_path)
-        
-        # Create timestamp and blockchain certification
-        from src.agents.publication.timestamp_service import TimestampService
-        from src.agents.publication.blockchain_cert import BlockchainCert
-        
-        timestamp_service = TimestampService()
-        blockchain_cert = BlockchainCert()
-        
-        # Create timestamp
-        timestamp = timestamp_service.create_timestamp(
-            content=content,
-            paper_id=paper.paper_id,
-            version_number=version.version_number
-        )
-        
-        # Create blockchain certification
-        certification = blockchain_cert.certify_paper(
-            paper_id=paper.paper_id,
-            version_number=version.version_number,
-            content_hash=version.paper_content_hash
+        _, timestamp, certification = await asyncio.gather(
+            asyncio.to_thread(self._generate_pdf_cached, content, content_digest, pdf_path),
+            asyncio.to_thread(
+                self.timestamp_service.create_timestamp,
+                content=content_bytes,
+                paper_id=paper.paper_id,
+                version_number=version.version_number,
+                content_hash=content_digest
+            ),
+            asyncio.to_thread(
+                self._certify_version,
+                paper_id=paper.paper_id,
+                version_number=version.version_number,
+                content_hash=version.paper_content_hash
+            )
         )
         
         # Save timestamp and certification info
         cert_path = f"{version_path}_cert.json"
-        import json
-        with open(cert_path, "w", encoding="utf-8") as f:
-            json.dump({
-                "timestamp": timestamp,
-                "blockchain_certification": certification
-            }, f, indent=2)
+        await asyncio.to_thread(write_json, cert_path, {
+            "timestamp": timestamp,
+            "blockchain_certification": certification
+        })
         
         logger.info(f"New version saved: {paper.paper_id} v{version.version_number} with timestamp and blockchain certification")
     
+    def _certify_version(self, paper_id: str, version_number: int, content_hash: str) -> dict:
+        """
+        Append a version certification to the blockchain (safe to call from worker threads)
+        
+        Args:
+            paper_id: Paper ID
+            version_number: Version number
+            content_hash: Content hash
+            
+        Returns:
+            Certification metadata
+        """
+        global _blockchain_cert
+        
+        # Blocks take their index and previous_hash from the shared in-memory chain, so
+        # concurrent certifications would fork it
+        with _CERTIFICATION_LOCK:
+            if _blockchain_cert is None:
+                _blockchain_cert = BlockchainCert()
+            return _blockchain_cert.certify_paper(
+                paper_id=paper_id,
+                version_number=version_number,
+                content_hash=content_hash
+            )
+    
     async def get_version_content(self, paper_id: str, version_number: int) -> str:
         """
         Get paper version content
@@ -206,13 +482,16 @@ class PaperVersionManager:
         version_path = self._get_version_path(paper_id, version_number)
         md_path = f"{version_path}.md"
         
-        if not os.path.exists(md_path):
+        try:
+            return await asyncio.to_thread(self._read_text, md_path)
+        except FileNotFoundError:
             raise FileNotFoundError(f"Version {version_number} for paper {paper_id} not found")
-        
-        with open(md_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        
-        return content
+    
+    @staticmethod
+    def _read_text(path: str) -> str:
+        """Read a UTF-8 text file (runs in a worker thread)"""
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
     
     async def get_latest_version(self, paper_id: str) -> tuple[PaperVersion, str]:
         """
@@ -1,22 +1,35 @@
 import hashlib
+import os
 import time
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Set, Tuple
 import logging
+from src.core.utils.file_utils import append_jsonl, canonical_json, json_loads, read_json, write_jsonl
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("BlockchainCert")
 
+# OpenSSL-backed SHA-256; OpenSSL picks the SHA-NI / ARMv8 SHA2 code path at runtime when the CPU has it
+_sha256 = hashlib.sha256
+
+# Block hash format written by _create_block: 2 hashes canonical JSON of cert_data;
+# blocks without a hash_version (1) hash the dict's repr and are still verified that way
+BLOCK_HASH_VERSION = 2
+
 class BlockchainCert:
     """Blockchain certification service for paper verification"""
     
     def __init__(self, storage_path: str = "./storage/blockchain"):
-        import os
         self.storage_path = storage_path
         os.makedirs(storage_path, exist_ok=True)
         # In a real implementation, this would connect to a blockchain network
         self.chain = []
+        # Lookup indices over self.chain: cert_id -> block, (paper_id, version_number) -> cert_data
+        self._by_cert_id: Dict[str, Dict[str, Any]] = {}
+        self._by_paper_ver: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        # Hashes of blocks already checked by _verify_block
+        self._verified_hashes: Set[str] = set()
         self._load_chain()
     
     def certify_paper(self, paper_id: str, version_number: int, content_hash: str) -> Dict[str, Any]:
@@ -44,9 +57,10 @@ class BlockchainCert:
         # Add to blockchain (simulated)
         block = self._create_block(cert_data)
         self.chain.append(block)
-        self._save_chain()
+        self._index_block(block)
+        self._append_block(block)
         
-        logger.info(f"Paper certified: {cert_data['cert_id']} for {paper_id} v{version_number}")
+        logger.debug("Paper certified: %s for %s v%s", cert_data["cert_id"], paper_id, version_number)
         return cert_data
     
     def verify_certification(self, cert_id: str) -> bool:
@@ -59,17 +73,53 @@ class BlockchainCert:
         Returns:
             True if certification is valid, False otherwise
         """
-        # Find certification in blockchain
-        for block in self.chain:
-            if block.get("cert_data", {}).get("cert_id") == cert_id:
-                # Verify block integrity
-                if self._verify_block(block):
-                    logger.info(f"Certification verified: {cert_id}")
-                    return True
+        block = self._by_cert_id.get(cert_id)
+        if block is not None and self._verify_block(block):
+            logger.debug("Certification verified: %s", cert_id)
+            return True
         
         logger.warning(f"Certification not found: {cert_id}")
         return False
     
+    def verify_all(self, cert_ids: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """
+        Verify many certifications at once
+        
+        Args:
+            cert_ids: Certification IDs to verify (None for every certification in the chain)
+            
+        Returns:
+            Dictionary of cert_id -> True if found with a valid block hash, False otherwise
+        """
+        if cert_ids is None:
+            cert_ids = self._by_cert_id.keys()
+        
+        results = {}
+        for cert_id in cert_ids:
+            block = self._by_cert_id.get(cert_id)
+            results[cert_id] = block is not None and self._verify_block(block)
+        
+        invalid = sum(1 for valid in results.values() if not valid)
+        logger.info(f"Verified {len(results)} certifications ({invalid} invalid or missing)")
+        return results
+    
+    def verify_chain(self) -> Optional[int]:
+        """
+        Re-hash the entire chain and check that every block links to its predecessor
+        
+        Returns:
+            Index of the first invalid block, or None if the chain is intact
+        """
+        previous_hash = "0" * 64
+        for block in self.chain:
+            if block["previous_hash"] != previous_hash or not self._verify_block(block):
+                logger.warning(f"Blockchain integrity check failed at block {block['index']}")
+                return block["index"]
+            previous_hash = block["hash"]
+        
+        logger.info(f"Blockchain integrity verified ({len(self.chain)} blocks)")
+        return None
+    
     def get_certification(self, paper_id: str, version_number: int) -> Optional[Dict[str, Any]]:
         """
         Get certification for specific paper version
@@ -81,12 +131,20 @@ class BlockchainCert:
         Returns:
             Certification data or None if not found
         """
-        for block in self.chain:
-            cert_data = block.get("cert_data", {})
-            if cert_data.get("paper_id") == paper_id and cert_data.get("version_number") == version_number:
-                return cert_data
+        return self._by_paper_ver.get((paper_id, version_number))
+    
+    def _index_block(self, block: Dict[str, Any]):
+        """
+        Add block to the lookup indices (the first block wins on duplicate keys, as in a chain scan)
         
-        return None
+        Args:
+            block: Block data
+        """
+        cert_data = block.get("cert_data", {})
+        cert_id = cert_data.get("cert_id")
+        if cert_id is not None:
+            self._by_cert_id.setdefault(cert_id, block)
+        self._by_paper_ver.setdefault((cert_data.get("paper_id"), cert_data.get("version_number")), cert_data)
     
     def _create_block(self, cert_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -105,6 +163,7 @@ class BlockchainCert:
             "timestamp": datetime.utcnow().isoformat(),
             "cert_data": cert_data,
             "previous_hash": previous_hash,
+            "hash_version": BLOCK_HASH_VERSION,
             "hash": ""
         }
         
@@ -122,8 +181,18 @@ class BlockchainCert:
         Returns:
             Hash value
         """
-        block_data = f"{block['index']}|{block['timestamp']}|{block['cert_data']}|{block['previous_hash']}"
-        return hashlib.sha256(block_data.encode("utf-8")).hexdigest()
+        if block.get("hash_version", 1) < 2:
+            block_data = f"{block['index']}|{block['timestamp']}|{block['cert_data']}|{block['previous_hash']}"
+            return _sha256(block_data.encode("utf-8")).hexdigest()
+        
+        h = _sha256(str(block["index"]).encode("ascii"))
+        h.update(b"|")
+        h.update(block["timestamp"].encode("utf-8"))
+        h.update(b"|")
+        h.update(canonical_json(block["cert_data"]))
+        h.update(b"|")
+        h.update(block["previous_hash"].encode("ascii"))
+        return h.hexdigest()
     
     def _verify_block(self, block: Dict[str, Any]) -> bool:
         """
@@ -135,28 +204,59 @@ class BlockchainCert:
         Returns:
             True if block is valid, False otherwise
         """
+        # Blocks are immutable once appended, so a hash only needs checking once per process
+        if block["hash"] in self._verified_hashes:
+            return True
+        
         # Calculate expected hash
         expected_hash = self._calculate_block_hash(block)
-        return block["hash"] == expected_hash
+        if block["hash"] != expected_hash:
+            return False
+        
+        self._verified_hashes.add(expected_hash)
+        return True
     
-    def _save_chain(self):
-        """
-        Save blockchain to storage
+    def _append_block(self, block: Dict[str, Any]):
         """
-        import json
-        chain_path = f"{self.storage_path}/blockchain.json"
+        Append block to the chain log (one JSON line per block)
         
-        with open(chain_path, "w", encoding="utf-8") as f:
-            json.dump(self.chain, f, indent=2, default=str)
+        Args:
+            block: Block data
+        """
+        append_jsonl(f"{self.storage_path}/blockchain.jsonl", [block])
     
     def _load_chain(self):
         """
         Load blockchain from storage
         """
-        import json
-        import os
+        chain_path = f"{self.storage_path}/blockchain.jsonl"
+        legacy_path = f"{self.storage_path}/blockchain.json"
+        self._verified_hashes.clear()
+        
+        try:
+            with open(chain_path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            lines = None
         
-        chain_path = f"{self.storage_path}/blockchain.json"
-        if os.path.exists(chain_path):
-            with open(chain_path, "r", encoding="utf-8") as f:
-                self.chain = json.load(f)
+        if lines is not None:
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    self.chain.append(json_loads(line))
+                except ValueError:
+                    # Left by an interrupted append (later appends start on a fresh line)
+                    logger.warning(f"Ignoring partially written block in {chain_path}")
+        else:
+            # Convert a chain saved as a single JSON document to the append-only log
+            try:
+                self.chain = read_json(legacy_path)
+            except FileNotFoundError:
+                pass
+            else:
+                write_jsonl(chain_path, self.chain)
+                logger.info(f"Migrated {len(self.chain)} blocks from {legacy_path}")
+        
+        for block in self.chain:
+            self._index_block(block)
@@ -1,53 +1,91 @@
+import os
 import time
 import hashlib
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, BinaryIO, Iterable, List, Tuple, Union
 import logging
+from src.core.security.hash_utils import hash_many
+from src.core.utils.file_utils import read_json, write_json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("TimestampService")
 
+# OpenSSL-backed SHA-256; OpenSSL picks the SHA-NI / ARMv8 SHA2 code path at runtime when the CPU has it
+_sha256 = hashlib.sha256
+
+# Read size when hashing content from a file object
+HASH_CHUNK_SIZE = 1 << 20
+
 class TimestampService:
     """Service for creating and verifying timestamps for paper versions"""
     
     def __init__(self, storage_path: str = "./storage/timestamps"):
-        import os
         self.storage_path = storage_path
         os.makedirs(storage_path, exist_ok=True)
     
-    def create_timestamp(self, content: str, paper_id: str, version_number: int) -> Dict[str, Any]:
+    def create_timestamp(
+        self,
+        content: Union[str, bytes, BinaryIO, None],
+        paper_id: str,
+        version_number: int,
+        content_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Create timestamp for paper version
         
         Args:
-            content: Paper content
+            content: Paper content as text, UTF-8 bytes or a binary file object (hashed in chunks)
             paper_id: Paper ID
             version_number: Version number
+            content_hash: Hex SHA-256 of the UTF-8 content, if the caller already has it
             
         Returns:
             Timestamp metadata
         """
         # Generate content hash
-        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if content_hash is None:
+            content_hash = self._hash_content(content)
         
         # Create timestamp
+        timestamp_unix = int(time.time())
         timestamp = {
-            "timestamp_id": f"ts_{paper_id}_{version_number}_{int(time.time())}",
+            "timestamp_id": f"ts_{paper_id}_{version_number}_{timestamp_unix}",
             "paper_id": paper_id,
             "version_number": version_number,
             "content_hash": content_hash,
             "timestamp": datetime.utcnow().isoformat(),
-            "timestamp_unix": int(time.time()),
-            "verification_code": self._generate_verification_code(content_hash, paper_id, version_number)
+            "timestamp_unix": timestamp_unix,
+            "verification_code": self._generate_verification_code(content_hash, paper_id, version_number, timestamp_unix)
         }
         
         # Save timestamp
         self._save_timestamp(timestamp)
         
-        logger.info(f"Timestamp created: {timestamp['timestamp_id']} for {paper_id} v{version_number}")
+        logger.debug("Timestamp created: %s for %s v%s", timestamp["timestamp_id"], paper_id, version_number)
         return timestamp
     
+    def batch_create(self, records: Iterable[Tuple[Union[str, bytes], str, int]]) -> List[Dict[str, Any]]:
+        """
+        Create timestamps for many paper versions, hashing their contents in parallel
+        
+        Args:
+            records: (content, paper_id, version_number) tuples; content is text or UTF-8 bytes
+            
+        Returns:
+            Timestamp metadata, in the order of records
+        """
+        records = list(records)
+        if not records:
+            return []
+        
+        content_hashes = hash_many((content for content, _, _ in records), self._hash_content)
+        
+        return [
+            self.create_timestamp(None, paper_id, version_number, content_hash=content_hash)
+            for (_, paper_id, version_number), content_hash in zip(records, content_hashes)
+        ]
+    
     def verify_timestamp(self, timestamp_id: str) -> bool:
         """
         Verify timestamp integrity
@@ -63,20 +101,74 @@ class TimestampService:
         if not timestamp:
             return False
         
-        # Verify timestamp
+        if not self._check_verification_code(timestamp):
+            return False
+        
+        logger.debug("Timestamp verified: %s", timestamp_id)
+        return True
+    
+    def verify_many(self, timestamp_ids: Iterable[str]) -> Dict[str, bool]:
+        """
+        Verify several timestamps
+        
+        Args:
+            timestamp_ids: Timestamp IDs
+            
+        Returns:
+            Dictionary of timestamp_id -> True if the timestamp exists and is valid, False otherwise
+        """
+        results = {}
+        for timestamp_id in timestamp_ids:
+            timestamp = self._load_timestamp(timestamp_id)
+            results[timestamp_id] = bool(timestamp) and self._check_verification_code(timestamp)
+        
+        invalid = sum(1 for valid in results.values() if not valid)
+        logger.info(f"Verified {len(results)} timestamps ({invalid} invalid or missing)")
+        return results
+    
+    def _check_verification_code(self, timestamp: Dict[str, Any]) -> bool:
+        """
+        Check a stored timestamp's verification code against its recorded fields
+        
+        Args:
+            timestamp: Timestamp metadata
+            
+        Returns:
+            True if the verification code matches, False otherwise
+        """
         expected_verification_code = self._generate_verification_code(
             timestamp["content_hash"],
             timestamp["paper_id"],
-            timestamp["version_number"]
+            timestamp["version_number"],
+            timestamp["timestamp_unix"]
         )
+        return timestamp["verification_code"] == expected_verification_code
+    
+    def _hash_content(self, content: Union[str, bytes, BinaryIO]) -> str:
+        """
+        Calculate hex SHA-256 of paper content
         
-        if timestamp["verification_code"] != expected_verification_code:
-            return False
+        Args:
+            content: Paper content as text, UTF-8 bytes or a binary file object
+            
+        Returns:
+            Content hash
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return _sha256(content).hexdigest()
         
-        logger.info(f"Timestamp verified: {timestamp_id}")
-        return True
+        # Stream file objects instead of reading them into memory (file_digest needs Python 3.11+)
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(content, "sha256").hexdigest()
+        
+        h = _sha256()
+        for chunk in iter(lambda: content.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+        return h.hexdigest()
     
-    def _generate_verification_code(self, content_hash: str, paper_id: str, version_number: int) -> str:
+    def _generate_verification_code(self, content_hash: str, paper_id: str, version_number: int, timestamp_unix: int) -> str:
         """
         Generate verification code for timestamp
         
@@ -84,12 +176,13 @@ class TimestampService:
             content_hash: Content hash
             paper_id: Paper ID
             version_number: Version number
+            timestamp_unix: Creation time recorded in the timestamp (Unix seconds)
             
         Returns:
             Verification code
         """
-        data = f"{content_hash}|{paper_id}|{version_number}|{int(time.time())}"
-        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+        data = f"{content_hash}|{paper_id}|{version_number}|{timestamp_unix}"
+        return _sha256(data.encode("utf-8")).hexdigest()
     
     def _save_timestamp(self, timestamp: Dict[str, Any]):
         """
@@ -98,11 +191,8 @@ class TimestampService:
         Args:
             timestamp: Timestamp metadata
         """
-        import json
         timestamp_path = f"{self.storage_path}/{timestamp['timestamp_id']}.json"
-        
-        with open(timestamp_path, "w", encoding="utf-8") as f:
-            json.dump(timestamp, f, indent=2)
+        write_json(timestamp_path, timestamp, indent=False)
     
     def _load_timestamp(self, timestamp_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -114,12 +204,8 @@ class TimestampService:
         Returns:
             Timestamp metadata or None if not found
         """
-        import json
-        import os
-        
         timestamp_path = f"{self.storage_path}/{timestamp_id}.json"
-        if not os.path.exists(timestamp_path):
+        try:
+            return read_json(timestamp_path)
+        except FileNotFoundError:
             return None
-        
-        with open(timestamp_path, "r", encoding="utf-8") as f:
-            return json.load(f)
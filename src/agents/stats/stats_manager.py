@@ -1,27 +1,268 @@
 import os
-import json
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
 import logging
 from src.core.models.stats_model import PaperStats, PaperAccessPermission
+from src.core.utils.file_utils import read_json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("StatsManager")
 
+# PRAGMA user_version once the per-paper JSON files have been imported
+JSON_MIGRATED_VERSION = 1
+
+# View/download increments are buffered in memory and applied in one transaction
+# once this many papers have pending counts or this many seconds have passed
+STATS_FLUSH_THRESHOLD = 256
+STATS_FLUSH_INTERVAL = 0.5
+
+# Maximum number of stored stats and permissions kept parsed per manager
+STATS_CACHE_SIZE = 4096
+
+_STATS_COLUMNS = "paper_id, view_count, download_count, last_view_time, last_download_time"
+_PERM_COLUMNS = "paper_id, allow_download, allow_discussion, updated_at"
+
 class StatsManager:
     """Manager for paper view/download statistics and access permissions"""
     
     def __init__(self, storage_path="./storage/stats"):
         self.storage_path = storage_path
         os.makedirs(storage_path, exist_ok=True)
+        self.db_path = os.path.join(storage_path, "stats.db")
+        # The connection is shared by request threads and the flusher; statements and
+        # transactions on it run one at a time
+        self._db_lock = threading.Lock()
+        self._open_database()
+        self._migrate_json_files()
+        # paper_id -> unflushed view/download counts and latest times
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        # Parsed stored stats and download permissions (least recently used first); the
+        # generation counts invalidations so a lookup racing a write cannot cache stale rows
+        self._stats_cache: "OrderedDict[str, PaperStats]" = OrderedDict()
+        self._perm_cache: "OrderedDict[str, bool]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+        self._cache_data_version = self._data_version()
+
+    def _open_database(self):
+        """Open the SQLite statistics database and create its schema"""
+        # Autocommit mode: each statement is its own durable transaction
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Timestamps are stored as ISO strings, as in the JSON files they replace
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stats (
+                paper_id TEXT PRIMARY KEY,
+                view_count INTEGER NOT NULL DEFAULT 0,
+                download_count INTEGER NOT NULL DEFAULT 0,
+                last_view_time TEXT,
+                last_download_time TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS perm (
+                paper_id TEXT PRIMARY KEY,
+                allow_download INTEGER NOT NULL,
+                allow_discussion INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+
+    def _migrate_json_files(self):
+        """Import statistics and permissions from the legacy per-paper JSON files"""
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] >= JSON_MIGRATED_VERSION:
+            return
+        stats_rows = []
+        perm_rows = []
+        for filename in os.listdir(self.storage_path):
+            path = os.path.join(self.storage_path, filename)
+            try:
+                if filename.endswith("_stats.json"):
+                    stats_rows.append(self._stats_row(PaperStats(**read_json(path))))
+                elif filename.endswith("_perm.json"):
+                    perm_rows.append(self._perm_row(PaperAccessPermission(**read_json(path))))
+            except Exception as e:
+                logger.warning(f"Failed to import {path}: {e}")
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(f"INSERT OR IGNORE INTO stats ({_STATS_COLUMNS}) VALUES (?, ?, ?, ?, ?)", stats_rows)
+            self._conn.executemany(f"INSERT OR IGNORE INTO perm ({_PERM_COLUMNS}) VALUES (?, ?, ?, ?)", perm_rows)
+            self._conn.execute(f"PRAGMA user_version = {JSON_MIGRATED_VERSION}")
+        if stats_rows or perm_rows:
+            logger.info(f"Migrated {len(stats_rows)} stats and {len(perm_rows)} permission files to {self.db_path}")
+
+    @staticmethod
+    def _stats_row(stats: PaperStats) -> tuple:
+        """Build a stats table row"""
+        return (
+            stats.paper_id,
+            stats.view_count,
+            stats.download_count,
+            _isoformat(stats.last_view_time),
+            _isoformat(stats.last_download_time)
+        )
+
+    @staticmethod
+    def _perm_row(perm: PaperAccessPermission) -> tuple:
+        """Build a perm table row"""
+        return (perm.paper_id, int(perm.allow_download), int(perm.allow_discussion), perm.updated_at.isoformat())
+
+    def _data_version(self) -> int:
+        """Get the SQLite data version, which changes when other connections commit"""
+        with self._db_lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _cache_get(self, cache: OrderedDict, paper_id: str) -> Tuple[Any, int]:
+        """
+        Look up a parsed value, dropping both caches if another connection has written
+        
+        Args:
+            cache: Stats or permission cache
+            paper_id: Paper ID
+            
+        Returns:
+            Tuple of (cached value or None, cache generation to pass to _cache_put)
+        """
+        with self._cache_lock:
+            data_version = self._data_version()
+            if data_version != self._cache_data_version:
+                self._stats_cache.clear()
+                self._perm_cache.clear()
+                self._cache_generation += 1
+                self._cache_data_version = data_version
+            value = cache.get(paper_id)
+            if value is not None:
+                cache.move_to_end(paper_id)
+            return value, self._cache_generation
 
-    def _stats_path(self, paper_id: str) -> str:
-        """Get path to paper statistics file"""
-        return os.path.join(self.storage_path, f"{paper_id}_stats.json")
+    def _cache_put(self, cache: OrderedDict, paper_id: str, value: Any, generation: int):
+        """Cache a parsed value unless the caches were invalidated since it was read"""
+        with self._cache_lock:
+            if generation != self._cache_generation:
+                return
+            cache[paper_id] = value
+            cache.move_to_end(paper_id)
+            while len(cache) > STATS_CACHE_SIZE:
+                cache.popitem(last=False)
 
-    def _perm_path(self, paper_id: str) -> str:
-        """Get path to paper access permission file"""
-        return os.path.join(self.storage_path, f"{paper_id}_perm.json")
+    def _invalidate_cache(self, cache: OrderedDict, paper_ids: Iterable[str]):
+        """Drop cached values after writing them"""
+        with self._cache_lock:
+            for paper_id in paper_ids:
+                cache.pop(paper_id, None)
+            self._cache_generation += 1
+
+    def close(self):
+        """Flush pending counts and close the statistics database"""
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def flush(self):
+        """Apply buffered view/download increments in a single transaction"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        
+        rows = [
+            (
+                paper_id,
+                counts["view_count"],
+                counts["download_count"],
+                _isoformat(counts["last_view_time"]),
+                _isoformat(counts["last_download_time"])
+            )
+            for paper_id, counts in pending.items()
+        ]
+        try:
+            with self._db_lock, self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    f"""
+                    INSERT INTO stats ({_STATS_COLUMNS}) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(paper_id) DO UPDATE SET
+                        view_count = view_count + excluded.view_count,
+                        download_count = download_count + excluded.download_count,
+                        last_view_time = COALESCE(excluded.last_view_time, last_view_time),
+                        last_download_time = COALESCE(excluded.last_download_time, last_download_time)
+                    """,
+                    rows
+                )
+        except Exception:
+            # Keep the counts for the next flush
+            with self._pending_lock:
+                for paper_id, counts in pending.items():
+                    self._merge_pending(paper_id, counts)
+            raise
+        finally:
+            self._invalidate_cache(self._stats_cache, pending)
+
+    async def run_flusher(self, interval: float = STATS_FLUSH_INTERVAL):
+        """
+        Flush buffered increments periodically until cancelled
+        
+        Args:
+            interval: Seconds between flushes
+        """
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception as e:
+                    logger.error(f"Failed to flush paper statistics: {e}")
+        except asyncio.CancelledError:
+            # Write whatever is still pending before shutting down
+            await asyncio.to_thread(self.flush)
+            raise
+
+    def _add_pending(self, paper_id: str, field: str, time_field: str):
+        """
+        Buffer one view or download, flushing if the buffer is full or old enough
+        
+        Args:
+            paper_id: Paper ID
+            field: Count column to increment
+            time_field: Time column to set to now
+        """
+        with self._pending_lock:
+            self._merge_pending(paper_id, {field: 1, time_field: datetime.utcnow()})
+            due = (
+                len(self._pending) >= STATS_FLUSH_THRESHOLD
+                or time.monotonic() - self._last_flush >= STATS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def _merge_pending(self, paper_id: str, delta: Dict[str, Any]):
+        """Add counts and times to a paper's pending entry (caller holds the lock)"""
+        counts = self._pending.setdefault(paper_id, {
+            "view_count": 0,
+            "download_count": 0,
+            "last_view_time": None,
+            "last_download_time": None
+        })
+        for field in ("view_count", "download_count"):
+            counts[field] += delta.get(field, 0)
+        for field in ("last_view_time", "last_download_time"):
+            if delta.get(field) is not None:
+                counts[field] = delta[field]
 
     # ------------------------------
     # View Count Related
@@ -33,11 +274,8 @@ class StatsManager:
         Args:
             paper_id: Paper ID
         """
-        stats = self.get_stats(paper_id)
-        stats.view_count += 1
-        stats.last_view_time = datetime.utcnow()
-        self._save_stats(stats)
-        logger.info(f"Incremented view count for paper {paper_id} (total: {stats.view_count})")
+        self._add_pending(paper_id, "view_count", "last_view_time")
+        logger.debug("Incremented view count for paper %s", paper_id)
 
     def get_stats(self, paper_id: str) -> PaperStats:
         """
@@ -49,18 +287,34 @@ class StatsManager:
         Returns:
             PaperStats object
         """
-        path = self._stats_path(paper_id)
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                stats_data = json.load(f)
-                # Convert timestamps back to datetime
-                if stats_data.get("last_view_time"):
-                    stats_data["last_view_time"] = datetime.fromisoformat(stats_data["last_view_time"])
-                if stats_data.get("last_download_time"):
-                    stats_data["last_download_time"] = datetime.fromisoformat(stats_data["last_download_time"])
-                return PaperStats(**stats_data)
-        # Return empty stats if none exist
-        return PaperStats(paper_id=paper_id)
+        stored, generation = self._cache_get(self._stats_cache, paper_id)
+        if stored is None:
+            with self._db_lock:
+                row = self._conn.execute(f"SELECT {_STATS_COLUMNS} FROM stats WHERE paper_id = ?", (paper_id,)).fetchone()
+            if row is not None:
+                stored = PaperStats(
+                    paper_id=row["paper_id"],
+                    view_count=row["view_count"],
+                    download_count=row["download_count"],
+                    last_view_time=_fromisoformat(row["last_view_time"]),
+                    last_download_time=_fromisoformat(row["last_download_time"])
+                )
+            else:
+                # Empty stats if none exist
+                stored = PaperStats(paper_id=paper_id)
+            self._cache_put(self._stats_cache, paper_id, stored, generation)
+        # The cached object is shared; callers get their own copy
+        stats = stored.model_copy()
+        
+        # Include increments that have not been flushed yet
+        with self._pending_lock:
+            counts = self._pending.get(paper_id)
+            if counts is not None:
+                stats.view_count += counts["view_count"]
+                stats.download_count += counts["download_count"]
+                stats.last_view_time = counts["last_view_time"] or stats.last_view_time
+                stats.last_download_time = counts["last_download_time"] or stats.last_download_time
+        return stats
 
     def _save_stats(self, stats: PaperStats):
         """
@@ -69,8 +323,12 @@ class StatsManager:
         Args:
             stats: PaperStats object
         """
-        with open(self._stats_path(stats.paper_id), "w", encoding="utf-8") as f:
-            json.dump(stats.dict(), f, indent=2, default=str)
+        # stats replaces the stored counts, so pending increments must not be added on top
+        with self._pending_lock:
+            self._pending.pop(stats.paper_id, None)
+            with self._db_lock:
+                self._conn.execute(f"INSERT OR REPLACE INTO stats ({_STATS_COLUMNS}) VALUES (?, ?, ?, ?, ?)", self._stats_row(stats))
+        self._invalidate_cache(self._stats_cache, [stats.paper_id])
 
     # ------------------------------
     # Download Permission + Download Count Related
@@ -88,8 +346,9 @@ class StatsManager:
             allow_download=allow,
             updated_at=datetime.utcnow()
         )
-        with open(self._perm_path(paper_id), "w", encoding="utf-8") as f:
-            json.dump(perm.dict(), f, indent=2, default=str)
+        with self._db_lock:
+            self._conn.execute(f"INSERT OR REPLACE INTO perm ({_PERM_COLUMNS}) VALUES (?, ?, ?, ?)", self._perm_row(perm))
+        self._invalidate_cache(self._perm_cache, [paper_id])
         logger.info(f"Set download permission for paper {paper_id} to: {allow}")
 
     def can_download(self, paper_id: str) -> bool:
@@ -102,13 +361,13 @@ class StatsManager:
         Returns:
             True if download is allowed, False otherwise (default: False)
         """
-        path = self._perm_path(paper_id)
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                perm_data = json.load(f)
-                perm = PaperAccessPermission(**perm_data)
-                return perm.allow_download
-        return False
+        allow, generation = self._cache_get(self._perm_cache, paper_id)
+        if allow is None:
+            with self._db_lock:
+                row = self._conn.execute("SELECT allow_download FROM perm WHERE paper_id = ?", (paper_id,)).fetchone()
+            allow = bool(row["allow_download"]) if row is not None else False
+            self._cache_put(self._perm_cache, paper_id, allow, generation)
+        return allow
 
     def increment_download(self, paper_id: str):
         """
@@ -121,8 +380,15 @@ class StatsManager:
         if not self.can_download(paper_id):
             raise PermissionError(f"Download not allowed for paper {paper_id}")
         
-        stats = self.get_stats(paper_id)
-        stats.download_count += 1
-        stats.last_download_time = datetime.utcnow()
-        self._save_stats(stats)
-        logger.info(f"Incremented download count for paper {paper_id} (total: {stats.download_count})")
\ No newline at end of file
+        self._add_pending(paper_id, "download_count", "last_download_time")
+        logger.debug("Incremented download count for paper %s", paper_id)
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    """Format an optional timestamp for storage"""
+    return value.isoformat() if value is not None else None
+
+
+def _fromisoformat(value: Optional[str]) -> Optional[datetime]:
+    """Parse an optional stored timestamp"""
+    return datetime.fromisoformat(value) if value else None
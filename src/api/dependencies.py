@@ -1,14 +1,21 @@
 from fastapi import Request
-from src.core.i18n.translator import translator
+from src.core.i18n.translator import parse_accept_language
 
 async def get_language(request: Request):
     """Get language setting from request"""
     # Get language preference from request header
     accept_language = request.headers.get('Accept-Language', 'en')
     # Extract first language code (e.g. 'en-US,en;q=0.9' -> 'en')
-    language = accept_language.split(',')[0].split(';')[0].split('-')[0]
-    translator.set_language(language)
-    return language
+    # language_middleware has already applied it to this request's context
+    return parse_accept_language(accept_language)
+
+def get_orchestrator(request: Request):
+    """Get the orchestrator created by the app lifespan"""
+    return request.app.state.orchestrator
+
+def get_data_service(request: Request):
+    """Get the data ingestion service shared with the orchestrator's tasks"""
+    return request.app.state.orchestrator.data_ingestion_service
 
 # Language dependency
 LanguageDependency = get_language
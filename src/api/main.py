@@ -1,13 +1,32 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 import uvicorn
 from src.api.routes import data_routes, paper_routes, user_routes, extensions_routes
-from src.core.i18n.translator import translator
+from src.api.responses import FastJSONResponse
+from src.core.i18n.translator import translator, parse_accept_language
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared services once per process and run the orchestrator while serving"""
+    from src.agents.orchestrator.orchestrator import OrchestratorAgent
+    
+    orchestrator = OrchestratorAgent()
+    app.state.orchestrator = orchestrator
+    monitoring = asyncio.create_task(orchestrator.start_monitoring())
+    try:
+        yield
+    finally:
+        orchestrator.stop_monitoring()
+        await asyncio.gather(monitoring, return_exceptions=True)
 
 # Create FastAPI app
 app = FastAPI(
     title="4D-Paper API",
     description="API for Dynamic 4D Academic Paper System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Language middleware
@@ -16,7 +35,7 @@ async def language_middleware(request: Request, call_next):
     """Language detection middleware"""
     # Get language from request header
     accept_language = request.headers.get('Accept-Language', 'en')
-    language = accept_language.split(',')[0].split(';')[0].split('-')[0]
+    language = parse_accept_language(accept_language)
     translator.set_language(language)
     
     # Continue processing request
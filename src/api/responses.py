@@ -0,0 +1,15 @@
+from typing import Any
+from fastapi.responses import Response
+from src.core.utils.file_utils import json_dumps
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with the shared orjson-backed serializer
+    
+    Numpy values and datetimes are serialized directly; routes returning an
+    instance (rather than a dict) also skip FastAPI's jsonable_encoder pass.
+    """
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
@@ -1,13 +1,24 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+import asyncio
+import shutil
+from typing import BinaryIO
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from datetime import datetime
-from src.agents.data_management.data_ingestion import DataIngestionService
-from src.core.models.data_model import DataIngestionRequest
+from src.core.models.data_model import DataIngestionBatchRequest, DataIngestionRequest
+from src.api.dependencies import get_data_service, get_orchestrator
+from src.api.responses import FastJSONResponse
 
 router = APIRouter()
-data_service = DataIngestionService()
+
+# Uploads are copied to disk in chunks of this size instead of being read into memory
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+def _save_upload(source: BinaryIO, save_path: str):
+    """Copy an uploaded file to save_path in chunks"""
+    with open(save_path, "wb") as f:
+        shutil.copyfileobj(source, f, UPLOAD_CHUNK_SIZE)
 
 @router.post("/ingest")
-async def ingest_data(request: DataIngestionRequest):
+async def ingest_data(request: DataIngestionRequest, data_service=Depends(get_data_service)):
     """
     Ingest 4D research data
     """
@@ -19,11 +30,29 @@ async def ingest_data(request: DataIngestionRequest):
             timestamp=datetime.utcnow(),
             space_coordinate=request.space_coordinate
         )
-        return {
+        # Results hold numpy values, which FastJSONResponse serializes without jsonable_encoder
+        return FastJSONResponse({
             "status": "success",
             "data": result,
             "duplication_check": result.get("duplication_check")
-        }
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/ingest/batch")
+async def ingest_data_batch(request: DataIngestionBatchRequest, data_service=Depends(get_data_service)):
+    """
+    Ingest several 4D research data files in one request
+    """
+    try:
+        results = await data_service.ingest_four_d_data_batch(request.items, timestamp=datetime.utcnow())
+        return FastJSONResponse({
+            "status": "success",
+            "data": results,
+            "count": len(results)
+        })
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -33,7 +62,8 @@ async def upload_data(
     user_id: str = "",
     paper_id: str = "",
     data_type: str = "tabular",
-    description: str = ""
+    description: str = "",
+    data_service=Depends(get_data_service)
 ):
     """
     Upload and ingest 4D data file
@@ -45,8 +75,7 @@ async def upload_data(
         
         # Save uploaded file
         save_path = f"./tmp/{file.filename}"
-        with open(save_path, "wb") as f:
-            f.write(await file.read())
+        await asyncio.to_thread(_save_upload, file.file, save_path)
         
         # Ingest the data
         result = await data_service.ingest_four_d_data(
@@ -57,71 +86,69 @@ async def upload_data(
             space_coordinate=None
         )
         
-        return {
+        return FastJSONResponse({
             "status": "success",
             "message": f"File {file.filename} uploaded and ingested successfully",
             "data": result,
             "duplication_check": result.get("duplication_check")
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{data_id}")
-async def get_data(data_id: str, user_id: str):
+async def get_data(data_id: str, user_id: str, data_service=Depends(get_data_service)):
     """
     Get 4D data by ID
     """
     try:
-        from src.agents.data_management.four_d_data_handler import FourDDataHandler
-        from src.core.security.encryption import derive_encryption_key
-        
-        handler = FourDDataHandler()
-        # Use default key (in production, use user-specific key)
-        key, _ = derive_encryption_key("default-encryption-key-change-in-production")
-        
-        data = handler.load_four_d_data(
+        # Use the shared ingestion service's handler and default key (in production, use user-specific key);
+        # the orchestrator's tasks and these routes share one service, so the key is the one uploads were encrypted with
+        data = data_service.four_d_handler.load_four_d_data(
             data_id=data_id,
-            encryption_key=key
+            encryption_key=data_service.default_key
         )
         
-        return {
+        return FastJSONResponse({
             "status": "success",
             "data": data
-        }
+        })
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Data {data_id} not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/deduplicate")
-async def trigger_deduplication(user_id: str, data_ids: list = None):
+async def trigger_deduplication(user_id: str, data_ids: list = None, orchestrator=Depends(get_orchestrator)):
     """
     Trigger manual data deduplication
     
     Args:
         user_id: User ID
         data_ids: Optional list of data IDs to check (None for all data)
+        orchestrator: Shared orchestrator agent (injected)
         
     Returns:
         Task submission result
     """
     try:
-        from src.agents.orchestrator.orchestrator import OrchestratorAgent
-        
-        orchestrator = OrchestratorAgent()
         task = {
             "task_type": "deduplication",
             "user_id": user_id,
             "data_ids": data_ids
         }
         
-        orchestrator.submit_task(task)
+        try:
+            orchestrator.try_submit_task(task)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Task queue is full, please retry later")
         
         return {
             "status": "success",
             "message": "Deduplication task submitted successfully",
             "task_id": task.get("task_id")
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,5 +1,9 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+import asyncio
 import os
+import shutil
 import tempfile
 from src.extensions.format_converter import FormatConverter
 from src.extensions.latex_template import LaTeXTemplate
@@ -10,6 +14,16 @@ format_converter = FormatConverter()
 latex_template = LaTeXTemplate()
 tools_utils = ToolsUtils()
 
+# Uploads are copied to disk in chunks of this size instead of being read into memory
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+def _remove_file(path: str):
+    """Remove a temporary file if it still exists"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
 @router.post("/convert")
 async def convert_data(
     input_file: UploadFile = File(...),
@@ -23,14 +37,15 @@ async def convert_data(
         output_format: Target output format
         
     Returns:
-        Conversion result
+        The converted file
     """
+    temp_input_path = None
+    temp_output_path = None
     try:
         # Save uploaded file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(input_file.filename)[1]) as temp_file:
-            content = await input_file.read()
-            temp_file.write(content)
             temp_input_path = temp_file.name
+            await asyncio.to_thread(shutil.copyfileobj, input_file.file, temp_file, UPLOAD_CHUNK_SIZE)
         
         # Determine output file path
         output_ext = {
@@ -46,22 +61,30 @@ async def convert_data(
         temp_output_path = f"{temp_input_path}_output{output_ext}"
         
         # Convert file
-        result = format_converter.convert_data(
+        await asyncio.to_thread(
+            format_converter.convert_data,
             input_path=temp_input_path,
             output_path=temp_output_path,
             output_format=output_format
         )
         
-        # Clean up temporary files
-        if os.path.exists(temp_input_path):
-            os.unlink(temp_input_path)
-        if os.path.exists(temp_output_path):
-            os.unlink(temp_output_path)
-        
-        return result
+        # Send the converted file; it is removed once the response has been sent
+        output_filename = f"{os.path.splitext(input_file.filename)[0]}{output_ext}"
+        response = FileResponse(
+            temp_output_path,
+            filename=output_filename,
+            background=BackgroundTask(_remove_file, temp_output_path)
+        )
+        temp_output_path = None
+        return response
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Clean up temporary files
+        for path in (temp_input_path, temp_output_path):
+            if path:
+                _remove_file(path)
 
 @router.post("/latex/generate")
 async def generate_latex(
@@ -111,7 +134,8 @@ async def generate_latex(
             temp_output_path = temp_file.name
         
         # Generate LaTeX
-        result = latex_template.generate_latex(
+        result = await asyncio.to_thread(
+            latex_template.generate_latex,
             template_name=template_name,
             output_path=temp_output_path,
             context=context
@@ -159,12 +183,11 @@ async def compile_latex(
     try:
         # Save uploaded file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=".tex") as temp_file:
-            content = await latex_file.read()
-            temp_file.write(content)
+            await asyncio.to_thread(shutil.copyfileobj, latex_file.file, temp_file, UPLOAD_CHUNK_SIZE)
             temp_latex_path = temp_file.name
         
-        # Compile LaTeX
-        result = tools_utils.compile_latex(temp_latex_path)
+        # Compile LaTeX (pdflatex can run for up to a minute; keep it off the event loop)
+        result = await asyncio.to_thread(tools_utils.compile_latex, temp_latex_path)
         
         # Clean up temporary files
         if os.path.exists(temp_latex_path):
@@ -193,15 +216,14 @@ async def run_script(
     try:
         # Save uploaded file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=".py") as temp_file:
-            content = await script_file.read()
-            temp_file.write(content)
+            await asyncio.to_thread(shutil.copyfileobj, script_file.file, temp_file, UPLOAD_CHUNK_SIZE)
             temp_script_path = temp_file.name
         
         # Parse arguments
         script_args = args.split() if args else []
         
-        # Run script
-        result = tools_utils.run_python_script(temp_script_path, script_args)
+        # Run script (up to five minutes; keep it off the event loop)
+        result = await asyncio.to_thread(tools_utils.run_python_script, temp_script_path, script_args)
         
         # Clean up temporary files
         if os.path.exists(temp_script_path):
@@ -1,49 +1,52 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
 from datetime import timedelta
-from jose import JWTError, jwt
 from src.core.security.auth import (
     create_access_token, 
     verify_token,
+    get_token_user_id,
     authenticate_user,
-    SECRET_KEY,
-    ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from src.core.models.user_model import User, Token, TokenData
+from src.core.models.user_model import User, Token
 from src.core.security.hash_utils import hash_password
+from src.storage.user_db import UserDB
 
 router = APIRouter()
+user_db = UserDB()
 
-# Fake user database (replace with real DB in production)
-fake_users_db = {
-    "user1": User(
-        user_id="user1",
-        username="researcher1",
-        email="researcher1@example.com",
-        hashed_password=hash_password("password123"),
-        full_name="Researcher One",
-        is_active=True,
-        is_admin=False,
-        papers=["paper001", "paper002"]
-    ),
-    "admin": User(
-        user_id="admin",
-        username="admin",
-        email="admin@example.com",
-        hashed_password=hash_password("admin123"),
-        full_name="System Admin",
-        is_active=True,
-        is_admin=True,
-        papers=[]
-    )
-}
+# Demo accounts, created the first time the user store is opened
+if user_db.count() == 0:
+    user_db.add_many([
+        User(
+            user_id="user1",
+            username="researcher1",
+            email="researcher1@example.com",
+            hashed_password=hash_password("password123"),
+            full_name="Researcher One",
+            is_active=True,
+            is_admin=False,
+            papers=["paper001", "paper002"]
+        ),
+        User(
+            user_id="admin",
+            username="admin",
+            email="admin@example.com",
+            hashed_password=hash_password("admin123"),
+            full_name="System Admin",
+            is_active=True,
+            is_admin=True,
+            papers=[]
+        )
+    ])
 
 @router.post("/login", response_model=Token)
 async def login(user_id: str, password: str):
     """
     User login to get access token
     """
-    user = authenticate_user(fake_users_db, user_id, password)
+    # Password hashing is deliberately slow; keep it off the event loop
+    user = await asyncio.to_thread(authenticate_user, user_db, user_id, password)
     if not user:
         raise HTTPException(
             status_code=401,
@@ -64,23 +67,16 @@ async def read_users_me(token: str = Depends(verify_token)):
     """
     Get current user info (requires valid token)
     """
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = TokenData(user_id=user_id)
-    except JWTError:
-        raise credentials_exception
+    # verify_token has just cached the verified subject, so this does not decode again
+    user_id = get_token_user_id(token)
     
-    user = fake_users_db.get(token_data.user_id)
+    user = await asyncio.to_thread(user_db.get, user_id)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=401,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return user
 
@@ -95,7 +91,8 @@ async def register_user(
     """
     Register new user (simplified)
     """
-    if user_id in fake_users_db:
+    # Cheap check first so taken IDs do not pay for password hashing
+    if await asyncio.to_thread(user_db.exists, user_id):
         raise HTTPException(
             status_code=400,
             detail="User ID already exists"
@@ -106,15 +103,19 @@ async def register_user(
         user_id=user_id,
         username=username,
         email=email,
-        hashed_password=hash_password(password),
+        hashed_password=await asyncio.to_thread(hash_password, password),
         full_name=full_name,
         is_active=True,
         is_admin=False,
         papers=[]
     )
     
-    # Add to fake DB
-    fake_users_db[user_id] = new_user
+    # The insert is the authoritative check if another registration raced this one
+    if not await asyncio.to_thread(user_db.add, new_user):
+        raise HTTPException(
+            status_code=400,
+            detail="User ID already exists"
+        )
     
     return {
         "status": "success",
@@ -1,12 +1,29 @@
+import functools
 import gettext
 import os
+from contextvars import ContextVar
 from typing import Optional
 
+# Language of the current request; each asyncio task / thread context has its own value
+_current_language: ContextVar[str] = ContextVar('language', default='en')
+
+# Distinct Accept-Language headers remembered by parse_accept_language
+ACCEPT_LANGUAGE_CACHE_SIZE = 256
+
+# (language, message) translations remembered per Translator
+TRANSLATION_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=ACCEPT_LANGUAGE_CACHE_SIZE)
+def parse_accept_language(accept_language: str) -> str:
+    """Extract the first language code from an Accept-Language header (e.g. 'en-US,en;q=0.9' -> 'en')"""
+    return accept_language.split(',', 1)[0].split(';', 1)[0].split('-', 1)[0]
+
 class Translator:
     def __init__(self):
         self.locales_dir = os.path.join(os.path.dirname(__file__), 'locales')
         self.translators = {}
-        self.current_language = 'en'
+        # Keyed by language as well, so switching language needs no invalidation
+        self._cached_gettext = functools.lru_cache(maxsize=TRANSLATION_CACHE_SIZE)(self._translate)
         self._ensure_locales_dir()
         self._load_default_languages()
     
@@ -28,27 +45,40 @@ class Translator:
                 if os.path.exists(lang_dir):
                     translator = gettext.translation('messages', self.locales_dir, [language])
                     self.translators[language] = translator
-                    return True
                 else:
                     # If language files don't exist, create a basic translator
                     self.translators[language] = gettext.NullTranslations()
-                    return True
+                # Drop untranslated results cached before this language was loaded
+                self._cached_gettext.cache_clear()
+                return True
             except Exception as e:
                 print(f"Error loading language {language}: {e}")
                 return False
         return True
     
+    @property
+    def current_language(self) -> str:
+        """Language of the current context"""
+        return _current_language.get()
+    
     def set_language(self, language: str) -> bool:
-        """Set current language"""
+        """Set current language (for the current request context only)"""
+        if language == _current_language.get():
+            return True
         if self.load_language(language):
-            self.current_language = language
+            _current_language.set(language)
             return True
         return False
     
     def gettext(self, message: str) -> str:
         """Translate text"""
-        if self.current_language in self.translators:
-            return self.translators[self.current_language].gettext(message)
+        return self._cached_gettext(_current_language.get(), message)
+    
+    def _translate(self, language: str, message: str) -> str:
+        """Translate text into the given language (uncached)"""
+        translation = self.translators.get(language)
+        if translation is not None:
+            return translation.gettext(message)
         return message
 
 # Global translation instance
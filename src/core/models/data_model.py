@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
 from src.core.models.paper_model import SpaceCoordinate
 
@@ -12,6 +12,10 @@ class DataIngestionRequest(BaseModel):
     description: Optional[str] = ""
     space_coordinate: Optional[SpaceCoordinate] = None
 
+class DataIngestionBatchRequest(BaseModel):
+    """Request model for ingesting several data files at once"""
+    items: List[DataIngestionRequest] = Field(min_length=1)
+
 class DataIngestionResponse(BaseModel):
     """Response model for data ingestion"""
     data_id: str
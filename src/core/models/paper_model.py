@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Union
 from pydantic import BaseModel, Field
 import hashlib
 
@@ -43,9 +43,16 @@ class DynamicPaper(BaseModel):
     access_permissions: Dict[str, str] = Field(default={}, description="Permissions: user_id -> permission level (read/write/admin)")
     long_term_tracking: bool = Field(default=True, description="Enable long-term (10k+ years) tracking")
 
-    def generate_paper_hash(self, version_content: str) -> str:
-        """Generate SHA-256 hash for paper content to prevent tampering"""
-        return hashlib.sha256(version_content.encode("utf-8")).hexdigest()
+    def generate_paper_hash(self, version_content: Union[str, bytes, bytearray, memoryview]) -> str:
+        """
+        Generate SHA-256 hash for paper content to prevent tampering
+        
+        Text is hashed as UTF-8; already-encoded content (including mmap'ed files)
+        is hashed in place without a copy, giving the same digest.
+        """
+        if isinstance(version_content, str):
+            version_content = version_content.encode("utf-8")
+        return hashlib.sha256(version_content).hexdigest()
 
     def add_new_version(self, version: PaperVersion):
         """Add new version (enforces sequential version numbering)"""
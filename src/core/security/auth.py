@@ -1,6 +1,10 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
+from typing import Optional, Tuple
+from jose import JWTError, jwk, jwt
 from fastapi import HTTPException
 from src.core.models.user_model import TokenData
 from src.core.security.hash_utils import verify_password
@@ -10,6 +14,21 @@ SECRET_KEY = "your-secret-key-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Built once: passing a key object spares python-jose from re-parsing the secret
+# (a JSON attempt plus key construction) on every decode
+_VERIFY_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
+_JWT_ALGORITHMS = (ALGORITHM,)
+_JWT_OPTIONS = {"require_exp": True, "require_sub": True}
+
+# Recently verified tokens are trusted for this many seconds (bounding how long a
+# revoked key or token keeps working) without decoding them again
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 5.0
+
+# SHA-256 of token -> (user_id, valid until as Unix time), least recently used first
+_token_cache: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     Create JWT access token
@@ -38,39 +57,70 @@ def verify_token(token: str):
         token: JWT token
         
     Returns:
-        TokenData object
+        The token, once verified
+        
+    Raises:
+        HTTPException: If token is invalid
+    """
+    get_token_user_id(token)
+    return token
+
+def get_token_user_id(token: str) -> str:
+    """
+    Verify JWT token and get the user ID it was issued to
+    
+    Args:
+        token: JWT token
+        
+    Returns:
+        User ID (the token's subject)
         
     Raises:
         HTTPException: If token is invalid
     """
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    # Keyed by digest so the cache does not hold usable tokens
+    cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(cache_key)
+        if cached is not None:
+            if now < cached[1]:
+                _token_cache.move_to_end(cache_key)
+                return cached[0]
+            del _token_cache[cache_key]
+    
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = TokenData(user_id=user_id)
-        return token
+        payload = jwt.decode(token, _VERIFY_KEY, algorithms=_JWT_ALGORITHMS, options=_JWT_OPTIONS)
     except JWTError:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=401,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token_data = TokenData(user_id=payload["sub"])
+    
+    # Never trust a cached token past its own expiry
+    valid_until = min(now + TOKEN_CACHE_TTL, payload["exp"])
+    with _token_cache_lock:
+        _token_cache[cache_key] = (token_data.user_id, valid_until)
+        _token_cache.move_to_end(cache_key)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return token_data.user_id
 
-def authenticate_user(fake_db, user_id: str, password: str):
+def authenticate_user(user_db, user_id: str, password: str):
     """
-    Authenticate user (mock implementation)
+    Authenticate user
     
     Args:
-        fake_db: User database
+        user_db: User store (UserDB or any mapping of user ID to User)
         user_id: User ID
         password: Password
         
     Returns:
         User object if authenticated, False otherwise
     """
-    user = fake_db.get(user_id)
+    user = user_db.get(user_id)
     if not user:
         return False
     if not verify_password(password, user.hashed_password):
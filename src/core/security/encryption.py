@@ -1,8 +1,24 @@
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from typing import BinaryIO, Iterable, Iterator
 import base64
 import os
+import struct
+
+# Streaming format: STREAM_MAGIC | nonce prefix | records of (length, AES-GCM ciphertext)
+STREAM_MAGIC = b"4DPSTRM1"
+STREAM_CHUNK_SIZE = 4 << 20
+_NONCE_PREFIX_SIZE = 8
+_RECORD_LENGTH = struct.Struct(">I")
+_MAX_CHUNKS = 1 << 32
+
+# Single-shot format: SEALED_MAGIC | 96-bit nonce | AES-GCM ciphertext and tag
+SEALED_MAGIC = b"4DPAGCM1"
+_NONCE_SIZE = 12
 
 def derive_encryption_key(password: str, salt: bytes = None) -> tuple[bytes, bytes]:
     """
@@ -37,13 +53,15 @@ def encrypt_content(content: bytes, key: bytes) -> bytes:
     Returns:
         Encrypted bytes with authentication tag
     """
-    f = Fernet(key)
-    return f.encrypt(content)
+    nonce = os.urandom(_NONCE_SIZE)
+    return SEALED_MAGIC + nonce + _content_cipher(key).encrypt(nonce, content, SEALED_MAGIC)
 
 def decrypt_content(encrypted_content: bytes, key: bytes) -> bytes:
     """
     Decrypt content and verify integrity
     
+    Content encrypted before the switch to AES-GCM (Fernet tokens) is still accepted.
+    
     Args:
         encrypted_content: Encrypted bytes from encrypt_content
         key: Decryption key (same as encryption key)
@@ -54,8 +72,127 @@ def decrypt_content(encrypted_content: bytes, key: bytes) -> bytes:
     Raises:
         ValueError: If decryption fails (bad key or tampered content)
     """
-    f = Fernet(key)
     try:
-        return f.decrypt(encrypted_content)
+        if encrypted_content[:len(SEALED_MAGIC)] == SEALED_MAGIC:
+            nonce = encrypted_content[len(SEALED_MAGIC):len(SEALED_MAGIC) + _NONCE_SIZE]
+            return _content_cipher(key).decrypt(nonce, encrypted_content[len(SEALED_MAGIC) + _NONCE_SIZE:], SEALED_MAGIC)
+        return Fernet(key).decrypt(encrypted_content)
     except Exception as e:
-        raise ValueError("Decryption failed: invalid key or tampered content") from e
\ No newline at end of file
+        raise ValueError("Decryption failed: invalid key or tampered content") from e
+
+def is_stream_encrypted(header: bytes) -> bool:
+    """
+    Check whether data starts with the streaming encryption header
+    
+    Args:
+        header: Leading bytes of the encrypted data
+        
+    Returns:
+        True if the data was produced by encrypt_stream
+    """
+    return header[:len(STREAM_MAGIC)] == STREAM_MAGIC
+
+def encrypt_stream(chunks: Iterable[bytes], key: bytes) -> Iterator[bytes]:
+    """
+    Encrypt a sequence of plaintext chunks using chunked AES-256-GCM
+    
+    Every chunk is sealed separately with its own nonce; the chunk index and
+    a final-chunk flag are authenticated so that reordered, dropped or
+    truncated chunks fail decryption.
+    
+    Args:
+        chunks: Plaintext chunks (at most STREAM_CHUNK_SIZE bytes recommended)
+        key: Encryption key from derive_encryption_key
+        
+    Returns:
+        Iterator of encrypted byte strings to be written in order
+    """
+    cipher = _stream_cipher(key)
+    nonce_prefix = os.urandom(_NONCE_PREFIX_SIZE)
+    yield STREAM_MAGIC + nonce_prefix
+    
+    chunks = iter(chunks)
+    index = 0
+    current = next(chunks, b"")
+    # Look one chunk ahead so the last one can be flagged as final
+    for upcoming in chunks:
+        yield from _seal_chunk(cipher, nonce_prefix, index, current, final=False)
+        current = upcoming
+        index += 1
+    yield from _seal_chunk(cipher, nonce_prefix, index, current, final=True)
+
+def decrypt_stream(stream: BinaryIO, key: bytes) -> Iterator[bytes]:
+    """
+    Decrypt data produced by encrypt_stream, one chunk at a time
+    
+    Args:
+        stream: Binary file object positioned at the start of the encrypted data
+        key: Decryption key (same as encryption key)
+        
+    Returns:
+        Iterator of decrypted plaintext chunks
+        
+    Raises:
+        ValueError: If decryption fails (bad key, tampered or truncated content)
+    """
+    header = stream.read(len(STREAM_MAGIC) + _NONCE_PREFIX_SIZE)
+    if not is_stream_encrypted(header) or len(header) != len(STREAM_MAGIC) + _NONCE_PREFIX_SIZE:
+        raise ValueError("Decryption failed: not a stream-encrypted file")
+    cipher = _stream_cipher(key)
+    nonce_prefix = header[len(STREAM_MAGIC):]
+    
+    index = 0
+    current = _read_record(stream)
+    if current is None:
+        raise ValueError("Decryption failed: invalid key or tampered content")
+    while current is not None:
+        upcoming = _read_record(stream)
+        try:
+            yield cipher.decrypt(
+                _chunk_nonce(nonce_prefix, index),
+                current,
+                _chunk_aad(index, final=upcoming is None)
+            )
+        except InvalidTag as e:
+            raise ValueError("Decryption failed: invalid key or tampered content") from e
+        current = upcoming
+        index += 1
+
+def _content_cipher(key: bytes) -> AESGCM:
+    """Derive a dedicated AES-256-GCM key for single-shot encryption from a Fernet-style key"""
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"4d-paper content encryption v1")
+    return AESGCM(hkdf.derive(base64.urlsafe_b64decode(key)))
+
+def _stream_cipher(key: bytes) -> AESGCM:
+    """Derive a dedicated AES-256-GCM key for streaming from a Fernet-style key"""
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"4d-paper stream encryption v1")
+    return AESGCM(hkdf.derive(base64.urlsafe_b64decode(key)))
+
+def _chunk_nonce(nonce_prefix: bytes, index: int) -> bytes:
+    """Build the 96-bit nonce for a chunk"""
+    return nonce_prefix + index.to_bytes(4, "big")
+
+def _chunk_aad(index: int, final: bool) -> bytes:
+    """Build the associated data binding a chunk to its position"""
+    return STREAM_MAGIC + struct.pack(">I?", index, final)
+
+def _seal_chunk(cipher: AESGCM, nonce_prefix: bytes, index: int, chunk: bytes, final: bool) -> Iterator[bytes]:
+    """Encrypt a single chunk and yield its length-prefixed record"""
+    if index >= _MAX_CHUNKS:
+        raise ValueError("Too many chunks for a single encrypted stream")
+    sealed = cipher.encrypt(_chunk_nonce(nonce_prefix, index), chunk, _chunk_aad(index, final))
+    yield _RECORD_LENGTH.pack(len(sealed))
+    yield sealed
+
+def _read_record(stream: BinaryIO):
+    """Read one length-prefixed record, or None at end of stream"""
+    prefix = stream.read(_RECORD_LENGTH.size)
+    if not prefix:
+        return None
+    if len(prefix) != _RECORD_LENGTH.size:
+        raise ValueError("Decryption failed: truncated content")
+    (length,) = _RECORD_LENGTH.unpack(prefix)
+    record = stream.read(length)
+    if len(record) != length:
+        raise ValueError("Decryption failed: truncated content")
+    return record
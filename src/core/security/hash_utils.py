@@ -1,42 +1,167 @@
 import hashlib
-from typing import Any
+import hmac
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List
+import h5py
+import numpy as np
+import pandas as pd
+
+# Slice size when hashing large buffers, small enough to stay in cache
+HASH_BLOCK_BYTES = 1 << 20
+
+# Read size when streaming HDF5 datasets into a hash
+HASH_READ_BLOCK_BYTES = 16 << 20
+
+# Threads used by hash_many; hashlib releases the GIL while hashing large buffers
+HASH_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# Password hashing: scrypt with 16 MiB of memory per hash (~50 ms), a per-password salt
+PASSWORD_SCRYPT_N = 1 << 14
+PASSWORD_SCRYPT_R = 8
+PASSWORD_SCRYPT_P = 1
+PASSWORD_SCRYPT_MAXMEM = 64 << 20
+PASSWORD_SALT_BYTES = 16
+PASSWORD_KEY_BYTES = 32
 
 def calculate_data_hash(data: Any) -> str:
     """
     Calculate SHA-256 hash of any data type
     
+    Buffer-protocol objects (numpy arrays, bytearray, array.array, ...) are
+    hashed zero-copy through their memory in HASH_BLOCK_BYTES slices, dicts by
+    sorted key, DataFrames column by column and HDF5 datasets in slabs read
+    from disk; other types fall back to their string representation. Raw
+    bytes hash the same whether passed as bytes, bytearray, a byte memoryview
+    or an mmap of a file.
+    
     Args:
-        data: Data to hash (str, bytes, dict, list, etc.)
+        data: Data to hash (str, bytes, memoryview, mmap, dict, array, DataFrame, HDF5 dataset, etc.)
         
     Returns:
         Hexadecimal SHA-256 hash string
     """
+    h = hashlib.sha256()
+    _update_hash(h, data)
+    return h.hexdigest()
+
+def hash_many(blobs: Iterable[Any], hash_func: Callable[[Any], str] = calculate_data_hash) -> List[str]:
+    """
+    Hash a batch of payloads in parallel threads
+    
+    Args:
+        blobs: Data to hash (anything hash_func accepts)
+        hash_func: Function returning the hex digest of one payload
+        
+    Returns:
+        Hex digests, in the order of blobs
+    """
+    blobs = list(blobs)
+    if len(blobs) <= 1:
+        return [hash_func(blob) for blob in blobs]
+    with ThreadPoolExecutor(max_workers=min(HASH_MAX_WORKERS, len(blobs))) as executor:
+        return list(executor.map(hash_func, blobs))
+
+def _update_hash(h: "hashlib._Hash", data: Any):
+    """Feed one value into a running SHA-256"""
     if isinstance(data, str):
-        data_bytes = data.encode("utf-8")
-    elif isinstance(data, bytes):
-        data_bytes = data
-    else:
-        # Convert complex types to string representation
-        data_bytes = str(data).encode("utf-8")
+        h.update(data.encode("utf-8"))
+        return
+    if isinstance(data, dict):
+        for key in sorted(data, key=str):
+            h.update(f"{key}\x1f".encode("utf-8"))
+            _update_hash(h, data[key])
+        return
+    if isinstance(data, pd.DataFrame):
+        h.update(repr(list(data.columns)).encode("utf-8"))
+        for _, column in data.items():
+            _update_hash(h, column.to_numpy())
+        return
+    if isinstance(data, h5py.Dataset):
+        _update_hash_hdf5(h, data)
+        return
+    if isinstance(data, np.ndarray):
+        # Covers dtypes the buffer protocol rejects (datetime64) and object arrays
+        h.update(f"{data.dtype.str}{data.shape}".encode("utf-8"))
+        _update_hash_elements(h, data)
+        return
     
-    return hashlib.sha256(data_bytes).hexdigest()
+    try:
+        view = memoryview(data)
+    except TypeError:
+        view = None
+    if view is None or "O" in view.format:
+        # Convert complex types (and object buffers, which hold pointers) to string representation
+        h.update(str(data).encode("utf-8"))
+        return
+    if not _is_raw_bytes(data, view):
+        # Typed buffers: same bytes with a different layout must not collide
+        h.update(f"{view.format}{view.shape}".encode("utf-8"))
+    flat = _flat_bytes(view)
+    for start in range(0, flat.nbytes, HASH_BLOCK_BYTES):
+        h.update(flat[start:start + HASH_BLOCK_BYTES])
+
+def _update_hash_hdf5(h: "hashlib._Hash", dataset: h5py.Dataset):
+    """Feed an HDF5 dataset into a running SHA-256 as if it were loaded into memory"""
+    h.update(f"{dataset.dtype.str}{dataset.shape}".encode("utf-8"))
+    if dataset.shape == () or dataset.size == 0:
+        _update_hash_elements(h, np.asarray(dataset[()]))
+        return
+    row_bytes = max(1, dataset.dtype.itemsize * (dataset.size // dataset.shape[0]))
+    rows = max(1, HASH_READ_BLOCK_BYTES // row_bytes)
+    for start in range(0, dataset.shape[0], rows):
+        _update_hash_elements(h, dataset[start:start + rows])
+
+def _update_hash_elements(h: "hashlib._Hash", arr: np.ndarray):
+    """Feed array elements into a running SHA-256 in C order"""
+    if arr.dtype.hasobject:
+        # Object buffers hold pointers, and str() elides large arrays; hash each element
+        for item in arr.flat:
+            h.update(repr(item).encode("utf-8"))
+            h.update(b"\x1f")
+        return
+    flat = np.ascontiguousarray(arr).reshape(-1).view(np.uint8)
+    for start in range(0, flat.nbytes, HASH_BLOCK_BYTES):
+        h.update(flat[start:start + HASH_BLOCK_BYTES])
+
+def _is_raw_bytes(data: Any, view: memoryview) -> bool:
+    """Whether a buffer is plain bytes rather than typed elements (arrays etc.)"""
+    if isinstance(data, (bytes, bytearray, mmap.mmap)):
+        return True
+    return isinstance(data, memoryview) and view.format == "B" and view.ndim == 1
+
+def _flat_bytes(view: memoryview) -> memoryview:
+    """Flat byte view of a buffer, copying only if it is not C-contiguous"""
+    if view.nbytes == 0:
+        return memoryview(b"")
+    if not view.c_contiguous:
+        return memoryview(view.tobytes())
+    return view.cast("B")
 
 def hash_password(password: str) -> str:
     """
-    Hash password using SHA-256 (for user authentication)
+    Hash password with salted scrypt (for user authentication)
+    
+    The result records its parameters and salt: "scrypt$n$r$p$salt$hash" (hex).
     
     Args:
         password: Plain text password
         
     Returns:
-        Hexadecimal hash string
+        Encoded password hash
     """
-    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+    salt = os.urandom(PASSWORD_SALT_BYTES)
+    key = _scrypt(password, salt, PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+    return f"scrypt${PASSWORD_SCRYPT_N}${PASSWORD_SCRYPT_R}${PASSWORD_SCRYPT_P}${salt.hex()}${key.hex()}"
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify password against hash
     
+    Hashes from hash_password are checked with their recorded scrypt parameters;
+    bare SHA-256 hex digests stored before salted hashing are still accepted.
+    
     Args:
         plain_password: Plain text password
         hashed_password: Hashed password
@@ -44,4 +169,48 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    return hash_password(plain_password) == hashed_password
\ No newline at end of file
+    if not hashed_password.startswith("scrypt$"):
+        # Constant-time, like the scrypt path: == stops at the first differing character
+        legacy_hash = hashlib.sha256(plain_password.encode("utf-8")).hexdigest()
+        return hmac.compare_digest(legacy_hash.encode("ascii"), hashed_password.encode("utf-8"))
+    
+    try:
+        _, n, r, p, salt, key = hashed_password.split("$")
+        expected = bytes.fromhex(key)
+        actual = _scrypt(plain_password, bytes.fromhex(salt), int(n), int(r), int(p), len(expected))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int, dklen: int = PASSWORD_KEY_BYTES) -> bytes:
+    """Derive a password key with scrypt (memory use is 128 * n * r bytes)"""
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p, dklen=dklen, maxmem=PASSWORD_SCRYPT_MAXMEM
+    )
+
+def calculate_hmac(data: bytes, key: bytes) -> str:
+    """
+    Calculate HMAC-SHA256 tag of data
+    
+    Args:
+        data: Data to authenticate
+        key: Secret key
+        
+    Returns:
+        Hexadecimal HMAC tag
+    """
+    return hmac.new(key, data, hashlib.sha256).hexdigest()
+
+def verify_hmac(data: bytes, key: bytes, tag: str) -> bool:
+    """
+    Verify HMAC-SHA256 tag of data in constant time
+    
+    Args:
+        data: Authenticated data
+        key: Secret key
+        tag: Expected hexadecimal HMAC tag
+        
+    Returns:
+        True if tag matches, False otherwise
+    """
+    return hmac.compare_digest(calculate_hmac(data, key), tag)
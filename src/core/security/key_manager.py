@@ -1,8 +1,8 @@
 import os
-import json
 from typing import Optional, Dict
 import logging
 from src.core.security.encryption import derive_encryption_key
+from src.core.utils.file_utils import read_json, write_json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,18 +21,16 @@ class KeyManager:
         """
         Load user keys from storage
         """
-        if os.path.exists(self.keys_file):
-            with open(self.keys_file, "r", encoding="utf-8") as f:
-                self.keys = json.load(f)
-        else:
+        try:
+            self.keys = read_json(self.keys_file)
+        except FileNotFoundError:
             self.keys = {}
     
     def _save_keys(self):
         """
         Save user keys to storage
         """
-        with open(self.keys_file, "w", encoding="utf-8") as f:
-            json.dump(self.keys, f, indent=2)
+        write_json(self.keys_file, self.keys, indent=False)
     
     def get_user_key(self, user_id: str, password: str) -> bytes:
         """
@@ -0,0 +1,163 @@
+import contextlib
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_dumps(data: Any, indent: bool = False) -> bytes:
+    """
+    Serialize data to JSON bytes (uses orjson when available)
+
+    Datetimes are written in ISO format, numpy arrays as lists, and any
+    other unsupported type as its str().
+
+    Args:
+        data: JSON-serializable data
+        indent: Whether to pretty-print with 2-space indentation
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, default=str, option=option)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+def canonical_json(data: Any) -> bytes:
+    """
+    Serialize data to canonical JSON bytes for hashing
+
+    Keys are sorted and no whitespace is emitted, so equal data always gives
+    the same bytes regardless of dict insertion order or whether orjson is
+    installed (for str, int, bool, None, list and dict values).
+
+    Args:
+        data: JSON-serializable data
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _json_default(value: Any) -> Any:
+    """Fallback serializer matching orjson's handling of datetimes and numpy arrays"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def json_loads(data: bytes) -> Any:
+    """
+    Deserialize JSON bytes or string (uses orjson when available)
+
+    Args:
+        data: JSON document
+
+    Returns:
+        Deserialized data
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_json(path: str) -> Any:
+    """
+    Read JSON file
+
+    Args:
+        path: Path to JSON file
+
+    Returns:
+        Deserialized data
+    """
+    with open(path, "rb") as f:
+        return json_loads(f.read())
+
+
+@contextlib.contextmanager
+def atomic_open(path: str) -> Iterator[BinaryIO]:
+    """
+    Open a temporary file that atomically replaces path when the block succeeds
+
+    Readers see either the old or the new contents, never a partial file; on
+    error the temporary file is removed and path is left untouched.
+
+    Args:
+        path: Destination path
+
+    Returns:
+        Context manager yielding a binary file object
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+
+def write_json(path: str, data: Any, indent: bool = True):
+    """
+    Atomically write data to JSON file
+
+    Args:
+        path: Path to JSON file
+        data: JSON-serializable data
+        indent: Whether to pretty-print with 2-space indentation
+    """
+    with atomic_open(path) as f:
+        f.write(json_dumps(data, indent=indent))
+
+
+def write_jsonl(path: str, records: Iterable[Any]):
+    """
+    Atomically replace a JSON Lines file (one record per line)
+
+    Args:
+        path: Path to JSONL file
+        records: JSON-serializable records
+    """
+    with atomic_open(path) as f:
+        f.write(b"".join(json_dumps(record) + b"\n" for record in records))
+
+
+def append_jsonl(path: str, records: Iterable[Any]) -> int:
+    """
+    Append records to a JSON Lines file with a single write
+
+    Args:
+        path: Path to JSONL file
+        records: JSON-serializable records
+
+    Returns:
+        File offset of the first appended record
+    """
+    data = b"".join(json_dumps(record) + b"\n" for record in records)
+    with open(path, "a+b") as f:
+        offset = f.tell()
+        # Start a fresh line if a crash left the previous record partially written
+        if offset > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+                offset += 1
+        f.write(data)
+    return offset
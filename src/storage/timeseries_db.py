@@ -1,10 +1,12 @@
+import asyncio
 import os
-import json
+import threading
 import h5py
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import logging
 from src.core.models.paper_model import PaperVersion
+from src.core.utils.file_utils import json_loads
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +19,8 @@ class TimeSeriesDB:
         self.db_path = db_path
         self.hdf5_path = os.path.join(db_path, "paper_versions.h5")
         os.makedirs(db_path, exist_ok=True)
+        # Batches are written in worker threads; HDF5 allows one writer per file
+        self._write_lock = threading.Lock()
         
         # Initialize HDF5 database if not exists
         if not os.path.exists(self.hdf5_path):
@@ -40,40 +44,55 @@ class TimeSeriesDB:
             version: PaperVersion object
             timestamp: Timestamp of insertion
         """
-        # Convert version to serializable dict
-        version_dict = version.dict()
+        await self.insert_paper_versions([(paper_id, version, timestamp)])
+    
+    async def insert_paper_versions(self, entries: Sequence[Tuple[str, PaperVersion, datetime]]):
+        """
+        Insert a batch of paper versions, opening the HDF5 file once for all of them
         
-        # Convert datetime objects to ISO strings
-        for key, value in version_dict.items():
-            if isinstance(value, datetime):
-                version_dict[key] = value.isoformat()
+        Args:
+            entries: (paper_id, version, timestamp) tuples
+        """
+        if not entries:
+            return
+        
+        # HDF5 writes block, so they run off the event loop
+        await asyncio.to_thread(self._write_versions, entries)
+        logger.info(f"Inserted {len(entries)} paper version(s) into time-series DB")
+    
+    def _write_versions(self, entries: Sequence[Tuple[str, PaperVersion, datetime]]):
+        """Write a batch of versions, opening the HDF5 file once in append mode"""
+        with self._write_lock, h5py.File(self.hdf5_path, "a") as f:
+            for paper_id, version, timestamp in entries:
+                self._write_version(f, paper_id, version, timestamp)
+    
+    def _write_version(self, f: h5py.File, paper_id: str, version: PaperVersion, timestamp: datetime):
+        """Write one version dataset and its timestamp index entry into an open HDF5 file"""
+        # Serialize straight to JSON in pydantic-core (datetimes, including nested ones, as ISO strings)
+        version_json = version.model_dump_json()
         
         # Generate unique timestamp key (supports 10k+ years)
         ts_key = f"{timestamp.strftime('%Y%m%d_%H%M%S_%f')}_{version.version_number}"
         
-        # Open HDF5 file in append mode
-        with h5py.File(self.hdf5_path, "a") as f:
-            # Create paper group if not exists
-            if paper_id not in f["papers"]:
-                f["papers"].create_group(paper_id)
-            
-            # Create dataset for this version
-            paper_group = f[f"papers/{paper_id}"]
-            paper_group.create_dataset(
-                ts_key,
-                data=json.dumps(version_dict),
-                dtype=h5py.string_dtype(encoding='utf-8')
-            )
-            
-            # Also index by timestamp for time-range queries
-            year = timestamp.strftime("%Y")
-            if year not in f["timestamps"]:
-                f["timestamps"].create_group(year)
-            
-            year_group = f[f"timestamps/{year}"]
-            year_group.attrs[ts_key] = f"papers/{paper_id}/{ts_key}"
-        
-        logger.info(f"Inserted version {version.version_number} of paper {paper_id} into time-series DB")
+        # Create paper group if not exists
+        if paper_id not in f["papers"]:
+            f["papers"].create_group(paper_id)
+        
+        # Create dataset for this version
+        paper_group = f[f"papers/{paper_id}"]
+        paper_group.create_dataset(
+            ts_key,
+            data=version_json,
+            dtype=h5py.string_dtype(encoding='utf-8')
+        )
+        
+        # Also index by timestamp for time-range queries
+        year = timestamp.strftime("%Y")
+        if year not in f["timestamps"]:
+            f["timestamps"].create_group(year)
+        
+        year_group = f[f"timestamps/{year}"]
+        year_group.attrs[ts_key] = f"papers/{paper_id}/{ts_key}"
     
     async def get_versions_by_time_range(
         self,
@@ -111,7 +130,7 @@ class TimeSeriesDB:
                     # Check if timestamp is within range
                     if start_time <= version_ts <= end_time:
                         # Read version data
-                        version_data = json.loads(paper_group[ts_key][()])
+                        version_data = json_loads(paper_group[ts_key][()])
                         version_data["timestamp"] = version_ts.isoformat()
                         versions.append(version_data)
                 except Exception as e:
@@ -147,7 +166,7 @@ class TimeSeriesDB:
             for ts_key in paper_group.keys():
                 try:
                     # Read version data
-                    version_data = json.loads(paper_group[ts_key][()])
+                    version_data = json_loads(paper_group[ts_key][()])
                     versions.append(version_data)
                 except Exception as e:
                     logger.warning(f"Failed to read version {ts_key}: {str(e)}")
@@ -187,7 +206,7 @@ class TimeSeriesDB:
             for ts_key in paper_group.keys():
                 if ts_key.startswith(ts_pattern):
                     try:
-                        version_data = json.loads(paper_group[ts_key][()])
+                        version_data = json_loads(paper_group[ts_key][()])
                         return version_data
                     except Exception as e:
                         logger.warning(f"Failed to read version {ts_key}: {str(e)}")
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, Optional
+import logging
+from src.core.models.user_model import User
+from src.core.utils.file_utils import json_dumps, json_loads
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("UserDB")
+
+_USER_COLUMNS = "user_id, username, email, hashed_password, full_name, is_active, is_admin, created_at, papers"
+
+class UserDB:
+    """SQLite-backed user store with lookups by primary key"""
+
+    def __init__(self, db_path: str = "./storage/users"):
+        self.db_path = db_path
+        os.makedirs(db_path, exist_ok=True)
+        self.sqlite_path = os.path.join(db_path, "users.db")
+        # One connection per thread, reused across requests (the API calls in from
+        # asyncio's bounded worker pool), so lookups never pay for a connect
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                user_id TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                email TEXT NOT NULL,
+                hashed_password TEXT NOT NULL,
+                full_name TEXT,
+                is_active INTEGER NOT NULL,
+                is_admin INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                papers TEXT NOT NULL
+            )
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: each statement is its own durable transaction
+            conn = sqlite3.connect(self.sqlite_path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id: str) -> Optional[User]:
+        """
+        Get user by ID
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            User object or None if not found
+        """
+        row = self._connection().execute(
+            f"SELECT {_USER_COLUMNS} FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return User(
+            user_id=row[0],
+            username=row[1],
+            email=row[2],
+            hashed_password=row[3],
+            full_name=row[4],
+            is_active=bool(row[5]),
+            is_admin=bool(row[6]),
+            created_at=datetime.fromisoformat(row[7]),
+            papers=json_loads(row[8])
+        )
+
+    def exists(self, user_id: str) -> bool:
+        """
+        Check whether a user ID is taken
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            True if the user exists
+        """
+        return self._connection().execute(
+            "SELECT 1 FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone() is not None
+
+    def add(self, user: User) -> bool:
+        """
+        Add a new user
+
+        Args:
+            user: User object
+
+        Returns:
+            True if added, False if the user ID already exists
+        """
+        return self.add_many([user]) == 1
+
+    def add_many(self, users: Iterable[User]) -> int:
+        """
+        Add new users in one transaction, skipping IDs that already exist
+
+        Args:
+            users: User objects
+
+        Returns:
+            Number of users added
+        """
+        rows = [
+            (
+                user.user_id,
+                user.username,
+                user.email,
+                user.hashed_password,
+                user.full_name,
+                int(user.is_active),
+                int(user.is_admin),
+                user.created_at.isoformat(),
+                json_dumps(user.papers).decode("utf-8")
+            )
+            for user in users
+        ]
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN")
+            before = conn.total_changes
+            conn.executemany(f"INSERT OR IGNORE INTO users ({_USER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            added = conn.total_changes - before
+        logger.debug("Added %d of %d user(s)", added, len(rows))
+        return added
+
+    def count(self) -> int:
+        """Get the number of stored users"""
+        return self._connection().execute("SELECT COUNT(*) FROM users").fetchone()[0]
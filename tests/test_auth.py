@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from datetime import timedelta
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from src.core.security import auth
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake clock for the token cache, with a fresh cache and a count of JWT decodes"""
+    state = SimpleNamespace(now=1000.0, decodes=0)
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        state.decodes += 1
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth, "time", SimpleNamespace(time=lambda: state.now))
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    monkeypatch.setattr(auth, "_token_cache", OrderedDict())
+    return state
+
+
+def test_verified_token_is_cached_for_ttl(clock):
+    token = auth.create_access_token({"sub": "user1"})
+
+    assert auth.get_token_user_id(token) == "user1"
+    assert auth.get_token_user_id(token) == "user1"
+    assert clock.decodes == 1
+
+    clock.now += auth.TOKEN_CACHE_TTL
+    assert auth.get_token_user_id(token) == "user1"
+    assert clock.decodes == 2
+
+
+def test_cached_token_not_trusted_past_its_expiry(clock):
+    token = auth.create_access_token({"sub": "user1"}, expires_delta=timedelta(seconds=1))
+    exp = jwt.get_unverified_claims(token)["exp"]
+    clock.now = exp - 0.5
+
+    auth.get_token_user_id(token)
+    clock.now = exp
+    auth.get_token_user_id(token)
+    assert clock.decodes == 2
+
+
+def test_invalid_token_is_rejected_and_not_cached(clock):
+    token = auth.create_access_token({"sub": "user1"})
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            auth.get_token_user_id(token + "x")
+        assert exc_info.value.status_code == 401
+    assert clock.decodes == 2
+    assert not auth._token_cache
@@ -112,6 +112,26 @@ def test_deduplication_scheduler():
     print("=== Deduplication Scheduler Tests Completed Successfully ===")
 
 
+def test_hdf5_dataset_hash_matches_array(tmp_path):
+    """HDF5 datasets hash like the loaded array, whatever their chunk layout"""
+    import h5py
+    import numpy as np
+    
+    deduplication_service = DataDeduplication(str(tmp_path / "dedup"))
+    data = np.random.default_rng(0).random((500, 6))
+    with h5py.File(tmp_path / "data.h5", "w") as f:
+        f.create_dataset("contiguous", data=data)
+        f.create_dataset("small_chunks", data=data, chunks=(7, 4))
+        f.create_dataset("row_chunks", data=data, chunks=(100, 6))
+    
+    expected = deduplication_service.calculate_data_hash(data)
+    with h5py.File(tmp_path / "data.h5", "r") as f:
+        for name in f:
+            assert deduplication_service.calculate_data_hash(f[name]) == expected, name
+    assert deduplication_service.calculate_data_hash(data[::-1]) == expected
+    assert deduplication_service.calculate_data_hash(data + 1.0) != expected
+
+
 if __name__ == "__main__":
     try:
         test_data_deduplication()
@@ -0,0 +1,67 @@
+import time
+from src.agents.discussion import discussion_manager
+from src.agents.discussion.discussion_manager import DiscussionManager
+
+
+def _add(manager, paper_id, user_id, content):
+    # Message IDs are derived from the posting time in milliseconds
+    time.sleep(0.002)
+    return manager.add_message(paper_id, user_id, content)
+
+
+def _log_lines(manager, paper_id):
+    with open(manager._get_file_path(paper_id), "rb") as f:
+        return f.read().splitlines()
+
+
+def test_lookup_by_indexed_offset(tmp_path):
+    manager = DiscussionManager(str(tmp_path))
+    messages = [_add(manager, "paper1", f"user{i}", f"message {i}") for i in range(3)]
+
+    for message in messages:
+        assert manager.get_message("paper1", message.message_id).content == message.content
+    assert manager.get_message("paper1", "missing") is None
+    assert [m.message_id for m in manager.get_all_messages("paper1")] == [m.message_id for m in messages]
+
+
+def test_index_rebuilt_after_another_manager_writes(tmp_path):
+    manager = DiscussionManager(str(tmp_path))
+    other = DiscussionManager(str(tmp_path))
+    _add(manager, "paper1", "user1", "first")
+    manager.get_all_messages("paper1")
+
+    message = _add(other, "paper1", "user2", "second")
+    assert manager.get_message("paper1", message.message_id).content == "second"
+
+
+def test_delete_leaves_tombstone(tmp_path, monkeypatch):
+    monkeypatch.setattr(discussion_manager, "COMPACTION_TOMBSTONE_RATIO", 1.0)
+    manager = DiscussionManager(str(tmp_path))
+    kept = _add(manager, "paper1", "user1", "kept")
+    deleted = _add(manager, "paper1", "user2", "deleted")
+
+    assert not manager.delete_message("paper1", deleted.message_id, "user1")
+    assert manager.delete_message("paper1", deleted.message_id, "user2")
+    assert manager.get_message("paper1", deleted.message_id) is None
+    assert not manager.delete_message("paper1", deleted.message_id, "user2")
+
+    # Deleted in place: the record is commented out, not removed
+    lines = _log_lines(manager, "paper1")
+    assert len(lines) == 2 and lines[1].startswith(discussion_manager.DELETED_MARKER)
+    reopened = DiscussionManager(str(tmp_path))
+    assert [m.message_id for m in reopened.get_all_messages("paper1")] == [kept.message_id]
+
+
+def test_log_compacted_once_tombstones_pile_up(tmp_path):
+    manager = DiscussionManager(str(tmp_path))
+    messages = [_add(manager, "paper1", "user1", f"message {i}") for i in range(8)]
+    manager.get_all_messages("paper1")
+
+    for message in messages[:3]:
+        manager.delete_message("paper1", message.message_id, "user1")
+
+    lines = _log_lines(manager, "paper1")
+    assert len(lines) == 5
+    assert not any(line.startswith(discussion_manager.DELETED_MARKER) for line in lines)
+    for message in messages[3:]:
+        assert manager.get_message("paper1", message.message_id).content == message.content
@@ -0,0 +1,97 @@
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from src.agents.data_management.four_d_data_handler import FourDDataHandler, INDEX_BACKFILLED_VERSION
+from src.core.security.encryption import derive_encryption_key
+
+
+def _user_version(handler):
+    return handler._db.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _unindexed(handler):
+    return [row[0] for row in handler._db.execute("SELECT data_id FROM unindexed ORDER BY data_id")]
+
+
+def _reopen_without_index(handler, storage_path, remove_sidecars=()):
+    """Close handler and reopen its storage as if written before the index existed"""
+    handler.close()
+    for suffix in ("", "-wal", "-shm"):
+        path = os.path.join(storage_path, "index.db" + suffix)
+        if os.path.exists(path):
+            os.remove(path)
+    for data_id in remove_sidecars:
+        os.remove(os.path.join(storage_path, f"{data_id}{handler.meta_ext}"))
+    return FourDDataHandler(storage_path)
+
+
+def test_save_load_and_trace(tmp_path):
+    handler = FourDDataHandler(str(tmp_path))
+    key, _ = derive_encryption_key("test-password")
+    timestamp = datetime(2024, 1, 1, 12, 0)
+    data = np.arange(24, dtype=np.float64).reshape(2, 3, 4)
+
+    handler.save_four_d_data(data, "data_1", "user1", "paper1", timestamp, encryption_key=key)
+
+    loaded = handler.load_four_d_data("data_1", key)
+    assert np.array_equal(loaded["data"], data)
+    assert loaded["metadata"]["paper_id"] == "paper1"
+
+    traced = handler.trace_four_d_data_by_time(
+        "paper1", timestamp - timedelta(days=1), timestamp + timedelta(days=1), "user1", key
+    )
+    assert list(traced) == ["data_1"]
+    assert handler.trace_four_d_data_by_time(
+        "paper1", timestamp + timedelta(days=1), timestamp + timedelta(days=2), "user1", key
+    ) == {}
+    handler.close()
+
+
+def test_backfill_indexes_files_with_sidecars(tmp_path):
+    storage_path = str(tmp_path)
+    handler = FourDDataHandler(storage_path)
+    key, _ = derive_encryption_key("test-password")
+    timestamp = datetime(2024, 1, 1)
+    handler.save_four_d_data(np.arange(5), "data_1", "user1", "paper1", timestamp, encryption_key=key)
+
+    handler = _reopen_without_index(handler, storage_path)
+    assert _user_version(handler) == INDEX_BACKFILLED_VERSION
+    assert handler._db.execute("SELECT data_id FROM idx").fetchall() == [("data_1",)]
+    handler.close()
+
+
+def test_files_without_sidecar_are_indexed_on_first_trace(tmp_path, monkeypatch):
+    storage_path = str(tmp_path)
+    handler = FourDDataHandler(storage_path)
+    key, _ = derive_encryption_key("test-password")
+    other_key, _ = derive_encryption_key("other-password")
+    timestamp = datetime(2024, 1, 1)
+    start, end = timestamp - timedelta(days=1), timestamp + timedelta(days=1)
+    handler.save_four_d_data(np.arange(5), "data_1", "user1", "paper1", timestamp, encryption_key=key)
+    handler.save_four_d_data(np.arange(6), "data_2", "user2", "paper1", timestamp, encryption_key=other_key)
+
+    # Saved before sidecars existed: nothing can be indexed without decrypting
+    handler = _reopen_without_index(handler, storage_path, remove_sidecars=["data_1", "data_2"])
+    assert handler._db.execute("SELECT COUNT(*) FROM idx").fetchone()[0] == 0
+    assert _unindexed(handler) == ["data_1", "data_2"]
+    assert _user_version(handler) == INDEX_BACKFILLED_VERSION
+
+    # The first trace with a key indexes the files that key decrypts
+    assert list(handler.trace_four_d_data_by_time("paper1", start, end, "user1", key)) == ["data_1"]
+    assert os.path.exists(os.path.join(storage_path, f"data_1{handler.meta_ext}"))
+    assert _unindexed(handler) == ["data_2"]
+
+    # Files of other keys are not decrypted again by later traces with the same key
+    extract = handler._extract_metadata_without_decrypt
+    attempts = []
+    monkeypatch.setattr(handler, "_extract_metadata_without_decrypt", lambda *args: attempts.append(args) or extract(*args))
+    assert list(handler.trace_four_d_data_by_time("paper1", start, end, "user1", key)) == ["data_1"]
+    assert attempts == []
+
+    # Still recorded after a restart, until a trace with its key indexes it
+    handler.close()
+    handler = FourDDataHandler(storage_path)
+    assert list(handler.trace_four_d_data_by_time("paper1", start, end, "user2", other_key)) == ["data_2"]
+    assert _unindexed(handler) == []
+    assert handler._db.execute("SELECT COUNT(*) FROM unindexed_tried").fetchone()[0] == 0
+    handler.close()
@@ -0,0 +1,52 @@
+import asyncio
+import pandas as pd
+from src.core.models.paper_model import DynamicPaper
+
+
+def _make_orchestrator(tmp_path, monkeypatch):
+    # Every agent stores under ./storage, so run each test in its own directory
+    monkeypatch.chdir(tmp_path)
+    from src.agents.orchestrator.orchestrator import OrchestratorAgent
+    return OrchestratorAgent()
+
+
+def _write_csv(path, offset):
+    pd.DataFrame({"x": [offset, offset + 1, offset + 2], "y": [4, 5, 6]}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_concurrent_uploads_create_sequential_versions(tmp_path, monkeypatch):
+    orchestrator = _make_orchestrator(tmp_path, monkeypatch)
+    paper = DynamicPaper(paper_id="paper_1", title="Test", research_purpose="Test", creator="user1")
+    tasks = [
+        {
+            "task_id": f"task_{i}",
+            "user_id": "user1",
+            "paper_id": "paper_1",
+            "data_path": _write_csv(tmp_path / f"data_{i}.csv", i * 10)
+        }
+        for i in range(3)
+    ]
+
+    async def run():
+        await orchestrator.paper_version_manager.save_paper(paper)
+        await asyncio.gather(*(orchestrator.handle_task(task) for task in tasks))
+        return await orchestrator.paper_version_manager.get_paper("paper_1")
+
+    loaded = asyncio.run(run())
+    assert loaded.latest_version == 4
+    assert [version.version_number for version in loaded.versions] == [2, 3, 4]
+
+
+def test_duplicate_task_not_queued_twice(tmp_path, monkeypatch):
+    orchestrator = _make_orchestrator(tmp_path, monkeypatch)
+    data_path = _write_csv(tmp_path / "data.csv", 0)
+
+    async def run():
+        first = orchestrator.try_submit_task({"user_id": "user1", "paper_id": "paper_1", "data_path": data_path})
+        second = orchestrator.try_submit_task({"user_id": "user1", "paper_id": "paper_1", "data_path": data_path})
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert orchestrator.task_queue.qsize() == 1
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test script for file encryption
+"""
+
+import os
+import tempfile
+from src.agents.data_management.data_encryption import DataEncryptionService
+from src.core.security.encryption import derive_encryption_key, encrypt_content
+
+
+def test_file_encryption_roundtrip():
+    """Test streaming file encryption and legacy file decryption"""
+    print("\n=== Testing File Encryption ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = DataEncryptionService(salt_storage_path=os.path.join(tmp_dir, "salt"))
+        key, _ = derive_encryption_key("test-password")
+        
+        # Streamed across several chunks, including a partial final chunk
+        content = os.urandom(10_000)
+        plain_path = os.path.join(tmp_dir, "data.bin")
+        with open(plain_path, "wb") as f:
+            f.write(content)
+        
+        encrypted_path = service.encrypt_file_stream(plain_path, plain_path + ".enc", key, chunk=4096)
+        decrypted_path = service.decrypt_file(encrypted_path, key, output_path=plain_path + ".out")
+        with open(decrypted_path, "rb") as f:
+            assert f.read() == content
+        
+        # Truncated streams must not decrypt
+        with open(encrypted_path, "rb") as f:
+            encrypted = f.read()
+        with open(encrypted_path, "wb") as f:
+            f.write(encrypted[:-100])
+        try:
+            service.decrypt_file(encrypted_path, key, output_path=plain_path + ".bad")
+            assert False, "Truncated file decrypted"
+        except ValueError:
+            assert not os.path.exists(plain_path + ".bad")
+        
+        # Files written before streaming support still decrypt
+        legacy_path = os.path.join(tmp_dir, "legacy.bin.enc")
+        with open(legacy_path, "wb") as f:
+            f.write(encrypt_content(content, key))
+        with open(service.decrypt_file(legacy_path, key), "rb") as f:
+            assert f.read() == content
+        
+        print("✓ File encryption roundtrip works")
+
+
+if __name__ == "__main__":
+    test_file_encryption_roundtrip()
@@ -0,0 +1,78 @@
+import threading
+import pytest
+from src.agents.stats import stats_manager
+from src.agents.stats.stats_manager import StatsManager
+
+
+@pytest.fixture(autouse=True)
+def no_automatic_flush(monkeypatch):
+    # Increments stay buffered until flush() is called
+    monkeypatch.setattr(stats_manager, "STATS_FLUSH_THRESHOLD", 1 << 30)
+    monkeypatch.setattr(stats_manager, "STATS_FLUSH_INTERVAL", float("inf"))
+
+
+def test_increments_buffered_until_flush(tmp_path):
+    manager = StatsManager(str(tmp_path))
+    other = StatsManager(str(tmp_path))
+    for _ in range(3):
+        manager.increment_view("paper1")
+
+    assert manager.get_stats("paper1").view_count == 3
+    assert other.get_stats("paper1").view_count == 0
+
+    manager.flush()
+    assert manager.get_stats("paper1").view_count == 3
+    # other has the empty stats cached; the commit must invalidate them
+    assert other.get_stats("paper1").view_count == 3
+    assert other.get_stats("paper1").last_view_time is not None
+
+
+def test_flushes_add_to_stored_counts(tmp_path):
+    manager = StatsManager(str(tmp_path))
+    manager.increment_view("paper1")
+    manager.flush()
+    manager.increment_view("paper1")
+    manager.close()
+
+    assert StatsManager(str(tmp_path)).get_stats("paper1").view_count == 2
+
+
+def test_permission_change_seen_by_other_manager(tmp_path):
+    manager = StatsManager(str(tmp_path))
+    other = StatsManager(str(tmp_path))
+    with pytest.raises(PermissionError):
+        manager.increment_download("paper1")
+
+    other.set_download_permission("paper1", True)
+    assert manager.can_download("paper1")
+    manager.increment_download("paper1")
+    assert manager.get_stats("paper1").download_count == 1
+
+    manager.set_download_permission("paper1", False)
+    assert not manager.can_download("paper1")
+    assert not other.can_download("paper1")
+
+
+def test_concurrent_flushes_and_writes_keep_every_count(tmp_path, monkeypatch):
+    # Every increment flushes inline, racing the explicit flushes and permission writes
+    monkeypatch.setattr(stats_manager, "STATS_FLUSH_INTERVAL", 0.0)
+    manager = StatsManager(str(tmp_path))
+    views_per_thread = 500
+
+    def view():
+        for _ in range(views_per_thread):
+            manager.increment_view("paper1")
+
+    def flush_and_write():
+        for i in range(views_per_thread):
+            manager.flush()
+            manager.set_download_permission("paper1", i % 2 == 0)
+
+    threads = [threading.Thread(target=view) for _ in range(2)] + [threading.Thread(target=flush_and_write)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manager.close()
+
+    assert StatsManager(str(tmp_path)).get_stats("paper1").view_count == 2 * views_per_thread
@@ -0,0 +1,45 @@
+import threading
+from src.core.models.user_model import User
+from src.storage.user_db import UserDB
+
+
+def _user(user_id, **fields):
+    return User(user_id=user_id, username=user_id, email=f"{user_id}@example.com", hashed_password="hash", **fields)
+
+
+def test_add_and_get(tmp_path):
+    user_db = UserDB(str(tmp_path))
+    user = _user("user1", full_name="User One", is_admin=True, papers=["paper1", "paper2"])
+
+    assert user_db.add(user)
+    assert user_db.exists("user1")
+    assert not user_db.exists("user2")
+    assert user_db.get("user1") == user
+    assert user_db.get("user2") is None
+
+
+def test_duplicate_user_id_is_not_added(tmp_path):
+    user_db = UserDB(str(tmp_path))
+    assert user_db.add(_user("user1", full_name="Original"))
+
+    assert not user_db.add(_user("user1", full_name="Replacement"))
+    assert user_db.get("user1").full_name == "Original"
+    assert user_db.add_many([_user("user1"), _user("user2"), _user("user2")]) == 1
+    assert user_db.count() == 2
+
+
+def test_seeded_users_persist_across_reopen_and_threads(tmp_path):
+    seed = [_user("user1"), _user("admin", is_admin=True)]
+    assert UserDB(str(tmp_path)).add_many(seed) == 2
+
+    # Reopening must not seed again
+    user_db = UserDB(str(tmp_path))
+    assert user_db.count() == 2
+    assert user_db.add_many(seed) == 0
+
+    # Each thread uses its own connection to the same store
+    found = []
+    thread = threading.Thread(target=lambda: found.append(user_db.get("admin")))
+    thread.start()
+    thread.join()
+    assert found[0].is_admin